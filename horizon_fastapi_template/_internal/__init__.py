@@ -3,21 +3,39 @@
 import asyncio
 from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Any, AsyncGenerator, Callable, Coroutine, List
+from typing import Any, AsyncGenerator, Callable, Coroutine, List, Optional
 from fastapi.staticfiles import StaticFiles
 from fastapi import FastAPI
+from fastapi.datastructures import Default
+from fastapi.responses import JSONResponse
 
+from .database import close_base_api_clients, close_dynamic_clients
 from .middlewares import add_middlewares
 from .models.graphql import GraphQLVersion
 from .routes import add_routers, add_graphql_routes
+from .routes.api_route import TemplateAPIRoute, check_cached_routes
 from .tasks import get_tasks
-from .utils import logger_config, settings
+from .tasks.job_queue import JobQueue
+from .tasks.leader_election import LeaderElector
+from .utils import ApplicationSettings, RuntimeConfig, logger_config, settings as default_settings
+from .utils.runtime_config import LiveConfig
+from .utils.fast_json import FastJSONResponse
+from .utils.graceful_shutdown import GracefulShutdown
+from .utils.process_pool import ProcessPool
+from .utils.rate_limit import RateLimitBackend
+from .utils.tracing import Tracer
+
+settings = default_settings
 
 __all__ = ["general_create_app", "settings", "logger_config"]
 
 def general_create_app(
     *,
     async_background_tasks: List[Callable[[], Coroutine]] = None,
+    leader_background_tasks: List[Callable[[], Coroutine]] = None,
+    leader_elector: Optional[LeaderElector] = None,
+    job_queue: Optional[JobQueue] = None,
+    process_pool: Optional[ProcessPool] = None,
     enable_logging_middleware: bool = True,
     enable_time_recording_middleware: bool = True,
     enable_root_route: bool = True,
@@ -26,42 +44,144 @@ def general_create_app(
     enable_metrics_route: bool = True,
     enable_swagger_routes: bool = True,
     enable_probe_routes: bool = True,
+    enable_tracing_middleware: bool = False,
+    enable_profiling_routes: bool = False,
+    enable_fast_json: bool = False,
+    enable_compression_middleware: bool = False,
+    enable_rate_limit_middleware: bool = False,
+    enable_config_reload: bool = False,
+    enable_graceful_shutdown: bool = False,
+    close_shared_clients: bool = False,
+    rate_limit_backend: Optional[RateLimitBackend] = None,
     graphql_versions: List[GraphQLVersion] = None,
+    settings: Optional[ApplicationSettings] = None,
     **fastapi_kwargs: Any,
 ) -> FastAPI:
-    """Create and configure the FastAPI application."""
+    """Create and configure the FastAPI application.
+
+    ``settings`` defaults to the settings loaded from the environment. They are copied
+    into an immutable :class:`RuntimeConfig`, available as ``app.state.config``, so
+    applications with different settings can be created in the same process.
+
+    With ``enable_config_reload``, ``CONFIG_RELOAD_FILE`` is watched and its changes to
+    the log level, request logging, rate limits and trace sampling apply without a
+    restart; ``app.state.live_config`` holds the current config and its generation.
+
+    ``leader_background_tasks`` run on one replica at a time, elected by
+    ``leader_elector`` or, by default, by a :class:`LeaderElector` built from the
+    ``LEADER_ELECTION_*`` settings; it is available as ``app.state.leader_elector``.
+
+    The workers of ``job_queue`` run for the lifetime of the application, so handlers
+    can enqueue slow work and respond at once; the queue is available as
+    ``app.state.job_queue`` and through the ``get_job_queue`` dependency.
+
+    ``process_pool`` is started before the background tasks and shut down after
+    them; functions decorated with ``run_in_process`` run in it. It is available as
+    ``app.state.process_pool`` and through the ``get_process_pool`` dependency.
+
+    With ``enable_tracing_middleware``, sampled requests are traced into the
+    application's own :class:`Tracer`, ``app.state.tracer``, which ``TRACES_PATH``
+    serves and ``TRACE_EXPORT_FILE`` receives.
+
+    With ``enable_graceful_shutdown``, SIGTERM turns the readiness probe to 503 and
+    the server is only stopped after ``SHUTDOWN_DRAIN_DELAY`` seconds, once the
+    requests in flight finished or ``SHUTDOWN_DRAIN_TIMEOUT`` passed. The logs are
+    then flushed and the cleanups added to ``app.state.graceful_shutdown`` run before
+    the background tasks are cancelled.
+
+    With ``close_shared_clients``, the ``BaseAPI`` and Kubernetes clients, shared by
+    the whole process, are closed once the background tasks are cancelled. Leave it
+    off when several applications run in the same process.
+    """
+
+    config = RuntimeConfig.from_settings(settings if settings is not None else default_settings)
+    settings = config.settings
+    live_config = LiveConfig(config) if enable_config_reload else None
 
     if async_background_tasks is None:
         async_background_tasks = []
+    if leader_background_tasks and leader_elector is None:
+        leader_elector = LeaderElector.from_settings(settings)
+
+    graceful_shutdown = GracefulShutdown.from_settings(settings) if enable_graceful_shutdown else None
+    tracer = Tracer.from_settings(settings) if enable_tracing_middleware else None
+    if graceful_shutdown is not None and leader_elector is not None:
+        graceful_shutdown.add_cleanup(leader_elector.step_down)
 
     async_background_tasks.extend(
-        get_tasks(enable_uptime_background_task=enable_uptime_background_task)
+        get_tasks(
+            config,
+            enable_uptime_background_task=enable_uptime_background_task,
+            tracer=tracer,
+            live_config=live_config,
+            leader_elector=leader_elector,
+            leader_tasks=leader_background_tasks or (),
+            job_queue=job_queue,
+        )
     )
 
     @asynccontextmanager
     async def lifespan(app: FastAPI) -> AsyncGenerator[None, Any]:
+        # the routers are all included by now
+        check_cached_routes(app.routes)
         tasks: list[asyncio.Task] = []
 
+        if process_pool is not None:
+            process_pool.start()
+
         for coro_fn in async_background_tasks:
             task = asyncio.create_task(coro_fn())
             tasks.append(task)
 
+        if graceful_shutdown is not None:
+            graceful_shutdown.start()
+
         try:
             yield
         finally:
+            if graceful_shutdown is not None:
+                await graceful_shutdown.shutdown()
             for task in tasks:
                 task.cancel()
             await asyncio.gather(*tasks, return_exceptions=True)
+            if process_pool is not None:
+                await process_pool.shutdown()
+            if close_shared_clients:
+                # shared by the process, closed once the tasks using them are gone
+                await close_base_api_clients()
+                await close_dynamic_clients()
+
+    response_class = FastJSONResponse if enable_fast_json else JSONResponse
+    if enable_fast_json:
+        # kept a placeholder so routes with a response model still serialize through pydantic
+        fastapi_kwargs.setdefault("default_response_class", Default(FastJSONResponse))
 
     app = FastAPI(
         **fastapi_kwargs,
         docs_url=None,
         redoc_url=None,
-        openapi_url=settings.OPENAPI_JSON_URL,
+        openapi_url=config.openapi_json_url,
         lifespan=lifespan,
-        root_path=settings.PROXY_LISTEN_PATH,
+        root_path=config.root_path,
     )
 
+    app.state.config = config
+    if leader_elector is not None:
+        app.state.leader_elector = leader_elector
+    if job_queue is not None:
+        app.state.job_queue = job_queue
+    if process_pool is not None:
+        app.state.process_pool = process_pool
+    if graceful_shutdown is not None:
+        app.state.graceful_shutdown = graceful_shutdown
+    if tracer is not None:
+        app.state.tracer = tracer
+    if live_config is not None:
+        app.state.live_config = live_config
+        live_config.subscribe(lambda current: setattr(app.state, "config", current))
+        live_config.subscribe(lambda current: logger_config.set_level(current.settings.LOG_LEVEL))
+    app.router.route_class = TemplateAPIRoute
+
     static_dir = Path(__file__).parent.parent / "static"
 
     app.mount(
@@ -74,19 +194,31 @@ def general_create_app(
 
     add_routers(
         app,
+        config,
         enable_metrics=enable_metrics_route,
         enable_swagger=enable_swagger_routes,
         enable_probe=enable_probe_routes,
+        enable_profiling=enable_profiling_routes,
+        graceful_shutdown=graceful_shutdown,
+        tracer=tracer,
     )
 
     add_middlewares(
         app,
+        config,
         enable_request_logging=enable_logging_middleware,
         enable_request_timing=enable_time_recording_middleware,
         enable_exception_handlers=enable_exception_handlers,
+        enable_response_compression=enable_compression_middleware,
+        enable_rate_limiting=enable_rate_limit_middleware,
+        rate_limit_backend=rate_limit_backend,
+        response_class=response_class,
+        live_config=live_config,
+        graceful_shutdown=graceful_shutdown,
+        tracer=tracer,
     )
 
-    @app.get(settings.SWAGGER_OPENAPI_JSON_URL, include_in_schema=False)
+    @app.get(config.swagger_openapi_json_url, include_in_schema=False)
     async def get_openapi():
         return app.openapi()
 
@@ -99,6 +231,6 @@ def general_create_app(
 
         static_files = Path(__file__).parent.parent / settings.GRAPHIQL_STATIC_FILES
 
-        add_graphql_routes(app, graphql_versions, static_files)
+        add_graphql_routes(app, graphql_versions, static_files, enable_tracing=enable_tracing_middleware)
 
     return app
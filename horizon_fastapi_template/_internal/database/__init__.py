@@ -1,7 +1,47 @@
 """Database and external service utilities."""
 
-from .basic_api import BaseAPI
-from .ftp_client import AsyncFTPClient
-from .kube_client import get_dynamic_client
+from .basic_api import BaseAPI, close_base_api_clients
+from .ftp_client import AsyncFTPClient, FTPEntry, TransferResult, TransferVerificationError
+from .kube_client import (
+    KubeOperationResult,
+    close_dynamic_clients,
+    get_dynamic_client,
+    kube_bulk_apply,
+    kube_bulk_delete,
+    kube_bulk_patch,
+    kube_list,
+    kube_list_pages,
+)
+from .pagination import (
+    ChainedPagination,
+    CursorPagination,
+    IndexedPagination,
+    LinkHeaderPagination,
+    OffsetPagination,
+    PageNumberPagination,
+    Pagination,
+)
 
-__all__ = ["BaseAPI", "AsyncFTPClient", "get_dynamic_client"]
+__all__ = [
+    "BaseAPI",
+    "close_base_api_clients",
+    "AsyncFTPClient",
+    "FTPEntry",
+    "TransferResult",
+    "TransferVerificationError",
+    "KubeOperationResult",
+    "close_dynamic_clients",
+    "get_dynamic_client",
+    "kube_bulk_apply",
+    "kube_bulk_delete",
+    "kube_bulk_patch",
+    "kube_list",
+    "kube_list_pages",
+    "ChainedPagination",
+    "CursorPagination",
+    "IndexedPagination",
+    "LinkHeaderPagination",
+    "OffsetPagination",
+    "PageNumberPagination",
+    "Pagination",
+]
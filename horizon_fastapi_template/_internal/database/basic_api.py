@@ -1,7 +1,62 @@
+import asyncio
+import os
+import time
+import weakref
+from collections import deque
+from contextlib import asynccontextmanager
+
 import httpx
-from typing import Optional, Dict, Tuple
+from typing import Any, AsyncIterator, Deque, Optional, Dict, Sequence, Tuple, Union
 
+from fastapi.responses import StreamingResponse
 from httpx import AsyncClient
+from starlette.background import BackgroundTask
+
+from ..utils.fast_json import json_loads
+from ..utils.json_stream import iter_json_items
+from ..utils.tracing import SPAN_KIND_CLIENT, current_span, record_span
+from .pagination import IndexedPagination, PageRequest, Pagination
+
+_TRACE_START_KEY = "trace_start_ns"
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# httpx's own defaults
+DEFAULT_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+
+# upstream headers worth forwarding with a proxied body, hop-by-hop ones excluded
+_FORWARDED_HEADERS = (
+    "cache-control",
+    "content-disposition",
+    "content-encoding",
+    "content-language",
+    "content-length",
+    "content-type",
+    "etag",
+    "last-modified",
+)
+
+
+async def _trace_request_start(request: httpx.Request) -> None:
+    if current_span() is not None:
+        request.extensions[_TRACE_START_KEY] = time.perf_counter_ns()
+
+
+async def _trace_request_end(response: httpx.Response) -> None:
+    start = response.request.extensions.get(_TRACE_START_KEY)
+    if start is not None:
+        record_span(
+            "http",
+            start,
+            time.perf_counter_ns(),
+            SPAN_KIND_CLIENT,
+            **{
+                "http.method": response.request.method,
+                # the query string may hold credentials, traces are served and exported
+                "http.url": str(response.request.url.copy_with(query=None)),
+                "http.status_code": response.status_code,
+            },
+        )
 
 
 class BaseAPI:
@@ -12,14 +67,27 @@ class BaseAPI:
         auth: Optional[Tuple[str, str]] = None,
         timeout: float = 10.0,
         verify: bool = False,
+        limits: Optional[httpx.Limits] = None,
     ):
         self.base_url = base_url.rstrip("/")
         self.headers = headers or {}
         self.auth = auth
         self.timeout = timeout
         self.verify = verify
+        self.limits = limits or DEFAULT_LIMITS
         self._client: Optional[httpx.AsyncClient] = None
 
+    def _build_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=self.headers,
+            timeout=self.timeout,
+            verify=self.verify,
+            auth=self.auth,
+            limits=self.limits,
+            event_hooks={"request": [_trace_request_start], "response": [_trace_request_end]},
+        )
+
     @property
     def client(self) -> httpx.AsyncClient:
         """Return an AsyncClient.
@@ -30,26 +98,207 @@ class BaseAPI:
         if self._client:
             return self._client
         # Outside context: return a temporary client (must be used with `async with`)
-        return httpx.AsyncClient(
-            base_url=self.base_url,
-            headers=self.headers,
-            timeout=self.timeout,
-            verify=self.verify,
-            auth=self.auth,
+        return self._build_client()
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[httpx.AsyncClient]:
+        """Yield the reusable client inside `async with`, a temporary one otherwise."""
+        if self._client:
+            yield self._client
+            return
+        async with self._build_client() as client:
+            yield client
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, **kwargs: Any) -> AsyncIterator[httpx.Response]:
+        """Send a request and yield its response with the body still unread, raising on 4xx and 5xx."""
+        async with self.session() as client:
+            async with client.stream(method, url, **kwargs) as response:
+                response.raise_for_status()
+                yield response
+
+    async def iter_ndjson(self, url: str, *, method: str = "GET", **kwargs: Any) -> AsyncIterator[Any]:
+        """Yield the records of an NDJSON / JSON Lines response as each line arrives."""
+        async with self.stream(method, url, **kwargs) as response:
+            async for line in response.aiter_lines():
+                if line.strip():
+                    yield json_loads(line)
+
+    async def iter_json_items(
+        self,
+        url: str,
+        *,
+        path: Sequence[str] = (),
+        method: str = "GET",
+        chunk_size: int = STREAM_CHUNK_SIZE,
+        **kwargs: Any,
+    ) -> AsyncIterator[Any]:
+        """Yield the items of a JSON array response one by one while it downloads.
+
+        ``path`` names the keys leading to the array, e.g. ``("data", "items")`` for
+        ``{"data": {"items": [...]}}``, empty when the response is the array itself.
+        """
+        async with self.stream(method, url, **kwargs) as response:
+            async for item in iter_json_items(response.aiter_text(chunk_size), path):
+                yield item
+
+    async def download_to_file(
+        self,
+        url: str,
+        path: Union[str, os.PathLike],
+        *,
+        method: str = "GET",
+        chunk_size: int = STREAM_CHUNK_SIZE,
+        **kwargs: Any,
+    ) -> int:
+        """Write a response body to ``path`` chunk by chunk and return its size in bytes."""
+        size = 0
+        async with self.stream(method, url, **kwargs) as response:
+            with open(path, "wb") as file_handle:
+                async for chunk in response.aiter_bytes(chunk_size):
+                    file_handle.write(chunk)
+                    size += len(chunk)
+        return size
+
+    async def proxy(
+        self,
+        url: str,
+        *,
+        method: str = "GET",
+        chunk_size: int = STREAM_CHUNK_SIZE,
+        **kwargs: Any,
+    ) -> StreamingResponse:
+        """Return a ``StreamingResponse`` relaying an upstream response as it arrives.
+
+        The status, content headers and still encoded body are passed through, and the
+        upstream connection is closed once the body has been sent.
+        """
+        client = self._client or self._build_client()
+        owned = self._client is None
+        try:
+            response = await client.send(client.build_request(method, url, **kwargs), stream=True)
+        except BaseException:
+            if owned:
+                await client.aclose()
+            raise
+
+        async def close() -> None:
+            # runs twice when the body completes: from the generator, then as background task
+            if not response.is_closed:
+                await response.aclose()
+            if owned and not client.is_closed:
+                await client.aclose()
+
+        async def body() -> AsyncIterator[bytes]:
+            try:
+                async for chunk in response.aiter_raw(chunk_size):
+                    yield chunk
+            finally:
+                # also reached when the downstream client disconnects mid-body
+                await close()
+
+        headers = {name: response.headers[name] for name in _FORWARDED_HEADERS if name in response.headers}
+        return StreamingResponse(
+            body(),
+            status_code=response.status_code,
+            headers=headers,
+            background=BackgroundTask(close),
         )
 
+    async def paginate(
+        self,
+        url: str,
+        pagination: Pagination,
+        *,
+        params: Optional[Dict[str, Any]] = None,
+        prefetch: int = 2,
+        method: str = "GET",
+        **kwargs: Any,
+    ) -> AsyncIterator[Any]:
+        """Yield the items of every page, in order, while the next pages download.
+
+        Indexed strategies (offset, page number) keep ``prefetch`` pages in flight
+        beyond the one being consumed, capped by the client's ``max_connections``.
+        Chained strategies (cursor, ``Link`` header) request the next page as soon as
+        the current one is received, before its items are consumed, unless
+        ``prefetch`` is 0. Pages fetched past the end are discarded.
+        """
+        async with self.session() as client:
+
+            async def fetch(request: PageRequest) -> Tuple[httpx.Response, Any]:
+                page_url, page_params = request
+                # an empty mapping would strip the query of a URL that carries its own
+                response = await client.request(method, page_url, params=page_params or None, **kwargs)
+                response.raise_for_status()
+                return response, json_loads(response.content)
+
+            base_params = dict(params or {})
+            in_flight = max(1, prefetch + 1)
+            if self.limits.max_connections is not None:
+                in_flight = min(in_flight, self.limits.max_connections)
+            pending: Deque[asyncio.Future] = deque()
+
+            try:
+                if isinstance(pagination, IndexedPagination):
+                    for index in range(in_flight):
+                        pending.append(asyncio.ensure_future(fetch(pagination.page_request(url, base_params, index))))
+                    index = 0
+                    while pending:
+                        _, body = await pending.popleft()
+                        items = pagination.items(body)
+                        if pagination.is_last(body, items, index):
+                            pending_pages = list(pending)
+                            pending.clear()
+                            for task in pending_pages:
+                                task.cancel()
+                        else:
+                            next_index = index + in_flight
+                            pending.append(asyncio.ensure_future(
+                                fetch(pagination.page_request(url, base_params, next_index))
+                            ))
+                        index += 1
+                        for item in items:
+                            yield item
+                    return
+
+                request: Optional[PageRequest] = (url, base_params)
+                pending.append(asyncio.ensure_future(fetch(request)))
+                while pending:
+                    response, body = await pending.popleft()
+                    request = pagination.next_request(response, body, request)
+                    if request is not None and prefetch > 0:
+                        pending.append(asyncio.ensure_future(fetch(request)))
+                    for item in pagination.items(body):
+                        yield item
+                    if request is not None and not pending:
+                        pending.append(asyncio.ensure_future(fetch(request)))
+            finally:
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    async def aclose(self) -> None:
+        """Close the reusable client opened by ``async with``, if any."""
+        _open_apis.discard(self)
+        if self._client:
+            client, self._client = self._client, None
+            await client.aclose()
+
     # Context manager
     async def __aenter__(self) -> AsyncClient:
-        self._client = httpx.AsyncClient(
-            base_url=self.base_url,
-            headers=self.headers,
-            timeout=self.timeout,
-            verify=self.verify,
-            auth=self.auth,
-        )
+        self._client = self._build_client()
+        _open_apis.add(self)
         return self._client
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self._client:
-            await self._client.aclose()
-            self._client = None
+        await self.aclose()
+
+
+# instances holding a reusable client, closed together on shutdown
+_open_apis: "weakref.WeakSet[BaseAPI]" = weakref.WeakSet()
+
+
+async def close_base_api_clients() -> None:
+    """Close the reusable clients of every ``BaseAPI`` still inside ``async with``, e.g. on shutdown."""
+    for api in list(_open_apis):
+        await api.aclose()
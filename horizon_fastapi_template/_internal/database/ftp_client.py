@@ -1,11 +1,166 @@
 """Async FTP client utility."""
 
+import asyncio
+import hashlib
+import os
+import re
+import zlib
 from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
 from io import BytesIO
-from pathlib import Path
-from typing import AsyncGenerator, Optional
+from pathlib import Path, PurePosixPath
+from typing import AsyncGenerator, AsyncIterator, Awaitable, BinaryIO, Callable, Dict, List, Optional, Sequence, Tuple
 
 import aioftp
+from loguru import logger
+
+from ..utils.tracing import SPAN_KIND_CLIENT, traced
+
+TRANSFER_BLOCK_SIZE = 64 * 1024
+MAX_RETRY_DELAY = 30.0
+
+
+class TransferVerificationError(IOError):
+    """The transferred file differs from its source in size or checksum."""
+
+
+@dataclass(frozen=True)
+class TransferResult:
+    size: int
+    attempts: int
+    # "none", "size", or the server hash command that confirmed the content
+    verified_with: str
+
+
+class _Crc32:
+    def __init__(self) -> None:
+        self._value = 0
+
+    def update(self, data: bytes) -> None:
+        self._value = zlib.crc32(data, self._value)
+
+    def hexdigest(self) -> str:
+        return f"{self._value:08x}"
+
+
+_HASH_ALGORITHMS = {
+    "SHA-256": hashlib.sha256,
+    "SHA-512": hashlib.sha512,
+    "SHA-1": hashlib.sha1,
+    "MD5": hashlib.md5,
+    "CRC32": _Crc32,
+}
+
+
+class _Digests:
+    """Checksums computed while the data streams through, one per algorithm needed."""
+
+    def __init__(self, algorithms: List[str]) -> None:
+        self._hashers = {name: _HASH_ALGORITHMS[name]() for name in algorithms}
+
+    def update(self, data: bytes) -> None:
+        for hasher in self._hashers.values():
+            hasher.update(data)
+
+    def update_from(self, file_handle: BinaryIO, length: int) -> None:
+        """Hash the first ``length`` bytes of a local file, the part a resumed transfer skips."""
+
+        if not self._hashers:
+            return
+        file_handle.seek(0)
+        while length > 0:
+            block = file_handle.read(min(TRANSFER_BLOCK_SIZE, length))
+            if not block:
+                break
+            self.update(block)
+            length -= len(block)
+
+    def hexdigest(self, algorithm: str) -> str:
+        return self._hashers[algorithm].hexdigest()
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, aioftp.StatusCodeError):
+        # 4xx replies are transient by definition, 5xx ones are not worth repeating
+        return any(str(code).startswith("4") for code in exc.received_codes)
+    return isinstance(exc, (OSError, asyncio.TimeoutError))
+
+
+def _hex_values(lines: List[str]) -> List[int]:
+    values = []
+    for token in " ".join(lines).split():
+        try:
+            values.append(int(token, 16))
+        except ValueError:
+            continue
+    return values
+
+
+_UNKNOWN = object()
+
+
+@dataclass(frozen=True)
+class FTPEntry:
+    path: str
+    type: str
+    size: Optional[int]
+    modified: Optional[datetime]
+
+
+def _entry(path: PurePosixPath, info: Dict[str, str]) -> FTPEntry:
+    size = info.get("size")
+    modified = info.get("modify")
+    try:
+        # MLSD facts and aioftp's LIST parsing both use YYYYMMDDHHMMSS[.sss] in UTC
+        timestamp = datetime.strptime(modified[:14], "%Y%m%d%H%M%S").replace(tzinfo=timezone.utc) if modified else None
+    except ValueError:
+        timestamp = None
+    return FTPEntry(
+        path=str(path),
+        type=info.get("type", "file"),
+        size=int(size) if size is not None and str(size).isdigit() else None,
+        modified=timestamp,
+    )
+
+
+def _glob_regex(pattern: str) -> "re.Pattern[str]":
+    """Translate a glob where ``*`` and ``?`` stop at ``/`` and ``**`` spans directories."""
+
+    parts = []
+    index = 0
+    while index < len(pattern):
+        if pattern.startswith("**/", index):
+            parts.append("(?:.*/)?")
+            index += 3
+        elif pattern.startswith("**", index):
+            parts.append(".*")
+            index += 2
+        elif pattern[index] == "*":
+            parts.append("[^/]*")
+            index += 1
+        elif pattern[index] == "?":
+            parts.append("[^/]")
+            index += 1
+        else:
+            parts.append(re.escape(pattern[index]))
+            index += 1
+    return re.compile("".join(parts) + r"\Z")
+
+
+class _PathFilter:
+    """Glob patterns matched against the path relative to the walk root, or against the
+    name alone for patterns without ``/``, as in ``.gitignore`` files."""
+
+    def __init__(self, patterns: Sequence[str]) -> None:
+        self._path_patterns = [_glob_regex(pattern.strip("/")) for pattern in patterns if "/" in pattern.strip("/")]
+        self._name_patterns = [_glob_regex(pattern) for pattern in patterns if "/" not in pattern.strip("/")]
+
+    def __call__(self, relative: str) -> bool:
+        name = relative.rsplit("/", 1)[-1]
+        return any(pattern.match(name) for pattern in self._name_patterns) or any(
+            pattern.match(relative) for pattern in self._path_patterns
+        )
 
 
 class AsyncFTPClient:
@@ -24,6 +179,8 @@ class AsyncFTPClient:
         self.port = port
         self.base_dir = base_dir
         self.override = override
+        # (command, algorithm) of the server hash command, found through FEAT on first use
+        self._server_hash = _UNKNOWN
 
     @classmethod
     async def create(
@@ -48,19 +205,132 @@ class AsyncFTPClient:
         finally:
             await client.quit()
 
+    @traced("ftp.pwd", SPAN_KIND_CLIENT)
     async def pwd(self) -> str:
         async with self._get_client() as client:
             return str(await client.get_current_directory())
 
+    @traced("ftp.cd", SPAN_KIND_CLIENT)
     async def cd(self, path: str) -> None:
+        """Change the directory every later session starts in."""
+
         async with self._get_client() as client:
             await client.change_directory(path)
+            self.base_dir = str(await client.get_current_directory())
 
+    @traced("ftp.list", SPAN_KIND_CLIENT)
     async def list(self) -> list[str]:
         async with self._get_client() as client:
             entry_list = await client.list()
             return [entry[0].name for entry in entry_list]
 
+    async def walk(
+        self,
+        path: str = ".",
+        *,
+        max_depth: Optional[int] = None,
+        include: Sequence[str] = (),
+        exclude: Sequence[str] = (),
+        sessions: int = 4,
+        buffer_size: int = 1000,
+    ) -> AsyncIterator[FTPEntry]:
+        """Yield the files and directories below ``path`` as their directories are listed.
+
+        Directories are listed concurrently over up to ``sessions`` connections, so entries
+        arrive in no particular order. ``max_depth`` 1 lists ``path`` alone. ``exclude``
+        globs prune matching entries and everything below them; when ``include`` globs
+        are given only matching entries are yielded, though every directory is still
+        traversed. At most ``buffer_size`` entries wait for the consumer, and breaking
+        out of the loop closes the sessions.
+        """
+
+        root = PurePosixPath(path)
+        is_included = _PathFilter(include) if include else None
+        is_excluded = _PathFilter(exclude)
+        directories: "asyncio.Queue[Tuple[PurePosixPath, int]]" = asyncio.Queue()
+        entries: "asyncio.Queue[object]" = asyncio.Queue(maxsize=buffer_size)
+        done = object()
+        directories.put_nowait((root, 1))
+
+        async def lister() -> None:
+            async with self._get_client() as client:
+                while True:
+                    directory, depth = await directories.get()
+                    try:
+                        listing = await client.list(directory)
+                    except aioftp.StatusCodeError as exc:
+                        # like os.walk, an unreadable directory does not end the walk
+                        logger.warning(f"FTP walk skipped '{directory}': {exc}")
+                        listing = []
+                    for item_path, info in listing:
+                        relative = str(item_path.relative_to(root)) if root != PurePosixPath(".") else str(item_path)
+                        if is_excluded(relative):
+                            continue
+                        entry = _entry(item_path, info)
+                        if entry.type == "dir" and (max_depth is None or depth < max_depth):
+                            directories.put_nowait((item_path, depth + 1))
+                        if is_included is None or is_included(relative):
+                            await entries.put(entry)
+                    directories.task_done()
+
+        async def supervise() -> None:
+            workers = [asyncio.create_task(lister()) for _ in range(max(1, sessions))]
+            finished = asyncio.create_task(directories.join())
+            try:
+                await asyncio.wait([finished, *workers], return_when=asyncio.FIRST_COMPLETED)
+                for worker in workers:
+                    if worker.done() and worker.exception() is not None:
+                        raise worker.exception()
+            finally:
+                finished.cancel()
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(finished, *workers, return_exceptions=True)
+
+        async def run() -> None:
+            try:
+                await supervise()
+            except Exception as exc:
+                await entries.put(exc)
+            else:
+                await entries.put(done)
+
+        runner = asyncio.create_task(run())
+        try:
+            while True:
+                item = await entries.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            runner.cancel()
+            await asyncio.gather(runner, return_exceptions=True)
+
+    async def glob(self, pattern: str, *, sessions: int = 4) -> AsyncIterator[FTPEntry]:
+        """Yield the entries matching ``pattern``, e.g. ``"logs/**/*.gz"``.
+
+        ``*`` and ``?`` stop at ``/``, ``**`` spans any number of directories. Listing
+        starts at the pattern's literal leading directories and goes no deeper than it
+        allows.
+        """
+
+        parts = PurePosixPath(pattern).parts
+        literal = 0
+        while literal < len(parts) - 1 and not any(char in parts[literal] for char in "*?"):
+            literal += 1
+        root = str(PurePosixPath(*parts[:literal])) if literal else "."
+        remainder = "/".join(parts[literal:])
+        max_depth = None if "**" in remainder else len(parts) - literal
+        matches = _glob_regex(remainder)
+
+        async for entry in self.walk(root, max_depth=max_depth, sessions=sessions):
+            relative = str(PurePosixPath(entry.path).relative_to(root)) if root != "." else entry.path
+            if matches.match(relative):
+                yield entry
+
+    @traced("ftp.rename", SPAN_KIND_CLIENT)
     async def rename(self, name: str, new_name: str) -> None:
         async with self._get_client() as client:
             if not await self.file_exists(name):
@@ -72,6 +342,7 @@ class AsyncFTPClient:
 
             await client.rename(name, new_name)
 
+    @traced("ftp.download", SPAN_KIND_CLIENT)
     async def download(self, filename: str) -> bytes:
         async with self._get_client() as client:
             data_stream = BytesIO()
@@ -81,32 +352,268 @@ class AsyncFTPClient:
             data_stream.seek(0)
             return data_stream.read()
 
-    async def upload(self, filename: str, content: bytes) -> None:
+    @traced("ftp.upload", SPAN_KIND_CLIENT)
+    async def upload(self, filename: str, content: bytes, *, verify: bool = True) -> None:
         async with self._get_client() as client:
+            digests = await self._digests(client, verify)
             data_stream = BytesIO(content)
             temp_name = f"{filename}.tmp"
 
             async with client.upload_stream(temp_name) as stream:
                 await stream.write(data_stream.read())
 
+            if verify:
+                digests.update(content)
+                await self._verify(client, temp_name, len(content), digests)
+
             await self.rename(temp_name, filename)
 
-    async def upload_from_file(self, local_path: str, remote_name: Optional[str] = None) -> None:
+    @traced("ftp.upload_from_file", SPAN_KIND_CLIENT)
+    async def upload_from_file(
+        self,
+        local_path: str,
+        remote_name: Optional[str] = None,
+        *,
+        resume: bool = True,
+        verify: bool = True,
+        retries: int = 3,
+        retry_delay: float = 1.0,
+    ) -> TransferResult:
+        """Upload through ``<remote_name>.tmp``, renamed once complete and verified.
+
+        Failed attempts are retried ``retries`` times on a new session; with ``resume``
+        each one continues the ``.tmp`` file from its size with ``REST``. A ``.tmp`` file
+        left by a previous call is only continued when the server has a checksum
+        command to confirm the result, it is overwritten otherwise. See
+        :meth:`download_to_file` for verification.
+        """
+
         remote_name = remote_name or Path(local_path).name
-        async with self._get_client() as client:
-            temp_name = f"{remote_name}.tmp"
-            async with aioftp.PathIO() as aio:
-                async with aio.open(local_path, "rb") as file_handle:
-                    await client.upload(file_handle, temp_name)
+        result = await self._with_retries(
+            f"upload of '{local_path}'",
+            lambda client, restart, first: self._upload_attempt(
+                client, local_path, f"{remote_name}.tmp", restart, first, verify
+            ),
+            resume,
+            retries,
+            retry_delay,
+        )
+        await self.rename(f"{remote_name}.tmp", remote_name)
+        return result
 
-            await self.rename(temp_name, remote_name)
+    @traced("ftp.download_to_file", SPAN_KIND_CLIENT)
+    async def download_to_file(
+        self,
+        remote_name: str,
+        local_path: str,
+        *,
+        resume: bool = True,
+        verify: bool = True,
+        expected_sha256: Optional[str] = None,
+        retries: int = 3,
+        retry_delay: float = 1.0,
+    ) -> TransferResult:
+        """Download ``remote_name`` to ``local_path``, resuming failed attempts with ``REST``.
 
-    async def download_to_file(self, remote_name: str, local_path: str) -> None:
-        async with self._get_client() as client:
-            async with aioftp.PathIO() as aio:
-                async with aio.open(local_path, "wb") as file_handle:
-                    await client.download(remote_name, file_handle)
+        Failed attempts are retried ``retries`` times on a new session; with ``resume``
+        each one continues where the last one stopped, so a failure costs what is left
+        to transfer. An existing ``local_path`` is only taken for a partial copy when
+        its content can be confirmed afterwards, by ``expected_sha256`` or a server
+        checksum command; it is overwritten otherwise.
+        ``verify`` compares sizes, and checksums when the server has a ``HASH``, ``XMD5``
+        or ``XCRC`` command; the local checksum is computed while the data streams.
+        ``expected_sha256`` is checked against that streaming checksum as well. A
+        resumed transfer failing verification is restarted from zero once.
+        """
+
+        return await self._with_retries(
+            f"download of '{remote_name}'",
+            lambda client, restart, first: self._download_attempt(
+                client, remote_name, local_path, restart, first, verify, expected_sha256
+            ),
+            resume,
+            retries,
+            retry_delay,
+        )
+
+    async def _with_retries(
+        self,
+        description: str,
+        attempt: Callable[[aioftp.Client, bool, bool], Awaitable[Tuple[int, str]]],
+        resume: bool,
+        retries: int,
+        retry_delay: float,
+    ) -> TransferResult:
+        restart = not resume
+        attempts = 0
+        while True:
+            attempts += 1
+            try:
+                async with self._get_client() as client:
+                    size, verified_with = await attempt(client, restart, attempts == 1)
+                return TransferResult(size=size, attempts=attempts, verified_with=verified_with)
+            except TransferVerificationError as exc:
+                # what was kept from an earlier attempt may be what differs, start over once
+                if attempts > retries or restart:
+                    raise
+                restart = True
+                logger.warning(f"FTP {description} failed verification, restarting from zero: {exc}")
+            except Exception as exc:
+                if attempts > retries or not _is_retryable(exc):
+                    raise
+                logger.warning(f"FTP {description} failed (attempt {attempts}/{retries + 1}), resuming: {exc!r}")
+            await asyncio.sleep(min(retry_delay * 2 ** (attempts - 1), MAX_RETRY_DELAY))
+
+    async def _can_confirm(self, client: aioftp.Client, verify: bool, expected_sha256: Optional[str] = None) -> bool:
+        """Whether a checksum will tell a stale file left by a previous call from a partial copy."""
+
+        return bool(expected_sha256) or (verify and await self._hash_command(client) is not None)
+
+    async def _upload_attempt(
+        self, client: aioftp.Client, local_path: str, temp_name: str, restart: bool, first: bool, verify: bool
+    ) -> Tuple[int, str]:
+        size = await asyncio.to_thread(os.path.getsize, local_path)
+        digests = await self._digests(client, verify)
+        if first and not restart:
+            restart = not await self._can_confirm(client, verify)
+
+        offset = 0
+        if not restart:
+            uploaded = await self._remote_size(client, temp_name)
+            if uploaded is not None and uploaded <= size:
+                offset = uploaded
+
+        file_handle = await asyncio.to_thread(open, local_path, "rb")
+        try:
+            await asyncio.to_thread(digests.update_from, file_handle, offset)
+            file_handle.seek(offset)
+            if offset < size or size == 0:
+                async with client.upload_stream(temp_name, offset=offset) as stream:
+                    while True:
+                        block = await asyncio.to_thread(file_handle.read, TRANSFER_BLOCK_SIZE)
+                        if not block:
+                            break
+                        digests.update(block)
+                        await stream.write(block)
+        finally:
+            await asyncio.to_thread(file_handle.close)
+
+        verified_with = await self._verify(client, temp_name, size, digests) if verify else "none"
+        return size, verified_with
+
+    async def _download_attempt(
+        self,
+        client: aioftp.Client,
+        remote_name: str,
+        local_path: str,
+        restart: bool,
+        first: bool,
+        verify: bool,
+        expected_sha256: Optional[str],
+    ) -> Tuple[int, str]:
+        size = await self._remote_size(client, remote_name)
+        if size is None:
+            raise FileNotFoundError(f"File '{remote_name}' does not exist.")
+        digests = await self._digests(client, verify, ["SHA-256"] if expected_sha256 else [])
+        if first and not restart:
+            restart = not await self._can_confirm(client, verify, expected_sha256)
+
+        offset = 0
+        if not restart and await asyncio.to_thread(os.path.exists, local_path):
+            offset = await asyncio.to_thread(os.path.getsize, local_path)
+            if offset > size:
+                offset = 0
+
+        file_handle = await asyncio.to_thread(open, local_path, "r+b" if offset else "wb")
+        try:
+            await asyncio.to_thread(digests.update_from, file_handle, offset)
+            file_handle.seek(offset)
+            await asyncio.to_thread(file_handle.truncate)
+            if offset < size:
+                async with client.download_stream(remote_name, offset=offset) as stream:
+                    async for block in stream.iter_by_block(TRANSFER_BLOCK_SIZE):
+                        await asyncio.to_thread(file_handle.write, block)
+                        digests.update(block)
+            received = file_handle.tell()
+        finally:
+            await asyncio.to_thread(file_handle.close)
+
+        if received != size:
+            raise TransferVerificationError(f"Received {received} bytes of '{remote_name}', expected {size}.")
+        if expected_sha256 and digests.hexdigest("SHA-256") != expected_sha256.lower():
+            raise TransferVerificationError(f"SHA-256 of '{remote_name}' does not match the expected checksum.")
+        verified_with = await self._verify(client, remote_name, size, digests) if verify else "none"
+        return size, verified_with
+
+    async def _remote_size(self, client: aioftp.Client, name: str) -> Optional[int]:
+        """Size of ``name`` with ``SIZE``, or ``MLST``/``LIST`` without it, None when missing."""
+
+        try:
+            _, info = await client.command(f"SIZE {name}", "213")
+            return int(info[0].strip())
+        except aioftp.StatusCodeError as exc:
+            if not any(str(code) in ("500", "502") for code in exc.received_codes):
+                return None
+        try:
+            return int((await client.stat(name))["size"])
+        except aioftp.StatusCodeError:
+            return None
+
+    async def _hash_command(self, client: aioftp.Client) -> Optional[Tuple[str, str]]:
+        if self._server_hash is not _UNKNOWN:
+            return self._server_hash
+
+        try:
+            _, lines = await client.command("FEAT", "211")
+        except aioftp.StatusCodeError:
+            lines = []
+        features: Dict[str, str] = {}
+        for line in lines:
+            name, _, parameters = line.strip().partition(" ")
+            features[name.upper()] = parameters
+
+        self._server_hash = None
+        if "HASH" in features:
+            # the server hashes with the algorithm marked as selected
+            selected = [name[:-1] for name in features["HASH"].split(";") if name.endswith("*")]
+            if selected and selected[0].upper() in _HASH_ALGORITHMS:
+                self._server_hash = ("HASH", selected[0].upper())
+        if self._server_hash is None:
+            for command, algorithm in (("XMD5", "MD5"), ("XCRC", "CRC32")):
+                if command in features:
+                    self._server_hash = (command, algorithm)
+                    break
+        return self._server_hash
+
+    async def _digests(self, client: aioftp.Client, verify: bool, algorithms: Optional[List[str]] = None) -> _Digests:
+        algorithms = list(algorithms or [])
+        if verify:
+            server_hash = await self._hash_command(client)
+            if server_hash is not None and server_hash[1] not in algorithms:
+                algorithms.append(server_hash[1])
+        return _Digests(algorithms)
+
+    async def _verify(self, client: aioftp.Client, remote_name: str, size: int, digests: _Digests) -> str:
+        remote_size = await self._remote_size(client, remote_name)
+        if remote_size != size:
+            raise TransferVerificationError(f"'{remote_name}' has {remote_size} bytes on the server, expected {size}.")
+
+        server_hash = await self._hash_command(client)
+        if server_hash is None:
+            return "size"
+
+        command, algorithm = server_hash
+        try:
+            _, info = await client.command(f"{command} {remote_name}", "2xx")
+        except aioftp.StatusCodeError as exc:
+            # advertised but refused, e.g. for files above a server side limit
+            logger.debug(f"FTP {command} of '{remote_name}' refused, verified by size only: {exc}")
+            return "size"
+        if int(digests.hexdigest(algorithm), 16) not in _hex_values(info):
+            raise TransferVerificationError(f"{algorithm} of '{remote_name}' on the server does not match the local data.")
+        return command
 
+    @traced("ftp.delete", SPAN_KIND_CLIENT)
     async def delete(self, filename: str) -> None:
         async with self._get_client() as client:
             await client.remove_file(filename)
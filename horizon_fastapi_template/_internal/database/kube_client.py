@@ -1,14 +1,427 @@
 """Kubernetes client helpers."""
 
+import asyncio
+import json
+import random
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+import aiohttp
 from kubernetes_asyncio import client, config
+from kubernetes_asyncio.client.rest import ApiException
 from kubernetes_asyncio.dynamic import DynamicClient
+from kubernetes_asyncio.dynamic.exceptions import DynamicApiError, NotFoundError, api_exception
+from loguru import logger
+from prometheus_client import Counter
+
+from ..utils.tracing import SPAN_KIND_CLIENT, span, traced
+
+__all__ = [
+    "KubeOperationResult",
+    "KUBE_BULK_OPERATIONS",
+    "close_dynamic_clients",
+    "get_dynamic_client",
+    "kube_bulk_apply",
+    "kube_bulk_delete",
+    "kube_bulk_patch",
+    "kube_list",
+    "kube_list_pages",
+]
+
+KUBE_BULK_OPERATIONS = Counter(
+    "kube_bulk_operations_total",
+    "Objects processed by Kubernetes bulk operations, by operation and result",
+    ["operation", "result"],
+)
+
+DEFAULT_PAGE_SIZE = 500
+DEFAULT_CONCURRENCY = 10
+DEFAULT_FIELD_MANAGER = "horizon-fastapi-template"
+MAX_RETRY_DELAY = 30.0
+
+# conflicts, throttling and unavailable API servers are worth another attempt
+_RETRYABLE_STATUSES = frozenset({409, 429, 500, 503, 504})
+# an apply conflict is another field manager's and a patch conflict a changed
+# resourceVersion, a retry of the same body ends the same way
+_APPLY_RETRYABLE_STATUSES = _RETRYABLE_STATUSES - {409}
+
+_PATCH_CONTENT_TYPES = {
+    "merge": "application/merge-patch+json",
+    "strategic": "application/strategic-merge-patch+json",
+}
+
+# Accept header asking the API server for metadata only (name, labels, owners...)
+PARTIAL_METADATA_ACCEPT = "application/json;as=PartialObjectMetadataList;g=meta.k8s.io;v=v1,application/json"
+
+# in_cluster -> initialised client
+_clients: Dict[bool, DynamicClient] = {}
+_clients_lock: Optional[asyncio.Lock] = None
 
 
+@traced("kube.connect", SPAN_KIND_CLIENT)
 async def get_dynamic_client(in_cluster: bool = False) -> DynamicClient:
-    if in_cluster:
-        await config.load_incluster_config()
-    else:
-        await config.load_kube_config()
+    """Return the process-wide ``DynamicClient``, loading the configuration on first use.
+
+    The client is awaited, so API discovery runs once and ``resources`` can be used
+    right away. Later calls reuse its connection pool and discovery cache.
+    """
+
+    global _clients_lock
+
+    dynamic_client = _clients.get(in_cluster)
+    if dynamic_client is not None:
+        return dynamic_client
+
+    if _clients_lock is None:
+        _clients_lock = asyncio.Lock()
+    async with _clients_lock:
+        dynamic_client = _clients.get(in_cluster)
+        if dynamic_client is None:
+            if in_cluster:
+                config.load_incluster_config()
+            else:
+                await config.load_kube_config()
+
+            dynamic_client = _clients[in_cluster] = await DynamicClient(client.ApiClient())
+    return dynamic_client
+
+
+async def close_dynamic_clients() -> None:
+    """Close the clients cached by :func:`get_dynamic_client`, e.g. on shutdown."""
+
+    global _clients_lock
+
+    clients = list(_clients.values())
+    _clients.clear()
+    _clients_lock = None
+    for dynamic_client in clients:
+        await dynamic_client.client.close()
+
+
+async def _raise_for_status(response: Any) -> None:
+    """Raise the dynamic client error matching an unserialized error response."""
+
+    if response.status < 400:
+        return
+    error = ApiException(status=response.status, reason=response.reason)
+    error.body = await response.read()
+    error.headers = response.headers
+    raise api_exception(error)
+
+
+def _retry_after(exc: DynamicApiError) -> Optional[float]:
+    """Seconds the API server asked to wait in ``Retry-After``, when given as a number."""
+
+    try:
+        return max(0.0, float((exc.headers or {}).get("Retry-After")))
+    except (TypeError, ValueError):
+        return None
+
+
+def _describe(exc: BaseException) -> str:
+    if isinstance(exc, DynamicApiError):
+        try:
+            return json.loads(exc.body)["message"]
+        except (ValueError, KeyError, TypeError):
+            return f"{exc.status} {exc.reason}"
+    return f"{type(exc).__name__}: {exc}"
+
+
+async def kube_list_pages(
+    dynamic_client: Any,
+    api_version: str,
+    kind: str,
+    *,
+    namespace: Optional[str] = None,
+    label_selector: Optional[str] = None,
+    field_selector: Optional[str] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    metadata_only: bool = False,
+    prefetch: bool = True,
+) -> AsyncIterator[List[dict]]:
+    """List ``kind`` objects page by page with ``limit``/``continue``.
+
+    Each page holds at most ``page_size`` objects as plain dicts decoded from JSON,
+    without the ``ResourceInstance`` wrapping. With ``prefetch`` the next page is
+    requested while the current one is being consumed, so at most two pages are held.
+    Selectors are evaluated by the API server. ``metadata_only`` requests
+    ``PartialObjectMetadata`` objects, which carry ``metadata`` but no spec or status.
+    ``dynamic_client`` must be initialised (awaited).
+    """
+
+    resource = await dynamic_client.resources.get(api_version=api_version, kind=kind)
+
+    async def fetch(token: Optional[str]) -> dict:
+        with span("kube.list_page", SPAN_KIND_CLIENT, resource=kind):
+            response = await dynamic_client.get(
+                resource,
+                namespace=namespace,
+                label_selector=label_selector,
+                field_selector=field_selector,
+                limit=page_size,
+                _continue=token,
+                # the client adds its own headers to this dict, so build one per request
+                header_params={"Accept": PARTIAL_METADATA_ACCEPT} if metadata_only else {},
+                serialize=False,
+            )
+            await _raise_for_status(response)
+            return await response.json()
+
+    next_page: Optional[asyncio.Future] = asyncio.ensure_future(fetch(None))
+    try:
+        while next_page is not None:
+            body = await next_page
+            token = (body.get("metadata") or {}).get("continue")
+            next_page = None
+            if token:
+                next_page = asyncio.ensure_future(fetch(token)) if prefetch else None
+
+            items = body.get("items") or []
+            del body
+            yield items
+
+            if token and next_page is None:
+                next_page = asyncio.ensure_future(fetch(token))
+    finally:
+        if next_page is not None and not next_page.done():
+            next_page.cancel()
+
+
+async def kube_list(
+    dynamic_client: Any,
+    api_version: str,
+    kind: str,
+    **kwargs: Any,
+) -> AsyncIterator[dict]:
+    """Yield ``kind`` objects one by one; accepts the arguments of :func:`kube_list_pages`."""
+
+    pages = kube_list_pages(dynamic_client, api_version, kind, **kwargs)
+    try:
+        async for page in pages:
+            for item in page:
+                yield item
+    finally:
+        await pages.aclose()
+
+
+@dataclass(frozen=True)
+class KubeOperationResult:
+    """Outcome of one object of a bulk operation.
+
+    ``status`` is the HTTP status of the last attempt, ``None`` when no response was
+    received, and ``error`` the API server message of a failure.
+    """
+
+    api_version: str
+    kind: str
+    name: Optional[str]
+    namespace: Optional[str]
+    succeeded: bool
+    status: Optional[int]
+    attempts: int
+    error: Optional[str] = None
+
+
+_Operation = Callable[[Any, dict, Optional[str], Optional[str]], Awaitable[Any]]
+
+
+async def _bulk(
+    dynamic_client: Any,
+    operation: str,
+    manifests: Iterable[dict],
+    call: _Operation,
+    *,
+    concurrency: int,
+    retries: int,
+    retry_delay: float,
+    retry_statuses: FrozenSet[int] = _RETRYABLE_STATUSES,
+    missing_ok: bool = False,
+) -> List[KubeOperationResult]:
+    """Run ``call`` for every manifest, ``concurrency`` requests at a time.
+
+    Resources are discovered once per ``apiVersion``/``kind``. Failures with one of
+    ``retry_statuses`` are attempted again up to ``retries`` times with jittered
+    exponential backoff, or after the ``Retry-After`` of a 429, without holding a
+    concurrency slot while waiting.
+    """
+
+    manifests = list(manifests)
+    resources: Dict[Tuple[str, str], Any] = {}
+
+    # one after the other: a miss makes the discoverer refresh its cache, which
+    # concurrent lookups would observe half rebuilt
+    for api_version, kind in {(manifest.get("apiVersion", ""), manifest.get("kind", "")) for manifest in manifests}:
+        try:
+            resources[(api_version, kind)] = await dynamic_client.resources.get(api_version=api_version, kind=kind)
+        except Exception as exc:
+            resources[(api_version, kind)] = exc
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(manifest: dict) -> KubeOperationResult:
+        api_version, kind = manifest.get("apiVersion", ""), manifest.get("kind", "")
+        metadata = manifest.get("metadata") or {}
+        name, namespace = metadata.get("name"), metadata.get("namespace")
+
+        def result(succeeded: bool, status: Optional[int], attempts: int, error: Optional[str] = None):
+            return KubeOperationResult(api_version, kind, name, namespace, succeeded, status, attempts, error)
+
+        resource = resources[(api_version, kind)]
+        if isinstance(resource, Exception):
+            return result(False, None, 0, _describe(resource))
+
+        attempts = 0
+        while True:
+            attempts += 1
+            retry_after = None
+            try:
+                async with semaphore:
+                    with span(f"kube.{operation}", SPAN_KIND_CLIENT, resource=kind):
+                        response = await call(resource, manifest, name, namespace)
+                        await _raise_for_status(response)
+                        response.release()
+                return result(True, response.status, attempts)
+            except NotFoundError as exc:
+                return result(missing_ok, 404, attempts, None if missing_ok else _describe(exc))
+            except DynamicApiError as exc:
+                if exc.status not in retry_statuses or attempts > retries:
+                    return result(False, exc.status, attempts, _describe(exc))
+                if exc.status == 429:
+                    retry_after = _retry_after(exc)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                if attempts > retries:
+                    return result(False, None, attempts, _describe(exc))
+            except ValueError as exc:
+                # raised by the dynamic client for a missing name or namespace
+                return result(False, None, attempts, str(exc))
+
+            if retry_after is not None:
+                await asyncio.sleep(min(retry_after, MAX_RETRY_DELAY))
+            else:
+                delay = min(retry_delay * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+                await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+
+    results = await asyncio.gather(*(run(manifest) for manifest in manifests))
+
+    failed = sum(not item.succeeded for item in results)
+    KUBE_BULK_OPERATIONS.labels(operation, "succeeded").inc(len(results) - failed)
+    KUBE_BULK_OPERATIONS.labels(operation, "failed").inc(failed)
+    if failed:
+        logger.warning(f"Kubernetes bulk {operation}: {failed} of {len(results)} objects failed")
+    return list(results)
+
+
+async def kube_bulk_apply(
+    dynamic_client: Any,
+    manifests: Iterable[dict],
+    *,
+    field_manager: str = DEFAULT_FIELD_MANAGER,
+    force_conflicts: bool = False,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    retries: int = 3,
+    retry_delay: float = 0.5,
+) -> List[KubeOperationResult]:
+    """Server-side apply every manifest as ``field_manager``; results follow the input order.
+
+    ``force_conflicts`` takes over the fields owned by other managers instead of failing
+    with 409, which is not retried. ``dynamic_client`` must be initialised (awaited).
+    """
+
+    async def apply(resource: Any, manifest: dict, name: Optional[str], namespace: Optional[str]) -> Any:
+        return await dynamic_client.server_side_apply(
+            resource,
+            body=manifest,
+            name=name,
+            namespace=namespace,
+            field_manager=field_manager,
+            force_conflicts="true" if force_conflicts else None,
+            serialize=False,
+        )
+
+    return await _bulk(
+        dynamic_client,
+        "apply",
+        manifests,
+        apply,
+        concurrency=concurrency,
+        retries=retries,
+        retry_delay=retry_delay,
+        retry_statuses=_APPLY_RETRYABLE_STATUSES,
+    )
+
+
+async def kube_bulk_patch(
+    dynamic_client: Any,
+    patches: Iterable[dict],
+    *,
+    patch_type: str = "merge",
+    concurrency: int = DEFAULT_CONCURRENCY,
+    retries: int = 3,
+    retry_delay: float = 0.5,
+) -> List[KubeOperationResult]:
+    """Patch existing objects; each patch names its object with ``apiVersion``, ``kind`` and ``metadata``.
+
+    ``patch_type`` is ``"merge"`` (JSON merge patch) or ``"strategic"``. Add
+    ``metadata.resourceVersion`` to a patch to fail with 409 when the object changed,
+    which is not retried. ``dynamic_client`` must be initialised (awaited).
+    """
+
+    if patch_type not in _PATCH_CONTENT_TYPES:
+        raise ValueError(f"Invalid patch type '{patch_type}', expected one of {', '.join(_PATCH_CONTENT_TYPES)}.")
+
+    async def patch(resource: Any, manifest: dict, name: Optional[str], namespace: Optional[str]) -> Any:
+        return await dynamic_client.patch(
+            resource,
+            body=manifest,
+            name=name,
+            namespace=namespace,
+            content_type=_PATCH_CONTENT_TYPES[patch_type],
+            serialize=False,
+        )
+
+    return await _bulk(
+        dynamic_client,
+        "patch",
+        patches,
+        patch,
+        concurrency=concurrency,
+        retries=retries,
+        retry_delay=retry_delay,
+        retry_statuses=_APPLY_RETRYABLE_STATUSES,
+    )
+
+
+async def kube_bulk_delete(
+    dynamic_client: Any,
+    manifests: Iterable[dict],
+    *,
+    propagation_policy: str = "Background",
+    missing_ok: bool = True,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    retries: int = 3,
+    retry_delay: float = 0.5,
+) -> List[KubeOperationResult]:
+    """Delete the objects named by ``manifests``, objects already gone succeed with ``missing_ok``.
+
+    ``dynamic_client`` must be initialised (awaited).
+    """
+
+    async def delete(resource: Any, manifest: dict, name: Optional[str], namespace: Optional[str]) -> Any:
+        return await dynamic_client.delete(
+            resource,
+            name=name,
+            namespace=namespace,
+            propagation_policy=propagation_policy,
+            serialize=False,
+        )
 
-    api_client = client.ApiClient()
-    return DynamicClient(api_client)
+    return await _bulk(
+        dynamic_client,
+        "delete",
+        manifests,
+        delete,
+        concurrency=concurrency,
+        retries=retries,
+        retry_delay=retry_delay,
+        missing_ok=missing_ok,
+    )
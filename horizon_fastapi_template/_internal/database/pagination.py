@@ -0,0 +1,154 @@
+"""Pagination strategies walked by :meth:`BaseAPI.paginate`."""
+
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+__all__ = [
+    "ChainedPagination",
+    "CursorPagination",
+    "IndexedPagination",
+    "LinkHeaderPagination",
+    "OffsetPagination",
+    "PageNumberPagination",
+    "PageRequest",
+    "Pagination",
+]
+
+# url and query parameters of one page
+PageRequest = Tuple[str, Dict[str, Any]]
+
+
+def _lookup(body: Any, path: str) -> Any:
+    for key in path.split("."):
+        body = body.get(key) if isinstance(body, dict) else None
+    return body
+
+
+class Pagination(ABC):
+    """How the pages of an endpoint are requested and read.
+
+    Strategies derive from :class:`IndexedPagination` or :class:`ChainedPagination`.
+    ``items_key`` is the dotted path of the items in the JSON body, the body itself
+    being the list when unset.
+    """
+
+    def __init__(self, items_key: Optional[str] = None) -> None:
+        self.items_key = items_key
+
+    def items(self, body: Any) -> List[Any]:
+        return (_lookup(body, self.items_key) if self.items_key else body) or []
+
+
+class IndexedPagination(Pagination):
+    """Strategies building the request of any page from its index, which lets several
+    pages be fetched concurrently."""
+
+    @abstractmethod
+    def page_request(self, url: str, params: Dict[str, Any], index: int) -> PageRequest:
+        """Request of the page at ``index``, counted from 0."""
+
+    @abstractmethod
+    def is_last(self, body: Any, items: List[Any], index: int) -> bool:
+        """Whether the page at ``index`` is the last one."""
+
+
+class ChainedPagination(Pagination):
+    """Strategies learning the request of the next page from the current one."""
+
+    @abstractmethod
+    def next_request(self, response: httpx.Response, body: Any, request: PageRequest) -> Optional[PageRequest]:
+        """Request of the page after the one ``request`` fetched, or None after the last."""
+
+
+class OffsetPagination(IndexedPagination):
+    """``?offset=<n>&limit=<limit>`` pages, ending with the first short page.
+
+    With ``total_key``, the dotted path of the item count in the body, the walk also
+    stops as soon as that many items were requested.
+    """
+
+    def __init__(
+        self,
+        limit: int = 100,
+        *,
+        offset_param: str = "offset",
+        limit_param: str = "limit",
+        items_key: Optional[str] = None,
+        total_key: Optional[str] = None,
+    ) -> None:
+        super().__init__(items_key)
+        self.limit = limit
+        self.offset_param = offset_param
+        self.limit_param = limit_param
+        self.total_key = total_key
+
+    def _position(self, index: int) -> int:
+        return index * self.limit
+
+    def page_request(self, url: str, params: Dict[str, Any], index: int) -> PageRequest:
+        return url, {**params, self.offset_param: self._position(index), self.limit_param: self.limit}
+
+    def is_last(self, body: Any, items: List[Any], index: int) -> bool:
+        if len(items) < self.limit:
+            return True
+        if self.total_key:
+            total = _lookup(body, self.total_key)
+            if total is not None and (index + 1) * self.limit >= int(total):
+                return True
+        return False
+
+
+class PageNumberPagination(OffsetPagination):
+    """``?page=<n>&per_page=<limit>`` pages numbered from ``first_page``."""
+
+    def __init__(
+        self,
+        limit: int = 100,
+        *,
+        page_param: str = "page",
+        limit_param: str = "per_page",
+        first_page: int = 1,
+        items_key: Optional[str] = None,
+        total_key: Optional[str] = None,
+    ) -> None:
+        super().__init__(
+            limit, offset_param=page_param, limit_param=limit_param, items_key=items_key, total_key=total_key
+        )
+        self.first_page = first_page
+
+    def _position(self, index: int) -> int:
+        return self.first_page + index
+
+
+class CursorPagination(ChainedPagination):
+    """Pages chained by an opaque cursor read at ``cursor_key`` (a dotted path) in each body
+    and sent back as ``cursor_param``; the walk ends on an empty cursor."""
+
+    def __init__(
+        self,
+        *,
+        cursor_key: str = "next_cursor",
+        cursor_param: str = "cursor",
+        items_key: Optional[str] = None,
+    ) -> None:
+        super().__init__(items_key)
+        self.cursor_key = cursor_key
+        self.cursor_param = cursor_param
+
+    def next_request(self, response: httpx.Response, body: Any, request: PageRequest) -> Optional[PageRequest]:
+        cursor = _lookup(body, self.cursor_key)
+        if not cursor:
+            return None
+        url, params = request
+        return url, {**params, self.cursor_param: cursor}
+
+
+class LinkHeaderPagination(ChainedPagination):
+    """Pages chained by the ``rel="next"`` URL of the ``Link`` header (RFC 8288), as used by GitHub."""
+
+    def next_request(self, response: httpx.Response, body: Any, request: PageRequest) -> Optional[PageRequest]:
+        url = response.links.get("next", {}).get("url")
+        # the next URL carries every query parameter itself
+        return (url, {}) if url else None
@@ -0,0 +1,44 @@
+"""Strawberry extensions and helpers used by the GraphQL routes."""
+
+import copy
+from typing import Callable, Sequence
+
+import strawberry
+
+from .broadcast import BroadcastHub, SlowConsumerError, kube_watch_source
+from .dataloaders import (
+    DataLoaderContext,
+    InstrumentedDataLoader,
+    base_api_loader,
+    create_context_getter,
+    kube_loader,
+)
+from .metrics import ResolverMetricsExtension
+from .tracing import TracingExtension
+
+__all__ = [
+    "BroadcastHub",
+    "DataLoaderContext",
+    "InstrumentedDataLoader",
+    "ResolverMetricsExtension",
+    "SlowConsumerError",
+    "TracingExtension",
+    "base_api_loader",
+    "create_context_getter",
+    "kube_loader",
+    "kube_watch_source",
+    "with_extensions",
+]
+
+def with_extensions(schema: strawberry.Schema, extensions: Sequence[Callable]) -> strawberry.Schema:
+    """Return a shallow copy of ``schema`` running ``extensions`` after its own.
+
+    The copy shares the types and resolvers of ``schema``, which is left untouched, so
+    every router built from one schema gets exactly the extensions of its version.
+    """
+
+    if not extensions:
+        return schema
+    routed = copy.copy(schema)
+    routed.extensions = [*schema.extensions, *extensions]
+    return routed
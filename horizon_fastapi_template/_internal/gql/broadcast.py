@@ -0,0 +1,236 @@
+"""In-process broadcast hub fanning one upstream event stream out to many subscribers."""
+
+import asyncio
+from typing import Any, AsyncIterator, Callable, Dict, Hashable, Optional, Set
+
+from loguru import logger
+from prometheus_client import Counter, Gauge
+
+__all__ = [
+    "BroadcastHub",
+    "SlowConsumerError",
+    "OVERFLOW_POLICIES",
+    "kube_watch_source",
+]
+
+SourceFactory = Callable[[], AsyncIterator[Any]]
+
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest", "disconnect")
+
+BROADCAST_SUBSCRIBERS = Gauge(
+    "graphql_broadcast_subscribers",
+    "Subscribers currently attached to a broadcast hub",
+    ["hub"],
+)
+
+BROADCAST_MESSAGES = Counter(
+    "graphql_broadcast_messages_total",
+    "Messages handed to subscribers, by whether they were queued or dropped",
+    ["hub", "result"],
+)
+
+BROADCAST_QUEUE_DEPTH = Gauge(
+    "graphql_broadcast_queue_depth",
+    "Deepest subscriber queue of a broadcast hub at the last publish",
+    ["hub"],
+)
+
+_CLOSED = object()
+
+
+class SlowConsumerError(Exception):
+    """Raised in a subscriber that fell ``queue_size`` messages behind under ``disconnect``."""
+
+
+class _Subscriber:
+    __slots__ = ("queue", "error")
+
+    def __init__(self, queue_size: int) -> None:
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.error: Optional[BaseException] = None
+
+    def close(self, error: Optional[BaseException] = None) -> None:
+        if self.error is None:
+            self.error = error
+        queue = self.queue
+        while queue.full():
+            queue.get_nowait()
+        queue.put_nowait(_CLOSED)
+
+
+class _Topic:
+    __slots__ = ("subscribers", "pump")
+
+    def __init__(self) -> None:
+        self.subscribers: Set[_Subscriber] = set()
+        self.pump: Optional[asyncio.Task] = None
+
+
+class BroadcastHub:
+    """Fan messages published on a topic out to every subscriber of that topic.
+
+    Each subscriber owns a bounded queue, so one slow client never holds back the
+    others: once its queue is full ``overflow`` either drops the oldest queued message,
+    drops the new one, or disconnects the subscriber with :class:`SlowConsumerError`.
+
+    Topics registered with :meth:`add_source` are fed by a single upstream iterator
+    started with the first subscriber and cancelled after the last one leaves, so an
+    upstream watch is opened once per topic however many clients listen to it::
+
+        hub = BroadcastHub("pods")
+        hub.add_source("default", kube_watch_source(client, "v1", "Pod", namespace="default"))
+
+        @strawberry.type
+        class Subscription:
+            @strawberry.subscription
+            async def pods(self) -> AsyncGenerator[PodEvent, None]:
+                async for event in hub.subscribe("default"):
+                    yield PodEvent.from_kube(event)
+    """
+
+    def __init__(self, name: str, *, queue_size: int = 100, overflow: str = "drop_oldest") -> None:
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {', '.join(OVERFLOW_POLICIES)}, not '{overflow}'.")
+        if queue_size < 1:
+            raise ValueError("queue_size must be at least 1.")
+
+        self.name = name
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self._sources: Dict[Hashable, SourceFactory] = {}
+        self._topics: Dict[Hashable, _Topic] = {}
+        self._subscribers = BROADCAST_SUBSCRIBERS.labels(name)
+        self._queued = BROADCAST_MESSAGES.labels(name, "queued")
+        self._dropped = BROADCAST_MESSAGES.labels(name, "dropped")
+        self._queue_depth = BROADCAST_QUEUE_DEPTH.labels(name)
+
+    def add_source(self, topic: Hashable, factory: SourceFactory) -> None:
+        """Feed ``topic`` from the iterator returned by ``factory`` while it has subscribers."""
+
+        self._sources[topic] = factory
+
+    def subscribers(self, topic: Hashable) -> int:
+        state = self._topics.get(topic)
+        return len(state.subscribers) if state else 0
+
+    def publish(self, topic: Hashable, message: Any) -> int:
+        """Queue ``message`` for every subscriber of ``topic`` without waiting.
+
+        Returns the number of subscribers the message was queued for.
+        """
+
+        state = self._topics.get(topic)
+        if state is None:
+            return 0
+
+        queued = dropped = depth = 0
+        for subscriber in tuple(state.subscribers):
+            queue = subscriber.queue
+            if queue.full():
+                dropped += 1
+                if self.overflow == "drop_newest":
+                    continue
+                if self.overflow == "disconnect":
+                    state.subscribers.discard(subscriber)
+                    subscriber.close(SlowConsumerError(f"Subscriber fell {self.queue_size} messages behind."))
+                    continue
+                queue.get_nowait()
+            queue.put_nowait(message)
+            queued += 1
+            depth = max(depth, queue.qsize())
+
+        if queued:
+            self._queued.inc(queued)
+        if dropped:
+            self._dropped.inc(dropped)
+        self._queue_depth.set(depth)
+        return queued
+
+    async def subscribe(self, topic: Hashable) -> AsyncIterator[Any]:
+        """Yield the messages published on ``topic`` from now on."""
+
+        state = self._topics.get(topic)
+        if state is None:
+            state = self._topics[topic] = _Topic()
+
+        subscriber = _Subscriber(self.queue_size)
+        state.subscribers.add(subscriber)
+        self._subscribers.inc()
+
+        if state.pump is None and topic in self._sources:
+            state.pump = asyncio.create_task(self._pump(topic, state), name=f"broadcast-{self.name}-{topic}")
+
+        try:
+            while True:
+                message = await subscriber.queue.get()
+                if message is _CLOSED:
+                    if subscriber.error is not None:
+                        raise subscriber.error
+                    return
+                yield message
+        finally:
+            self._subscribers.dec()
+            state.subscribers.discard(subscriber)
+            if not state.subscribers and self._topics.get(topic) is state:
+                del self._topics[topic]
+                if state.pump is not None:
+                    state.pump.cancel()
+
+    async def _pump(self, topic: Hashable, state: _Topic) -> None:
+        error: Optional[BaseException] = None
+        try:
+            async for message in self._sources[topic]():
+                self.publish(topic, message)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:  # noqa: BLE001 - forwarded to the subscribers
+            logger.error(f"Broadcast source {self.name}/{topic} failed: {exc}")
+            error = exc
+
+        # the upstream is gone, end the topic so the next subscriber restarts it
+        if self._topics.get(topic) is state:
+            del self._topics[topic]
+        for subscriber in state.subscribers:
+            subscriber.close(error)
+
+    async def close(self) -> None:
+        """End every subscription and stop the upstream sources."""
+
+        topics, self._topics = self._topics, {}
+        pumps = [state.pump for state in topics.values() if state.pump is not None]
+        for state in topics.values():
+            for subscriber in state.subscribers:
+                subscriber.close()
+        for pump in pumps:
+            pump.cancel()
+        await asyncio.gather(*pumps, return_exceptions=True)
+
+
+def kube_watch_source(
+    dynamic_client: Any,
+    api_version: str,
+    kind: str,
+    *,
+    namespace: Optional[str] = None,
+    label_selector: Optional[str] = None,
+    field_selector: Optional[str] = None,
+    timeout: Optional[int] = None,
+) -> SourceFactory:
+    """Build a :meth:`BroadcastHub.add_source` factory streaming Kubernetes watch events.
+
+    Events are the ``{"type", "object", "raw_object"}`` dicts of
+    ``DynamicClient.watch``; ``dynamic_client`` must be initialised (awaited).
+    """
+
+    async def source() -> AsyncIterator[Any]:
+        resource = await dynamic_client.resources.get(api_version=api_version, kind=kind)
+        async for event in dynamic_client.watch(
+            resource,
+            namespace=namespace,
+            label_selector=label_selector,
+            field_selector=field_selector,
+            timeout=timeout,
+        ):
+            yield event
+
+    return source
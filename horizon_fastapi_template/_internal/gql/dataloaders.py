@@ -0,0 +1,193 @@
+"""Per-request DataLoader registries and ready-made loaders for GraphQL contexts."""
+
+import asyncio
+from collections import defaultdict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from kubernetes_asyncio.dynamic.exceptions import NotFoundError
+from prometheus_client import Counter, Histogram
+from strawberry.dataloader import DataLoader
+from strawberry.fastapi import BaseContext
+
+from ..database.basic_api import BaseAPI
+
+__all__ = [
+    "DataLoaderContext",
+    "InstrumentedDataLoader",
+    "create_context_getter",
+    "base_api_loader",
+    "kube_loader",
+]
+
+LoaderFactory = Callable[[], DataLoader]
+
+DATALOADER_BATCH_SIZE = Histogram(
+    "graphql_dataloader_batch_size",
+    "Number of keys dispatched per DataLoader batch",
+    ["loader"],
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000),
+)
+
+DATALOADER_LOADS = Counter(
+    "graphql_dataloader_loads_total",
+    "DataLoader loads, by whether they were served from the request cache",
+    ["loader", "result"],
+)
+
+
+class InstrumentedDataLoader(DataLoader):
+    """DataLoader reporting batch sizes and cache hits to Prometheus."""
+
+    def __init__(self, load_fn: Callable, *, name: str, **kwargs: Any) -> None:
+        batch_size = DATALOADER_BATCH_SIZE.labels(name)
+
+        async def instrumented_load_fn(keys: List[Any]) -> Sequence[Any]:
+            batch_size.observe(len(keys))
+            return await load_fn(keys)
+
+        super().__init__(load_fn=instrumented_load_fn, **kwargs)
+        self.name = name
+        self._hits = DATALOADER_LOADS.labels(name, "hit")
+        self._misses = DATALOADER_LOADS.labels(name, "miss")
+
+    def load(self, key: Any) -> Any:
+        if self.cache and self.cache_map.get(key) is not None:
+            self._hits.inc()
+        else:
+            self._misses.inc()
+        return super().load(key)
+
+
+class DataLoaderContext(BaseContext):
+    """GraphQL context creating each registered DataLoader once per request."""
+
+    def __init__(self, loader_factories: Optional[Dict[str, LoaderFactory]] = None) -> None:
+        super().__init__()
+        self._factories = loader_factories or {}
+        self._loaders: Dict[str, DataLoader] = {}
+
+    def loader(self, name: str, factory: Optional[LoaderFactory] = None) -> DataLoader:
+        loader = self._loaders.get(name)
+        if loader is None:
+            factory = factory or self._factories.get(name)
+            if factory is None:
+                raise KeyError(f"No DataLoader registered under '{name}'.")
+            loader = self._loaders[name] = factory()
+        return loader
+
+
+def create_context_getter(**loader_factories: LoaderFactory) -> Callable[[], DataLoaderContext]:
+    """Build a ``GraphQLVersion.context_getter`` with the given named loaders."""
+
+    def context_getter() -> DataLoaderContext:
+        return DataLoaderContext(loader_factories)
+
+    return context_getter
+
+
+def base_api_loader(
+    api: BaseAPI,
+    path: str,
+    *,
+    name: Optional[str] = None,
+    batch_param: Optional[str] = None,
+    id_field: str = "id",
+    max_batch_size: Optional[int] = 100,
+) -> LoaderFactory:
+    """Batch ``BaseAPI`` GETs issued while resolving one request.
+
+    Without ``batch_param`` every distinct key is fetched concurrently from
+    ``path.format(key=key)`` over a single client. With ``batch_param`` the keys are
+    sent in one call as a comma separated query parameter and the returned list is
+    matched back to the keys through ``id_field``. Missing objects resolve to ``None``.
+    """
+
+    loader_name = name or path
+
+    async def load_each(keys: List[Any]) -> List[Any]:
+        async with api.session() as client:
+            responses = await asyncio.gather(
+                *(client.get(path.format(key=key)) for key in keys), return_exceptions=True
+            )
+
+        results: List[Any] = []
+        for response in responses:
+            if isinstance(response, Exception):
+                results.append(response)
+            elif response.status_code == 404:
+                results.append(None)
+            else:
+                try:
+                    response.raise_for_status()
+                    results.append(response.json())
+                except Exception as exc:  # noqa: BLE001 - surfaced per key by the DataLoader
+                    results.append(exc)
+        return results
+
+    async def load_batch(keys: List[Any]) -> List[Any]:
+        async with api.session() as client:
+            response = await client.get(path, params={batch_param: ",".join(str(key) for key in keys)})
+        response.raise_for_status()
+
+        by_id = {str(item.get(id_field)): item for item in response.json()}
+        return [by_id.get(str(key)) for key in keys]
+
+    load_fn = load_batch if batch_param else load_each
+
+    def factory() -> DataLoader:
+        return InstrumentedDataLoader(load_fn, name=loader_name, max_batch_size=max_batch_size)
+
+    return factory
+
+
+def kube_loader(
+    dynamic_client: Any,
+    api_version: str,
+    kind: str,
+    *,
+    name: Optional[str] = None,
+    list_threshold: int = 10,
+) -> LoaderFactory:
+    """Batch Kubernetes object lookups keyed by ``(namespace, name)``.
+
+    Keys in the same namespace are fetched with one list call once there are at least
+    ``list_threshold`` of them, individually and concurrently otherwise. Cluster scoped
+    kinds use ``None`` as namespace. ``dynamic_client`` must be initialised (awaited).
+    """
+
+    loader_name = name or f"{api_version}/{kind}"
+
+    async def get_one(resource: Any, namespace: Optional[str], object_name: str) -> Any:
+        try:
+            return await dynamic_client.get(resource, name=object_name, namespace=namespace)
+        except NotFoundError:
+            return None
+
+    async def load_fn(keys: List[Tuple[Optional[str], str]]) -> List[Any]:
+        resource = await dynamic_client.resources.get(api_version=api_version, kind=kind)
+
+        by_namespace: Dict[Optional[str], List[str]] = defaultdict(list)
+        for namespace, object_name in keys:
+            by_namespace[namespace].append(object_name)
+
+        found: Dict[Hashable, Any] = {}
+
+        async def load_namespace(namespace: Optional[str], names: List[str]) -> None:
+            if len(names) >= list_threshold:
+                wanted = set(names)
+                listed = await dynamic_client.get(resource, namespace=namespace)
+                for item in listed.items:
+                    if item.metadata.name in wanted:
+                        found[(namespace, item.metadata.name)] = item
+                return
+
+            objects = await asyncio.gather(*(get_one(resource, namespace, item) for item in names))
+            found.update({(namespace, item): obj for item, obj in zip(names, objects)})
+
+        await asyncio.gather(*(load_namespace(namespace, names) for namespace, names in by_namespace.items()))
+        return [found.get(tuple(key)) for key in keys]
+
+    def factory() -> DataLoader:
+        return InstrumentedDataLoader(load_fn, name=loader_name)
+
+    return factory
@@ -0,0 +1,133 @@
+"""Validation rules rejecting too deep, too complex or too aliased queries before execution."""
+
+from typing import Dict, List, Optional, Set, Type
+
+from graphql import (
+    FieldNode,
+    FragmentDefinitionNode,
+    FragmentSpreadNode,
+    GraphQLError,
+    InlineFragmentNode,
+    IntValueNode,
+    OperationDefinitionNode,
+    SelectionSetNode,
+    ValidationContext,
+    ValidationRule,
+)
+from graphql.language import Node
+from strawberry.extensions import AddValidationRules
+from strawberry.extensions.max_aliases import create_validator as create_alias_validator
+from strawberry.extensions.query_depth_limiter import create_validator as create_depth_validator
+
+__all__ = ["LIST_SIZE_ARGUMENTS", "create_complexity_validator", "query_limits_extension"]
+
+# Arguments whose literal value multiplies the cost of the selection below the field.
+LIST_SIZE_ARGUMENTS = ("first", "last", "limit", "count", "pageSize")
+
+
+def _list_size(node: FieldNode) -> int:
+    for argument in node.arguments or ():
+        if argument.name.value in LIST_SIZE_ARGUMENTS and isinstance(argument.value, IntValueNode):
+            return max(int(argument.value.value), 1)
+    return 1
+
+
+class _ComplexityCounter:
+    """Cost of the operations of one document, each fragment being walked once.
+
+    Walks stop as soon as the running total exceeds ``limit``, so a query fanning out
+    fragments costs the server no more than ``limit`` fields to reject.
+    """
+
+    def __init__(self, fragments: Dict[str, FragmentDefinitionNode], limit: int) -> None:
+        self.fragments = fragments
+        self.limit = limit
+        self._fragment_costs: Dict[str, int] = {}
+        self._walking: Set[str] = set()
+
+    def selection_cost(self, selection_set: Optional[SelectionSetNode]) -> int:
+        if selection_set is None:
+            return 0
+
+        cost = 0
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                cost += 1 + _list_size(selection) * self.selection_cost(selection.selection_set)
+            elif isinstance(selection, InlineFragmentNode):
+                cost += self.selection_cost(selection.selection_set)
+            elif isinstance(selection, FragmentSpreadNode):
+                cost += self.fragment_cost(selection.name.value)
+            if cost > self.limit:
+                break
+        return cost
+
+    def fragment_cost(self, name: str) -> int:
+        # a cost past the limit is cached as is, any selection spreading it is past the limit too
+        cost = self._fragment_costs.get(name)
+        if cost is not None:
+            return cost
+        fragment = self.fragments.get(name)
+        if fragment is None or name in self._walking:
+            return 0
+
+        self._walking.add(name)
+        try:
+            cost = self.selection_cost(fragment.selection_set)
+        finally:
+            self._walking.discard(name)
+        self._fragment_costs[name] = cost
+        return cost
+
+
+def create_complexity_validator(max_complexity: int) -> Type[ValidationRule]:
+    """Every field costs one, multiplied by literal list size arguments of its parents."""
+
+    class QueryComplexityValidator(ValidationRule):
+        def __init__(self, context: ValidationContext) -> None:
+            super().__init__(context)
+            self._counter: Optional[_ComplexityCounter] = None
+
+        def enter_operation_definition(self, node: OperationDefinitionNode, *_args: Node) -> None:
+            if self._counter is None:
+                fragments = {
+                    definition.name.value: definition
+                    for definition in self.context.document.definitions
+                    if isinstance(definition, FragmentDefinitionNode)
+                }
+                self._counter = _ComplexityCounter(fragments, max_complexity)
+            complexity = self._counter.selection_cost(node.selection_set)
+            if complexity > max_complexity:
+                name = node.name.value if node.name else "anonymous"
+                self.report_error(
+                    GraphQLError(
+                        f"'{name}' exceeds maximum operation complexity of {max_complexity} (got {complexity}).",
+                        [node],
+                    )
+                )
+
+    return QueryComplexityValidator
+
+
+def query_limits_extension(
+    max_depth: Optional[int] = None,
+    max_complexity: Optional[int] = None,
+    max_aliases: Optional[int] = None,
+):
+    """Return an extension factory adding the configured limits, or ``None``.
+
+    The rule classes are built once so the validation rule tuple stays identical between
+    requests and keeps hitting strawberry's ``ValidationCache``.
+    """
+
+    rules: List[Type[ValidationRule]] = []
+    if max_depth is not None:
+        rules.append(create_depth_validator(max_depth, None))
+    if max_complexity is not None:
+        rules.append(create_complexity_validator(max_complexity))
+    if max_aliases is not None:
+        rules.append(create_alias_validator(max_aliases))
+
+    if not rules:
+        return None
+
+    return lambda: AddValidationRules(rules)
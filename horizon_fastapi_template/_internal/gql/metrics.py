@@ -0,0 +1,133 @@
+"""Strawberry extension timing resolvers into Prometheus and logging slow operations."""
+
+import heapq
+import time
+from inspect import isawaitable
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from graphql import GraphQLResolveInfo
+from loguru import logger
+from prometheus_client import Histogram
+from strawberry.extensions import SchemaExtension
+
+__all__ = ["ResolverMetricsExtension", "GRAPHQL_RESOLVER_DURATION"]
+
+GRAPHQL_RESOLVER_DURATION = Histogram(
+    "graphql_resolver_duration_seconds",
+    "Duration of GraphQL field resolvers",
+    ["version", "field"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+OTHER_FIELDS = "other"
+
+
+class _FieldRegistry:
+    """Decides once per field whether it is timed and which bounded label it uses."""
+
+    def __init__(self, version: str, max_fields: int) -> None:
+        self.version = version
+        self.max_fields = max_fields
+        self._fields: Dict[Tuple[str, str], Any] = {}
+        self._labelled = 0
+
+    def child(self, info: GraphQLResolveInfo) -> Any:
+        key = (info.parent_type.name, info.field_name)
+        try:
+            return self._fields[key]
+        except KeyError:
+            pass
+
+        field = info.parent_type.fields.get(info.field_name)
+        definition = field.extensions.get("strawberry-definition") if field and field.extensions else None
+        if definition is None or definition.base_resolver is None:
+            # plain attribute access, not worth a histogram sample
+            child = None
+        elif self._labelled < self.max_fields:
+            self._labelled += 1
+            child = GRAPHQL_RESOLVER_DURATION.labels(self.version, f"{key[0]}.{key[1]}")
+        else:
+            child = GRAPHQL_RESOLVER_DURATION.labels(self.version, OTHER_FIELDS)
+
+        self._fields[key] = child
+        return child
+
+
+class ResolverMetricsExtension(SchemaExtension):
+    """Record custom resolver latencies per field, with at most ``max_fields`` labels.
+
+    Operations slower than ``slow_operation_threshold`` seconds are logged with their
+    ``slowest`` resolvers. Build it through :meth:`factory` so the field registry is
+    shared between requests.
+    """
+
+    def __init__(
+        self,
+        *,
+        registry: _FieldRegistry,
+        slow_operation_threshold: Optional[float] = None,
+        slowest: int = 5,
+    ) -> None:
+        super().__init__()
+        self.registry = registry
+        self.slow_operation_threshold = slow_operation_threshold
+        self.slowest = slowest
+        self._timings: List[Tuple[float, Any]] = []
+
+    @classmethod
+    def factory(
+        cls,
+        version: str,
+        *,
+        max_fields: int = 200,
+        slow_operation_threshold: Optional[float] = None,
+        slowest: int = 5,
+    ) -> Callable[[], "ResolverMetricsExtension"]:
+        registry = _FieldRegistry(version, max_fields)
+        return lambda: cls(
+            registry=registry, slow_operation_threshold=slow_operation_threshold, slowest=slowest
+        )
+
+    def on_operation(self) -> Iterator[None]:
+        start = time.perf_counter()
+        yield
+        elapsed = time.perf_counter() - start
+
+        threshold = self.slow_operation_threshold
+        if threshold is None or elapsed < threshold or not self._timings:
+            return
+
+        slowest = heapq.nlargest(self.slowest, self._timings, key=lambda timing: timing[0])
+        resolvers = ", ".join(
+            f"{'.'.join(str(part) for part in path.as_list())} {duration * 1000:.1f}ms"
+            for duration, path in slowest
+        )
+        logger.warning(
+            f"Slow GraphQL operation {self.execution_context.operation_name or 'anonymous'} "
+            f"on {self.registry.version}: {elapsed * 1000:.1f}ms, slowest resolvers: {resolvers}"
+        )
+
+    def _observe(self, child: Any, info: GraphQLResolveInfo, start: float) -> None:
+        duration = time.perf_counter() - start
+        child.observe(duration)
+        if self.slow_operation_threshold is not None:
+            self._timings.append((duration, info.path))
+
+    def resolve(self, _next: Callable, root: Any, info: GraphQLResolveInfo, *args: Any, **kwargs: Any) -> Any:
+        child = self.registry.child(info)
+        if child is None:
+            return _next(root, info, *args, **kwargs)
+
+        start = time.perf_counter()
+        result = _next(root, info, *args, **kwargs)
+        if isawaitable(result):
+            return self._await_resolver(result, child, info, start)
+
+        self._observe(child, info, start)
+        return result
+
+    async def _await_resolver(self, result: Any, child: Any, info: GraphQLResolveInfo, start: float) -> Any:
+        try:
+            return await result
+        finally:
+            self._observe(child, info, start)
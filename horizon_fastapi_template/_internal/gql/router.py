@@ -0,0 +1,189 @@
+"""GraphQL router adding persisted queries and result caching to strawberry's router."""
+
+import hashlib
+import json
+from functools import lru_cache
+from typing import Any, FrozenSet, Optional, Tuple
+
+from fastapi import Request, Response
+from graphql import GraphQLError, OperationDefinitionNode, parse
+from prometheus_client import Counter, Gauge
+from strawberry.fastapi import GraphQLRouter
+from strawberry.http import GraphQLRequestData
+from strawberry.http.async_base_view import AsyncHTTPRequestAdapter, HTTPException
+from strawberry.types import ExecutionResult
+
+from ..utils.cache import LRUCache
+
+__all__ = ["TemplateGraphQLRouter", "GRAPHQL_CACHE_REQUESTS", "GRAPHQL_WEBSOCKET_CONNECTIONS"]
+
+GRAPHQL_CACHE_REQUESTS = Counter(
+    "graphql_cache_requests_total",
+    "GraphQL persisted query and result cache lookups",
+    ["version", "cache", "result"],
+)
+
+GRAPHQL_WEBSOCKET_CONNECTIONS = Gauge(
+    "graphql_websocket_connections",
+    "Open GraphQL subscription WebSocket connections",
+    ["version"],
+)
+
+PERSISTED_QUERY_NOT_FOUND = "PersistedQueryNotFound"
+
+
+def _persisted_query_not_found() -> ExecutionResult:
+    return ExecutionResult(
+        data=None,
+        errors=[GraphQLError(PERSISTED_QUERY_NOT_FOUND, extensions={"code": "PERSISTED_QUERY_NOT_FOUND"})],
+    )
+
+
+def _operation(query: str, operation_name: Optional[str]) -> Optional[Tuple[str, Optional[str]]]:
+    """Return the type and name of the operation a request will execute."""
+
+    try:
+        document = parse(query)
+    except GraphQLError:
+        return None
+
+    operations = [node for node in document.definitions if isinstance(node, OperationDefinitionNode)]
+    for node in operations:
+        name = node.name.value if node.name else None
+        if (operation_name is None and len(operations) == 1) or name == operation_name:
+            return node.operation.value, name
+    return None
+
+
+class TemplateGraphQLRouter(GraphQLRouter):
+    """Strawberry router with Automatic Persisted Queries, a TTL result cache and WebSocket metrics.
+
+    Persisted queries follow the Apollo APQ protocol: clients send
+    ``extensions.persistedQuery.sha256Hash`` and only register the query text on a
+    ``PersistedQueryNotFound`` miss, which makes hash-only GET requests CDN-cacheable.
+    Results are cached for queries whose operation name is listed in
+    ``cacheable_operations``; the cache is shared by every caller, so only list
+    operations whose result does not depend on the request context.
+    """
+
+    def __init__(
+        self,
+        *args: Any,
+        version_name: str,
+        persisted_queries_size: Optional[int] = None,
+        result_cache_size: int = 1000,
+        result_cache_ttl: float = 0.0,
+        cacheable_operations: FrozenSet[str] = frozenset(),
+        operation_cache_size: int = 1000,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self.version_name = version_name
+        self.persisted_queries: Optional[LRUCache[str]] = (
+            LRUCache(persisted_queries_size) if persisted_queries_size else None
+        )
+        self.result_cache: Optional[LRUCache[ExecutionResult]] = (
+            LRUCache(result_cache_size, ttl=result_cache_ttl)
+            if result_cache_ttl > 0 and cacheable_operations
+            else None
+        )
+        self.result_cache_ttl = result_cache_ttl
+        self.cacheable_operations = frozenset(cacheable_operations)
+        self._operation = lru_cache(maxsize=operation_cache_size)(_operation)
+        self._websocket_connections = GRAPHQL_WEBSOCKET_CONNECTIONS.labels(version_name)
+
+    async def run(self, request: Any, **kwargs: Any) -> Any:
+        if not self.is_websocket_request(request):
+            return await super().run(request, **kwargs)
+
+        self._websocket_connections.inc()
+        try:
+            return await super().run(request, **kwargs)
+        finally:
+            self._websocket_connections.dec()
+
+    def should_render_graphql_ide(self, request: AsyncHTTPRequestAdapter) -> bool:
+        # hash-only persisted query GETs carry no ``query`` parameter either
+        if self.persisted_queries is not None and "extensions" in request.query_params:
+            return False
+        return super().should_render_graphql_ide(request)
+
+    def _record(self, cache: str, result: str) -> None:
+        GRAPHQL_CACHE_REQUESTS.labels(self.version_name, cache, result).inc()
+
+    def _resolve_persisted_query(self, request_data: GraphQLRequestData) -> Optional[ExecutionResult]:
+        persisted = (request_data.extensions or {}).get("persistedQuery")
+        if persisted is None:
+            return None
+
+        sha256_hash = persisted.get("sha256Hash") if isinstance(persisted, dict) else None
+        if not isinstance(sha256_hash, str) or persisted.get("version") != 1:
+            raise HTTPException(400, "Unsupported persisted query")
+
+        if request_data.query is None:
+            query = self.persisted_queries.get(sha256_hash)
+            if query is None:
+                self._record("persisted_query", "miss")
+                return _persisted_query_not_found()
+            self._record("persisted_query", "hit")
+            request_data.query = query
+            return None
+
+        if hashlib.sha256(request_data.query.encode()).hexdigest() != sha256_hash:
+            raise HTTPException(400, "Provided sha does not match query")
+        self.persisted_queries.set(sha256_hash, request_data.query)
+        self._record("persisted_query", "register")
+        return None
+
+    def _result_key(self, request_data: GraphQLRequestData) -> Optional[Tuple[str, str, str]]:
+        if request_data.query is None:
+            return None
+
+        operation = self._operation(request_data.query, request_data.operation_name)
+        if operation is None or operation[0] != "query" or operation[1] not in self.cacheable_operations:
+            return None
+
+        variables = json.dumps(request_data.variables or {}, sort_keys=True, separators=(",", ":"))
+        return request_data.query, operation[1], variables
+
+    def _set_cache_headers(self, request_adapter: AsyncHTTPRequestAdapter, sub_response: Response) -> None:
+        if request_adapter.method == "GET":
+            sub_response.headers["Cache-Control"] = f"public, max-age={int(self.result_cache_ttl)}"
+
+    async def execute_single(  # noqa: PLR0917
+        self,
+        request: Request,
+        request_adapter: AsyncHTTPRequestAdapter,
+        sub_response: Response,
+        context: Any,
+        root_value: Any,
+        request_data: GraphQLRequestData,
+    ) -> ExecutionResult:
+        if self.persisted_queries is not None:
+            not_found = self._resolve_persisted_query(request_data)
+            if not_found is not None:
+                return not_found
+
+        key = self._result_key(request_data) if self.result_cache is not None else None
+        if key is not None:
+            cached = self.result_cache.get(key)
+            if cached is not None:
+                self._record("result", "hit")
+                self._set_cache_headers(request_adapter, sub_response)
+                return cached
+            self._record("result", "miss")
+
+        result = await super().execute_single(
+            request=request,
+            request_adapter=request_adapter,
+            sub_response=sub_response,
+            context=context,
+            root_value=root_value,
+            request_data=request_data,
+        )
+
+        if key is not None and not result.errors:
+            self.result_cache.set(key, result)
+            self._set_cache_headers(request_adapter, sub_response)
+
+        return result
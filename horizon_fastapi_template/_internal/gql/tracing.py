@@ -0,0 +1,58 @@
+"""Strawberry extension recording GraphQL phases and resolvers as trace spans."""
+
+import time
+from inspect import isawaitable
+from typing import Any, Callable, Iterator
+
+from graphql import GraphQLResolveInfo
+from strawberry.extensions import SchemaExtension
+
+from ..utils.tracing import current_span, record_span
+
+# Synchronous resolvers faster than this are plain attribute lookups, not worth a span.
+_SYNC_RESOLVER_MIN_NS = 100_000
+
+
+def _field_name(info: GraphQLResolveInfo) -> str:
+    return f"{info.parent_type.name}.{info.field_name}"
+
+
+class TracingExtension(SchemaExtension):
+    def _record_phase(self, name: str) -> Iterator[None]:
+        if current_span() is None:
+            yield
+            return
+        start = time.perf_counter_ns()
+        yield
+        record_span(name, start, time.perf_counter_ns())
+
+    def on_parse(self) -> Iterator[None]:
+        yield from self._record_phase("graphql.parse")
+
+    def on_validate(self) -> Iterator[None]:
+        yield from self._record_phase("graphql.validate")
+
+    def on_execute(self) -> Iterator[None]:
+        yield from self._record_phase("graphql.execute")
+
+    def resolve(self, _next: Callable, root: Any, info: GraphQLResolveInfo, *args: Any, **kwargs: Any) -> Any:
+        if current_span() is None:
+            return _next(root, info, *args, **kwargs)
+
+        start = time.perf_counter_ns()
+        result = _next(root, info, *args, **kwargs)
+
+        if isawaitable(result):
+            return self._await_resolver(result, start, info)
+
+        end = time.perf_counter_ns()
+        if end - start >= _SYNC_RESOLVER_MIN_NS:
+            record_span("graphql.resolve", start, end, field=_field_name(info))
+        return result
+
+    @staticmethod
+    async def _await_resolver(result: Any, start: int, info: GraphQLResolveInfo) -> Any:
+        try:
+            return await result
+        finally:
+            record_span("graphql.resolve", start, time.perf_counter_ns(), field=_field_name(info))
@@ -1,27 +1,134 @@
 """Middleware configuration for the FastAPI Template application."""
 
+from typing import Any, Callable, Dict, Optional, Type
+
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 
-from .exception import handlers
+from .compress_response import CompressResponsesMiddleware
+from .exception import create_handlers
 from .log_request import LogRequestsMiddleware
+from .rate_limit import RateLimitMiddleware
+from .reloadable import ReloadableMiddleware
 from .time_request import TimeRequestsMiddleware
+from .trace_request import TraceRequestsMiddleware
+from .track_in_flight import TrackInFlightRequestsMiddleware
+from ..utils.graceful_shutdown import GracefulShutdown
+from ..utils.rate_limit import MemoryRateLimitBackend, RateLimitBackend
+from ..utils.runtime_config import LiveConfig, RuntimeConfig
+from ..utils.tracing import Tracer
+
+
+def _add_configured(
+    app: FastAPI,
+    middleware_class: type,
+    options: Callable[[RuntimeConfig], Dict[str, Any]],
+    config: RuntimeConfig,
+    live_config: Optional[LiveConfig],
+) -> None:
+    if live_config is None:
+        app.add_middleware(middleware_class, **options(config))
+    else:
+        app.add_middleware(
+            ReloadableMiddleware,
+            live_config=live_config,
+            factory=lambda inner, current: middleware_class(inner, **options(current)),
+        )
 
 
 def add_middlewares(
     app: FastAPI,
+    config: RuntimeConfig,
     *,
     enable_request_logging: bool = True,
     enable_request_timing: bool = True,
     enable_exception_handlers: bool = True,
+    enable_response_compression: bool = False,
+    enable_rate_limiting: bool = False,
+    rate_limit_backend: Optional[RateLimitBackend] = None,
+    response_class: Type[JSONResponse] = JSONResponse,
+    live_config: Optional[LiveConfig] = None,
+    graceful_shutdown: Optional[GracefulShutdown] = None,
+    tracer: Optional[Tracer] = None,
 ) -> None:
-    """Register optional middlewares and exception handlers."""
+    """Register optional middlewares and exception handlers.
+
+    With ``live_config``, request logging, rate limiting and the trace sample rate
+    follow its reloads; everything else keeps the ``config`` it was created with.
+    ``graceful_shutdown`` is told about every HTTP request by the outermost middleware.
+    With ``tracer``, sampled requests are traced into it.
+    """
+
+    settings = config.settings
 
     if enable_request_timing:
-        app.add_middleware(TimeRequestsMiddleware)
+        app.add_middleware(TimeRequestsMiddleware, header=config.process_time_header)
 
     if enable_request_logging:
-        app.add_middleware(LogRequestsMiddleware)
+        def log_request_options(current: RuntimeConfig) -> Dict[str, Any]:
+            return dict(
+                mode=current.settings.LOG_REQUEST_MODE,
+                exclude_paths=current.log_request_exclude,
+                # the timing middleware is not reloaded, so neither is its header name
+                process_time_header=config.process_time_header if enable_request_timing else None,
+                sample_rate=current.settings.LOG_REQUEST_SAMPLE_RATE,
+                slow_threshold=current.settings.LOG_REQUEST_SLOW_THRESHOLD,
+                always_log_status=current.settings.LOG_REQUEST_ALWAYS_LOG_STATUS,
+                path_limits=current.settings.LOG_REQUEST_PATH_LIMITS,
+            )
+
+        _add_configured(app, LogRequestsMiddleware, log_request_options, config, live_config)
+
+    if enable_response_compression:
+        app.add_middleware(
+            CompressResponsesMiddleware,
+            minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+            gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+            brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+            zstd_level=settings.COMPRESSION_ZSTD_LEVEL,
+            excluded_content_types=settings.COMPRESSION_EXCLUDED_CONTENT_TYPES,
+            offload_size=settings.COMPRESSION_OFFLOAD_SIZE,
+        )
+
+    if enable_rate_limiting:
+        # shared by every rebuilt middleware, so reloads keep the buckets
+        backend = rate_limit_backend if rate_limit_backend is not None else MemoryRateLimitBackend()
+
+        def rate_limit_options(current: RuntimeConfig) -> Dict[str, Any]:
+            return dict(
+                default_limit=current.settings.RATE_LIMIT_DEFAULT,
+                route_limits=current.settings.RATE_LIMIT_ROUTES,
+                key=current.settings.RATE_LIMIT_KEY,
+                api_key_header=current.settings.RATE_LIMIT_API_KEY_HEADER,
+                trust_forwarded_for=current.settings.RATE_LIMIT_TRUST_FORWARDED_FOR,
+                exclude_paths=current.rate_limit_exclude,
+                backend=backend,
+            )
+
+        _add_configured(app, RateLimitMiddleware, rate_limit_options, config, live_config)
+
+    if tracer is not None:
+        def configure_tracer(current: RuntimeConfig) -> None:
+            tracer.configure(
+                sample_rate=current.settings.TRACE_SAMPLE_RATE,
+                buffer_size=current.settings.TRACE_BUFFER_SIZE,
+            )
+
+        configure_tracer(config)
+        if live_config is not None:
+            live_config.subscribe(configure_tracer)
+        app.add_middleware(TraceRequestsMiddleware, tracer=tracer)
+
+    if graceful_shutdown is not None:
+        # added last so it is outermost and counts each request until its response is sent
+        app.add_middleware(TrackInFlightRequestsMiddleware, shutdown=graceful_shutdown)
 
     if enable_exception_handlers:
-        for handler in handlers:
+        exception_handlers = create_handlers(
+            response_class,
+            client_error_sample_rate=settings.EXCEPTION_CLIENT_ERROR_SAMPLE_RATE,
+            client_error_log_limit=settings.EXCEPTION_CLIENT_ERROR_LOG_LIMIT,
+            dedup_window=settings.EXCEPTION_DEDUP_WINDOW,
+        )
+        for handler in exception_handlers:
             app.add_exception_handler(handler.exception_class, handler.handler)
@@ -0,0 +1,226 @@
+"""Middleware compressing response bodies with gzip, brotli or zstd."""
+
+import zlib
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+import anyio.to_thread
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the installed extras
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the installed extras
+    zstandard = None
+
+__all__ = ["CompressResponsesMiddleware", "AVAILABLE_ENCODINGS", "select_encoding"]
+
+
+class _Gzip:
+    def __init__(self, level: int) -> None:
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_FINISH)
+
+
+class _Brotli:
+    def __init__(self, quality: int) -> None:
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.process(data) + self._compressor.finish()
+
+
+class _Zstd:
+    def __init__(self, level: int) -> None:
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+# server preference, best ratio for the CPU spent first
+AVAILABLE_ENCODINGS: Tuple[str, ...] = tuple(
+    name
+    for name, available in (("zstd", zstandard is not None), ("br", brotli is not None), ("gzip", True))
+    if available
+)
+
+DEFAULT_EXCLUDED_CONTENT_TYPES = ("image/", "video/", "audio/", "font/woff", "application/zip", "application/gzip")
+
+
+def _accepted(accept_encoding: str) -> Dict[str, float]:
+    accepted: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            accepted[coding.strip().lower()] = quality
+    return accepted
+
+
+def select_encoding(accept_encoding: str, encodings: Sequence[str] = AVAILABLE_ENCODINGS) -> Optional[str]:
+    """Pick the preferred server encoding the client accepts with a non-zero quality."""
+
+    accepted = _accepted(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+    for encoding in encodings:
+        if accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+
+class CompressResponsesMiddleware:
+    """Pure ASGI middleware compressing bodies of at least ``minimum_size`` bytes.
+
+    Complete bodies are compressed in one call. Streaming bodies, such as server-sent
+    events or NDJSON, are compressed whatever their size, every chunk being flushed as
+    it arrives so clients keep receiving data incrementally. Chunks of at least
+    ``offload_size`` bytes are compressed in a worker thread, which keeps high
+    compression levels from blocking the event loop. Every compressible response
+    carries ``Vary: Accept-Encoding``, compressed or not, so caches keep the variants
+    apart.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        minimum_size: int = 1000,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        zstd_level: int = 3,
+        excluded_content_types: Sequence[str] = DEFAULT_EXCLUDED_CONTENT_TYPES,
+        offload_size: Optional[int] = None,
+        encodings: Sequence[str] = AVAILABLE_ENCODINGS,
+    ) -> None:
+        unavailable = set(encodings) - set(AVAILABLE_ENCODINGS)
+        if unavailable:
+            raise ValueError(f"Unavailable compression encodings: {', '.join(sorted(unavailable))}.")
+
+        self.app = app
+        self.minimum_size = minimum_size
+        self.excluded_content_types = tuple(excluded_content_types)
+        self.offload_size = offload_size
+        self.encodings = tuple(encodings)
+        self._factories: Dict[str, Callable[[], object]] = {
+            "gzip": lambda: _Gzip(gzip_level),
+            "br": lambda: _Brotli(brotli_quality),
+            "zstd": lambda: _Zstd(zstd_level),
+        }
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = select_encoding(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+    def _should_compress(self, message: Message) -> bool:
+        status = message["status"]
+        if status < 200 or status in (204, 206, 304):
+            return False
+
+        headers = Headers(raw=message.get("headers", []))
+        if "content-encoding" in headers or "no-transform" in headers.get("cache-control", ""):
+            return False
+
+        content_type = headers.get("content-type", "")
+        return not content_type.startswith(self.excluded_content_types)
+
+    async def _run(self, function: Callable[[bytes], bytes], data: bytes) -> bytes:
+        if self.offload_size is not None and len(data) >= self.offload_size:
+            return await anyio.to_thread.run_sync(function, data)
+        return function(data)
+
+
+class _CompressionResponder:
+    """Per-response state: passes through or compresses, ``encoding`` being None when
+    the client accepts none of the middleware's encodings."""
+
+    def __init__(self, middleware: CompressResponsesMiddleware, encoding: Optional[str], send: Send) -> None:
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self._start: Optional[Message] = None
+        self._compressor = None
+        self._passthrough = False
+
+    async def send(self, message: Message) -> None:
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            if not self.middleware._should_compress(message):
+                self._passthrough = True
+                await self._send(message)
+                return
+
+            message = {**message, "headers": list(message.get("headers", []))}
+            MutableHeaders(raw=message["headers"]).add_vary_header("Accept-Encoding")
+            if self.encoding is None:
+                self._passthrough = True
+                await self._send(message)
+            else:
+                self._start = message
+            return
+
+        if self._passthrough or message_type != "http.response.body":
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self._compressor is not None:
+            compress = self._compressor.compress if more_body else self._compressor.finish
+            await self._send({
+                "type": "http.response.body",
+                "body": await self.middleware._run(compress, body),
+                "more_body": more_body,
+            })
+            return
+
+        if not more_body and len(body) < self.middleware.minimum_size:
+            await self._send(self._start)
+            await self._send(message)
+            return
+
+        # a stream is compressed from its first chunk, holding it back would delay events
+        self._compressor = self.middleware._factories[self.encoding]()
+        headers = MutableHeaders(raw=self._start["headers"])
+        headers["Content-Encoding"] = self.encoding
+
+        if more_body:
+            del headers["Content-Length"]
+            compressed = await self.middleware._run(self._compressor.compress, body)
+        else:
+            compressed = await self.middleware._run(self._compressor.finish, body)
+            headers["Content-Length"] = str(len(compressed))
+
+        await self._send(self._start)
+        await self._send({"type": "http.response.body", "body": compressed, "more_body": more_body})
@@ -1,44 +1,154 @@
-"""Exception handlers used by the FastAPI Template application."""
+"""Exception handlers used by the FastAPI Template application.
+
+Client errors (4xx) are counted and logged as one line without a traceback, optionally
+sampled or rate limited. Server errors (5xx) keep their full traceback, and repeats of
+an identical unhandled error within a time window are counted instead of logged again.
+"""
+
+import random
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple, Type
 
 from fastapi import HTTPException, Request
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 from loguru import logger
+from prometheus_client import Counter
 
 from ..models import ExceptionHandlerConfig
+from ..utils.rate_limit import MemoryRateLimitBackend, RateLimit, parse_rate_limit
+
+__all__ = ["create_handlers", "handlers", "HTTP_EXCEPTIONS"]
+
+HTTP_EXCEPTIONS = Counter(
+    "http_exceptions_total",
+    "Requests answered by an exception handler, by status and exception class",
+    ["status", "exception"],
+)
+
+# remembered unhandled errors before expired ones are swept
+_DEDUP_MAX_ENTRIES = 1024
 
 
 def _http_exception_message(exc: HTTPException) -> dict:
     return {"detail": exc.detail}
 
 
-def _validation_exception_message(exc: RequestValidationError) -> dict:
-    return {"detail": exc.errors()}
+def _validation_exception_message(errors: list) -> dict:
+    return {"detail": errors}
 
 
 def _unhandled_exception_message() -> dict:
     return {"detail": "Internal Server Error"}
 
 
-async def http_exception_handler(request: Request, exc: HTTPException) -> JSONResponse:
-    logger.opt(exception=exc).info(f"HTTP error {exc.status_code}: {exc.detail}")
-    return JSONResponse(status_code=exc.status_code, content=_http_exception_message(exc))
-
-
-async def validation_exception_handler(request: Request, exc: RequestValidationError) -> JSONResponse:
-    logger.opt(exception=exc).info(f"Validation error: {exc.errors()}")
-    return JSONResponse(status_code=422, content=_validation_exception_message(exc))
-
-
-async def unhandled_exception_handler(request: Request, exc: Exception) -> JSONResponse:
-    logger.opt(exception=exc).warning(f"Unhandled error: {exc}")
-    return JSONResponse(status_code=500, content=_unhandled_exception_message())
-
-
-handlers = [
-    ExceptionHandlerConfig(exception_class=HTTPException, handler=http_exception_handler),
-    ExceptionHandlerConfig(
-        exception_class=RequestValidationError, handler=validation_exception_handler
-    ),
-    ExceptionHandlerConfig(exception_class=Exception, handler=unhandled_exception_handler),
-]
+def _raise_site(exc: BaseException) -> Tuple[str, int]:
+    tb = exc.__traceback__
+    if tb is None:
+        return "", 0
+    while tb.tb_next is not None:
+        tb = tb.tb_next
+    return tb.tb_frame.f_code.co_filename, tb.tb_lineno
+
+
+class _ClientErrorGate:
+    """Decide whether a client error is logged, by sampling and then by rate limit."""
+
+    def __init__(self, sample_rate: float, log_limit: Optional[RateLimit]) -> None:
+        self.sample_rate = sample_rate
+        self.log_limit = log_limit
+        self._buckets = MemoryRateLimitBackend()
+
+    def __call__(self) -> bool:
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return False
+        return self.log_limit is None or self._buckets.take("client_errors", self.log_limit).allowed
+
+
+class _ErrorDeduplicator:
+    """Count repeats of identical errors, same class, message and raise site, per window."""
+
+    def __init__(self, window: float) -> None:
+        self.window = window
+        # key -> [window start, repeats suppressed], oldest window first
+        self._seen: "OrderedDict[Tuple[str, str, str, int], List[float]]" = OrderedDict()
+
+    def record(self, exc: BaseException) -> Optional[int]:
+        """Return how many repeats were suppressed before this one, or None to suppress it."""
+
+        if self.window <= 0:
+            return 0
+
+        now = time.monotonic()
+        key = (type(exc).__qualname__, str(exc), *_raise_site(exc))
+        entry = self._seen.get(key)
+        if entry is not None and now - entry[0] < self.window:
+            entry[1] += 1
+            return None
+
+        self._seen[key] = [now, 0]
+        self._seen.move_to_end(key)
+        while len(self._seen) > _DEDUP_MAX_ENTRIES:
+            self._seen.popitem(last=False)
+        return int(entry[1]) if entry is not None else 0
+
+
+def create_handlers(
+    response_class: Type[JSONResponse] = JSONResponse,
+    *,
+    client_error_sample_rate: float = 1.0,
+    client_error_log_limit: Optional[str] = None,
+    dedup_window: float = 60.0,
+) -> List[ExceptionHandlerConfig]:
+    """Build the exception handlers, rendering their payloads with ``response_class``.
+
+    ``client_error_sample_rate`` and ``client_error_log_limit`` (e.g. ``"10/second"``)
+    bound how many 4xx errors are logged; every error is counted regardless.
+    Identical unhandled errors are logged once per ``dedup_window`` seconds.
+    """
+
+    should_log_client_error = _ClientErrorGate(
+        client_error_sample_rate,
+        parse_rate_limit(client_error_log_limit) if client_error_log_limit else None,
+    )
+    deduplicator = _ErrorDeduplicator(dedup_window)
+
+    def count(status: int, exc: BaseException) -> None:
+        HTTP_EXCEPTIONS.labels(str(status), type(exc).__name__).inc()
+
+    async def http_exception_handler(request: Request, exc: HTTPException) -> JSONResponse:
+        count(exc.status_code, exc)
+        if exc.status_code >= 500:
+            logger.opt(exception=exc).warning(f"HTTP error {exc.status_code}: {exc.detail}")
+        elif should_log_client_error():
+            logger.info(f"HTTP error {exc.status_code} on {request.method} {request.url.path}: {exc.detail}")
+        return response_class(status_code=exc.status_code, content=_http_exception_message(exc))
+
+    async def validation_exception_handler(request: Request, exc: RequestValidationError) -> JSONResponse:
+        errors = exc.errors()
+        count(422, exc)
+        if should_log_client_error():
+            logger.info(f"Validation error on {request.method} {request.url.path}: {errors}")
+        return response_class(status_code=422, content=_validation_exception_message(errors))
+
+    async def unhandled_exception_handler(request: Request, exc: Exception) -> JSONResponse:
+        count(500, exc)
+        suppressed = deduplicator.record(exc)
+        if suppressed is not None:
+            repeats = ""
+            if suppressed:
+                repeats = f" ({suppressed} identical errors suppressed in the previous {dedup_window:g}s)"
+            logger.opt(exception=exc).warning(f"Unhandled error: {exc}{repeats}")
+        return response_class(status_code=500, content=_unhandled_exception_message())
+
+    return [
+        ExceptionHandlerConfig(exception_class=HTTPException, handler=http_exception_handler),
+        ExceptionHandlerConfig(
+            exception_class=RequestValidationError, handler=validation_exception_handler
+        ),
+        ExceptionHandlerConfig(exception_class=Exception, handler=unhandled_exception_handler),
+    ]
+
+
+handlers = create_handlers()
@@ -1,32 +1,135 @@
 """Middleware for logging incoming HTTP requests."""
+
+import random
 import re
+import time
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 
-from fastapi import Request
 from loguru import logger
-from starlette.middleware.base import BaseHTTPMiddleware
+from prometheus_client import Counter
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..utils.rate_limit import MemoryRateLimitBackend, RateLimit, parse_rate_limit
+from ..utils.response_cache import REFRESH_SCOPE_KEY
+from ..utils.runtime_config import PathMatcher
+from ..utils.tracing import span
+
+__all__ = ["LogRequestsMiddleware", "REQUEST_LOGS", "LOG_REQUEST_MODES"]
+
+REQUEST_LOGS = Counter(
+    "http_request_logs_total",
+    "Request log records by outcome: logged, sampled_out or rate_limited",
+    ["result"],
+)
+
+LOG_REQUEST_MODES = ("full", "combined")
+
+
+class LogRequestsMiddleware:
+    """Pure ASGI middleware logging every request.
+
+    In ``"full"`` mode a line is logged when the request arrives and another once the
+    response starts. In ``"combined"`` mode a single completion line is logged, which
+    can be sampled with ``sample_rate`` and capped per path with ``path_limits``
+    (path regular expression to a limit such as ``"10/second"``, first match wins).
+    Responses with a status of at least ``always_log_status``, failed requests and
+    requests slower than ``slow_threshold`` seconds are always logged. Records left
+    out are counted in ``http_request_logs_total``. Paths matching
+    ``exclude_paths`` are logged at DEBUG and never sampled. ``process_time_header``,
+    the lowercase raw name set by ``TimeRequestsMiddleware``, is added to the
+    ``"full"`` completion line.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        mode: str = "full",
+        exclude_paths: Union[PathMatcher, Sequence[str]] = (),
+        process_time_header: Optional[bytes] = None,
+        sample_rate: float = 1.0,
+        slow_threshold: Optional[float] = None,
+        always_log_status: int = 500,
+        path_limits: Optional[Dict[str, str]] = None,
+    ) -> None:
+        if mode not in LOG_REQUEST_MODES:
+            raise ValueError(f"Invalid request log mode '{mode}', expected one of {', '.join(LOG_REQUEST_MODES)}.")
+
+        self.app = app
+        self.mode = mode
+        self.is_excluded = PathMatcher.of(exclude_paths)
+        self.process_time_header = process_time_header
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+        self.always_log_status = always_log_status
+        self.path_limits: List[Tuple[re.Pattern, str, RateLimit]] = [
+            (re.compile(pattern), pattern, parse_rate_limit(limit))
+            for pattern, limit in (path_limits or {}).items()
+        ]
+        self._buckets = MemoryRateLimitBackend()
+        self._counters = {result: REQUEST_LOGS.labels(result) for result in ("logged", "sampled_out", "rate_limited")}
+
+    def _admit(self, path: str, status: int, duration: float) -> bool:
+        """Apply sampling and path caps to a completion line, always keeping errors and slow requests."""
 
-from ..utils import settings
+        if status >= self.always_log_status or (self.slow_threshold is not None and duration >= self.slow_threshold):
+            return True
 
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            self._counters["sampled_out"].inc()
+            return False
 
-class LogRequestsMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):  # type: ignore[override]
-        log_level = "INFO"
+        for pattern, name, limit in self.path_limits:
+            if pattern.match(path):
+                if not self._buckets.take(name, limit).allowed:
+                    self._counters["rate_limited"].inc()
+                    return False
+                break
+        return True
 
-        if any(
-            request.url.path.startswith(prefix) or re.match(prefix, request.url.path)
-            for prefix in settings.LOG_REQUEST_EXCLUDE_PATHS
-        ):
-            log_level = "DEBUG"
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or REFRESH_SCOPE_KEY in scope:
+            await self.app(scope, receive, send)
+            return
 
-        logger.log(log_level, f"{request.method} {request.url.path}", extra={"location": "Request"})
+        with span("middleware.log_request"):
+            method = scope["method"]
+            path = scope["path"]
+            excluded = self.is_excluded(path)
+            log_level = "DEBUG" if excluded else "INFO"
 
-        response = await call_next(request)
+            if self.mode == "full":
+                logger.log(log_level, f"{method} {path}", extra={"location": "Request"})
 
-        process_time = response.headers.get(settings.PROCESS_TIME_HEADER) or ""
+            status = 500
+            process_time = ""
+            start = time.perf_counter()
 
-        logger.log(
-            log_level,
-            f"{request.method} {request.url.path} {response.status_code} {process_time}", extra={"location": "Response"}
-        )
+            async def send_wrapper(message: Message) -> None:
+                nonlocal status, process_time
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    if self.process_time_header is not None:
+                        for name, value in message.get("headers", ()):
+                            if name == self.process_time_header:
+                                process_time = value.decode("latin-1")
+                                break
+                    if self.mode == "full":
+                        logger.log(
+                            log_level, f"{method} {path} {status} {process_time}", extra={"location": "Response"}
+                        )
+                        self._counters["logged"].inc()
+                await send(message)
 
-        return response
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                if self.mode == "combined":
+                    duration = time.perf_counter() - start
+                    if excluded or self._admit(path, status, duration):
+                        logger.log(
+                            log_level,
+                            f"{method} {path} {status} {duration * 1000:.1f}ms",
+                            extra={"location": "Response"},
+                        )
+                        self._counters["logged"].inc()
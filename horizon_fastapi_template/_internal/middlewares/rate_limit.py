@@ -0,0 +1,132 @@
+"""Middleware rejecting clients that exceed their token bucket with 429."""
+
+import math
+import re
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from prometheus_client import Counter
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from ..utils.fast_json import json_dumps
+from ..utils.rate_limit import MemoryRateLimitBackend, RateLimit, RateLimitBackend, parse_rate_limit
+from ..utils.response_cache import REFRESH_SCOPE_KEY
+from ..utils.runtime_config import PathMatcher
+
+__all__ = ["RateLimitMiddleware", "RATE_LIMIT_REQUESTS"]
+
+RATE_LIMIT_REQUESTS = Counter(
+    "http_rate_limit_requests_total",
+    "Requests checked by the rate limiter, by rule and outcome",
+    ["rule", "result"],
+)
+
+DEFAULT_RULE = "default"
+
+
+class RateLimitMiddleware:
+    """Pure ASGI middleware applying the first matching route limit, or the default one.
+
+    ``route_limits`` maps path regular expressions to limits such as ``"20/second"``.
+    Clients are identified by ``key``: ``"ip"``, ``"api_key"`` (the ``api_key_header``
+    value, the IP when absent) or ``"header:<name>"``. Paths starting with or matching
+    one of ``exclude_paths`` are never limited.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        default_limit: Optional[str] = None,
+        route_limits: Optional[Dict[str, str]] = None,
+        key: str = "ip",
+        api_key_header: str = "X-API-Key",
+        trust_forwarded_for: bool = False,
+        exclude_paths: Union[PathMatcher, Sequence[str]] = (),
+        backend: Optional[RateLimitBackend] = None,
+    ) -> None:
+        self.app = app
+        self.default_limit = parse_rate_limit(default_limit) if default_limit else None
+        self.route_limits: List[Tuple[re.Pattern, str, RateLimit]] = [
+            (re.compile(pattern), pattern, parse_rate_limit(limit))
+            for pattern, limit in (route_limits or {}).items()
+        ]
+        self.backend = backend if backend is not None else MemoryRateLimitBackend()
+        self.trust_forwarded_for = trust_forwarded_for
+        self.is_excluded = PathMatcher.of(exclude_paths)
+
+        if key == "ip":
+            self.key_header = None
+        elif key == "api_key":
+            self.key_header = api_key_header.lower()
+        elif key.startswith("header:") and key[len("header:"):].strip():
+            self.key_header = key[len("header:"):].strip().lower()
+        else:
+            raise ValueError(f"Invalid rate limit key '{key}', expected 'ip', 'api_key' or 'header:<name>'.")
+
+        self._counters: Dict[Tuple[str, str], Counter] = {}
+
+    def _rule(self, path: str) -> Optional[Tuple[str, RateLimit]]:
+        for pattern, name, limit in self.route_limits:
+            if pattern.match(path):
+                return name, limit
+        if self.default_limit is not None:
+            return DEFAULT_RULE, self.default_limit
+        return None
+
+    def _client_key(self, scope: Scope) -> str:
+        headers = Headers(scope=scope)
+        if self.key_header is not None:
+            value = headers.get(self.key_header)
+            if value:
+                return f"{self.key_header}:{value}"
+
+        if self.trust_forwarded_for:
+            forwarded = headers.get("x-forwarded-for")
+            if forwarded:
+                return "ip:" + forwarded.split(",")[0].strip()
+
+        client = scope.get("client")
+        return "ip:" + (client[0] if client else "unknown")
+
+    def _count(self, rule: str, result: str) -> None:
+        counter = self._counters.get((rule, result))
+        if counter is None:
+            counter = self._counters[(rule, result)] = RATE_LIMIT_REQUESTS.labels(rule, result)
+        counter.inc()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # response cache refreshes are the application's own requests, not a client's
+        if scope["type"] != "http" or REFRESH_SCOPE_KEY in scope:
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        root_path = scope.get("root_path", "")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):] or "/"
+
+        rule = None if self.is_excluded(path) else self._rule(path)
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        name, limit = rule
+        result = await self.backend.acquire(f"{name}|{self._client_key(scope)}", limit)
+        if result.allowed:
+            self._count(name, "allowed")
+            await self.app(scope, receive, send)
+            return
+
+        self._count(name, "limited")
+        body = json_dumps({"detail": "Too Many Requests"})
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(result.retry_after))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
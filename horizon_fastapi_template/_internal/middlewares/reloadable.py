@@ -0,0 +1,38 @@
+"""Middleware rebuilding a configured middleware whenever the live config changes."""
+
+from typing import Callable
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from ..utils.runtime_config import LiveConfig, RuntimeConfig
+
+__all__ = ["ReloadableMiddleware"]
+
+
+class ReloadableMiddleware:
+    """Pure ASGI middleware delegating to ``factory(app, config)`` for the current config.
+
+    The wrapped middleware is rebuilt on the first request after a reload; requests in
+    flight finish with the instance they started with. State that must survive a
+    reload, such as rate limit buckets, belongs in objects the factory reuses.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        live_config: LiveConfig,
+        factory: Callable[[ASGIApp, RuntimeConfig], ASGIApp],
+    ) -> None:
+        self.app = app
+        self.live_config = live_config
+        self.factory = factory
+        self._generation = live_config.generation
+        self._middleware = factory(app, live_config.config)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        generation = self.live_config.generation
+        if generation != self._generation:
+            self._middleware = self.factory(self.app, self.live_config.config)
+            self._generation = generation
+        await self._middleware(scope, receive, send)
@@ -1,19 +1,34 @@
 """Middleware for recording request processing time."""
 
 import time
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
 
-from ..utils import settings
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from ..utils.tracing import span
 
-class TimeRequestsMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):  # type: ignore[override]
-        start_time = time.perf_counter_ns()
 
-        response = await call_next(request)
+class TimeRequestsMiddleware:
+    """Pure ASGI middleware adding the nanoseconds spent until the response starts as ``header``."""
 
-        process_time = time.perf_counter_ns() - start_time
-        response.headers[settings.PROCESS_TIME_HEADER] = str(process_time)
+    def __init__(self, app: ASGIApp, *, header: bytes = b"x-process-time") -> None:
+        self.app = app
+        self.header = header
 
-        return response
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with span("middleware.time_request"):
+            start_time = time.perf_counter_ns()
+
+            async def send_wrapper(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    process_time = time.perf_counter_ns() - start_time
+                    message["headers"] = [
+                        *message.get("headers", []),
+                        (self.header, str(process_time).encode("latin-1")),
+                    ]
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,40 @@
+"""Middleware opening a sampled trace for every incoming HTTP request."""
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from typing import Optional
+
+from ..utils.response_cache import REFRESH_SCOPE_KEY
+from ..utils.tracing import Tracer, server_timing, start_trace
+
+SERVER_TIMING_HEADER = b"server-timing"
+
+
+class TraceRequestsMiddleware:
+    """Pure ASGI middleware so unsampled requests cost a single sampling decision."""
+
+    def __init__(self, app: ASGIApp, tracer: Optional[Tracer] = None) -> None:
+        self.app = app
+        self.tracer = tracer if tracer is not None else Tracer()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or REFRESH_SCOPE_KEY in scope or not self.tracer.should_sample():
+            await self.app(scope, receive, send)
+            return
+
+        attributes = {"http.method": scope["method"], "http.target": scope["path"]}
+
+        with start_trace("request", attributes) as root:
+            async def send_wrapper(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    root.attributes["http.status_code"] = message["status"]
+                    headers = list(message.get("headers", []))
+                    headers.append((SERVER_TIMING_HEADER, server_timing(root.trace).encode("latin-1")))
+                    message["headers"] = headers
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                root.end()
+                self.tracer.finish(root.trace)
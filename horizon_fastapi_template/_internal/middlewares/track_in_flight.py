@@ -0,0 +1,27 @@
+"""Middleware counting the HTTP requests in flight for the shutdown drain."""
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from ..utils.graceful_shutdown import GracefulShutdown
+
+
+class TrackInFlightRequestsMiddleware:
+    """Pure ASGI middleware telling ``shutdown`` when each HTTP request starts and ends.
+
+    WebSocket connections are not counted, they would hold the drain until its timeout.
+    """
+
+    def __init__(self, app: ASGIApp, *, shutdown: GracefulShutdown) -> None:
+        self.app = app
+        self.shutdown = shutdown
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        self.shutdown.request_started()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.shutdown.request_finished()
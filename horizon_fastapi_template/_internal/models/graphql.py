@@ -1,8 +1,10 @@
-from typing import Callable, Dict, Annotated
+from typing import Callable, Dict, Annotated, List, Optional, Set
 
 import strawberry
 from pydantic import BaseModel, Field
-from strawberry.fastapi import BaseContext
+from strawberry.subscriptions import GRAPHQL_TRANSPORT_WS_PROTOCOL, GRAPHQL_WS_PROTOCOL
+
+from ..gql.dataloaders import create_context_getter
 
 class GraphQLVersion(BaseModel):
     """GraphQL API version configuration."""
@@ -20,9 +22,98 @@ class GraphQLVersion(BaseModel):
     )
 
     context_getter: Callable = Field(
-        description="Context object for GraphQL requests.",
-        default=lambda: BaseContext()
+        description="Context object for GraphQL requests, by default a per-request DataLoader registry.",
+        default_factory=create_context_getter,
+    )
+
+    document_cache_size: int = Field(
+        description="Size of the LRU caches of parsed and validated query documents, 0 disables them.",
+        default=0,
+        ge=0,
+    )
+
+    persisted_queries: bool = Field(
+        description="Enable Automatic Persisted Queries (hash-only requests, CDN-cacheable over GET).",
+        default=False,
+    )
+
+    persisted_queries_size: int = Field(
+        description="Number of persisted query documents kept in memory.",
+        default=1000,
+        gt=0,
+    )
+
+    cacheable_operations: Set[str] = Field(
+        description="Names of query operations whose results may be served from the result cache.",
+        default_factory=set,
+    )
+
+    result_cache_ttl: float = Field(
+        description="Seconds a cacheable query result is reused, 0 disables the result cache.",
+        default=0.0,
+        ge=0,
+    )
+
+    result_cache_size: int = Field(
+        description="Number of query results kept in the result cache.",
+        default=1000,
+        gt=0,
+    )
+
+    max_depth: Optional[int] = Field(
+        description="Maximum selection depth of an operation, checked before execution.",
+        default=None,
+        gt=0,
     )
 
+    max_complexity: Optional[int] = Field(
+        description="Maximum operation cost, one per field multiplied by literal first/last/limit arguments.",
+        default=None,
+        gt=0,
+    )
+
+    max_aliases: Optional[int] = Field(
+        description="Maximum number of aliases in an operation.",
+        default=None,
+        gt=0,
+    )
+
+    resolver_metrics: bool = Field(
+        description="Record a Prometheus latency histogram for every custom field resolver.",
+        default=False,
+    )
+
+    resolver_metrics_max_fields: int = Field(
+        description="Number of distinct fields labelled in the resolver histogram, others are reported as 'other'.",
+        default=200,
+        gt=0,
+    )
 
+    slow_query_threshold: Optional[float] = Field(
+        description="Seconds after which an operation is logged with its slowest resolvers (needs resolver_metrics).",
+        default=None,
+        gt=0,
+    )
 
+    subscription_protocols: List[str] = Field(
+        description="WebSocket subprotocols accepted for subscriptions, empty to refuse WebSocket connections.",
+        default_factory=lambda: [GRAPHQL_TRANSPORT_WS_PROTOCOL, GRAPHQL_WS_PROTOCOL],
+    )
+
+    connection_init_wait_timeout: float = Field(
+        description="Seconds a WebSocket client has to send its connection_init message.",
+        default=60.0,
+        gt=0,
+    )
+
+    max_subscriptions_per_connection: Optional[int] = Field(
+        description="Maximum concurrent subscriptions on one WebSocket connection, None for no limit.",
+        default=100,
+        gt=0,
+    )
+
+    subscription_keep_alive_interval: Optional[float] = Field(
+        description="Seconds between keep-alive messages on graphql-ws connections, None disables them.",
+        default=None,
+        gt=0,
+    )
@@ -1,38 +1,66 @@
 """Router registration for the FastAPI Template application."""
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
 from fastapi import FastAPI
 
 from .metrics import metrics_router
-from .probes import health_router
-from .swagger import router as swagger_router
+from .probes import create_health_router
+from .profiling import create_profiling_router
+from .swagger import create_swagger_router
 from .qraphql import create_graphql_router
+from .traces import create_traces_router
 from ..models import GraphQLVersion
+from ..utils.graceful_shutdown import GracefulShutdown
+from ..utils.runtime_config import RuntimeConfig
+from ..utils.tracing import Tracer
 
 
 def add_routers(
     app: FastAPI,
+    config: RuntimeConfig,
     *,
     enable_swagger: bool = True,
     enable_metrics: bool = True,
     enable_probe: bool = True,
+    enable_profiling: bool = False,
+    graceful_shutdown: Optional[GracefulShutdown] = None,
+    tracer: Optional[Tracer] = None,
 ) -> None:
-    """Attach optional routers to the application."""
+    """Attach optional routers to the application.
+
+    With ``graceful_shutdown``, the readiness probe answers 503 while it drains.
+    With ``tracer``, its buffered traces are served on ``TRACES_PATH``.
+    """
 
     if enable_swagger:
-        app.include_router(swagger_router, include_in_schema=False)
+        app.include_router(create_swagger_router(config), include_in_schema=False)
 
     if enable_metrics:
         app.include_router(metrics_router, include_in_schema=False)
 
     if enable_probe:
-        app.include_router(health_router, include_in_schema=False)
+        app.include_router(create_health_router(config, graceful_shutdown), include_in_schema=False)
+
+    if tracer is not None:
+        app.include_router(create_traces_router(config, tracer), include_in_schema=False)
+
+    if enable_profiling:
+        app.include_router(create_profiling_router(config), include_in_schema=False)
 
 
-def add_graphql_routes(app: FastAPI, versions: List[GraphQLVersion], static_files: Path) -> None:
+def add_graphql_routes(
+    app: FastAPI,
+    versions: List[GraphQLVersion],
+    static_files: Path,
+    *,
+    enable_tracing: bool = False,
+) -> None:
     """Attach GraphQL routes to the application."""
 
     for version in versions:
-        app.include_router(create_graphql_router(version, static_files), include_in_schema=True)
+        app.include_router(
+            create_graphql_router(version, static_files, enable_tracing=enable_tracing),
+            include_in_schema=True,
+        )
 
@@ -0,0 +1,58 @@
+"""Route class shared by the routes registered through the application factory."""
+
+import functools
+from typing import Any, Callable, Coroutine, Iterable
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from starlette.routing import BaseRoute
+
+from ..utils.response_cache import get_response_cache_policy
+from ..utils.tracing import current_span, span
+
+
+class TemplateAPIRoute(APIRoute):
+    """APIRoute recording the endpoint execution as a ``handler`` span.
+
+    GET routes decorated with ``cache_response`` or depending on a
+    ``ResponseCachePolicy`` are answered through the response cache.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+        route_path = self.path
+
+        policy = get_response_cache_policy(self.endpoint, self.dependencies)
+        if policy is not None and self.methods == {"GET"}:
+            handler = functools.partial(policy.serve, handler, route=route_path)
+
+        async def route_handler(request: Request) -> Response:
+            if current_span() is None:
+                return await handler(request)
+            with span("handler", route=route_path):
+                return await handler(request)
+
+        return route_handler
+
+
+def check_cached_routes(routes: Iterable[BaseRoute]) -> None:
+    """Raise when a route caching its responses is not a :class:`TemplateAPIRoute`.
+
+    Only ``TemplateAPIRoute`` honours ``cache_response`` and ``ResponseCachePolicy``,
+    on a route of a plain ``APIRouter()`` they would silently do nothing.
+    """
+
+    for route in routes:
+        # recent FastAPI versions keep included routers whole instead of copying their routes
+        included = getattr(route, "original_router", None)
+        if included is not None:
+            check_cached_routes(included.routes)
+        elif (
+            isinstance(route, APIRoute)
+            and not isinstance(route, TemplateAPIRoute)
+            and get_response_cache_policy(route.endpoint, route.dependencies) is not None
+        ):
+            raise RuntimeError(
+                f"Route {route.path} caches its responses but is a {type(route).__name__}, "
+                "create its router with APIRouter(route_class=TemplateAPIRoute)"
+            )
@@ -1,18 +1,25 @@
 """Health probe endpoints for the FastAPI Template application."""
 
+from typing import Optional
+
 from fastapi import APIRouter
 from fastapi.responses import JSONResponse
 
-from ..utils import settings
+from ..utils.graceful_shutdown import GracefulShutdown
+from ..utils.runtime_config import RuntimeConfig
 
-health_router = APIRouter()
 
+def create_health_router(config: RuntimeConfig, graceful_shutdown: Optional[GracefulShutdown] = None) -> APIRouter:
+    health_router = APIRouter()
 
-@health_router.get(settings.PROBE_LIVENESS_PATH)
-def liveness_probe() -> JSONResponse:
-    return JSONResponse(content={"status": "OK"}, status_code=200)
+    @health_router.get(config.settings.PROBE_LIVENESS_PATH)
+    def liveness_probe() -> dict:
+        return {"status": "OK"}
 
+    @health_router.get(config.settings.PROBE_READINESS_PATH)
+    def readiness_probe():
+        if graceful_shutdown is not None and graceful_shutdown.draining:
+            return JSONResponse({"status": "Draining"}, status_code=503)
+        return {"status": "OK"}
 
-@health_router.get(settings.PROBE_READINESS_PATH)
-def readiness_probe() -> JSONResponse:
-    return JSONResponse(content={"status": "OK"}, status_code=200)
+    return health_router
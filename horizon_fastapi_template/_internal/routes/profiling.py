@@ -0,0 +1,95 @@
+"""On-demand profiling endpoints for the FastAPI Template application."""
+
+import asyncio
+import hmac
+import threading
+from typing import Callable, Literal, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+
+from ..utils.profiler import TracemallocSession, dump_tasks, sample_stacks, to_collapsed, to_speedscope
+from ..utils.runtime_config import RuntimeConfig
+
+PROFILING_TOKEN_HEADER = "X-Profiling-Token"
+
+# process wide, whichever application the request reached
+_cpu_profile_lock = threading.Lock()
+_tracemalloc = TracemallocSession()
+
+
+def create_token_check(config: RuntimeConfig) -> Callable[..., None]:
+    """Dependency refusing requests without ``PROFILING_TOKEN`` in the ``X-Profiling-Token`` header."""
+
+    token = config.settings.PROFILING_TOKEN
+
+    def require_token(x_profiling_token: Optional[str] = Header(default=None)) -> None:
+        if not token:
+            raise HTTPException(status_code=403, detail="Profiling token is not configured")
+        # compared as bytes, compare_digest refuses str holding non-ASCII characters
+        if x_profiling_token is None or not hmac.compare_digest(x_profiling_token.encode(), token.encode()):
+            raise HTTPException(status_code=403, detail="Invalid profiling token")
+
+    return require_token
+
+
+def create_profiling_router(config: RuntimeConfig) -> APIRouter:
+    app_name = config.settings.APP_NAME
+    profiling_router = APIRouter(
+        prefix=config.settings.PROFILING_PATH, dependencies=[Depends(create_token_check(config))]
+    )
+
+    @profiling_router.get("/profile/cpu")
+    async def cpu_profile(
+        seconds: float = Query(default=5.0, gt=0, le=config.settings.PROFILING_MAX_SECONDS),
+        interval_ms: float = Query(default=5.0, ge=1, le=1000),
+        format: Literal["collapsed", "speedscope"] = "collapsed",
+    ) -> Response:
+        if not _cpu_profile_lock.acquire(blocking=False):
+            raise HTTPException(status_code=409, detail="A CPU profile is already running")
+
+        interval = interval_ms / 1000
+        try:
+            samples = await asyncio.to_thread(sample_stacks, seconds, interval)
+        finally:
+            _cpu_profile_lock.release()
+
+        if format == "speedscope":
+            return JSONResponse(content=to_speedscope(samples, interval, name=f"{app_name} cpu"))
+        return PlainTextResponse(to_collapsed(samples))
+
+    @profiling_router.get("/tasks")
+    async def asyncio_tasks(stack_limit: Optional[int] = Query(default=None, gt=0)) -> JSONResponse:
+        return JSONResponse(content=dump_tasks(limit=stack_limit))
+
+    @profiling_router.post("/tracemalloc/start")
+    def tracemalloc_start(frames: int = Query(default=1, ge=1, le=100)) -> JSONResponse:
+        _tracemalloc.start(frames)
+        return JSONResponse(content={"status": "tracing"})
+
+    @profiling_router.post("/tracemalloc/stop")
+    def tracemalloc_stop() -> JSONResponse:
+        _tracemalloc.stop()
+        return JSONResponse(content={"status": "stopped"})
+
+    @profiling_router.get("/tracemalloc/snapshot")
+    def tracemalloc_snapshot(
+        limit: int = Query(default=20, gt=0, le=500),
+        group_by: Literal["lineno", "filename", "traceback"] = "lineno",
+    ) -> JSONResponse:
+        try:
+            return JSONResponse(content=_tracemalloc.snapshot(limit, group_by))
+        except RuntimeError as exc:
+            raise HTTPException(status_code=409, detail=str(exc)) from exc
+
+    @profiling_router.get("/tracemalloc/diff")
+    def tracemalloc_diff(
+        limit: int = Query(default=20, gt=0, le=500),
+        group_by: Literal["lineno", "filename", "traceback"] = "lineno",
+    ) -> JSONResponse:
+        try:
+            return JSONResponse(content=_tracemalloc.diff(limit, group_by))
+        except RuntimeError as exc:
+            raise HTTPException(status_code=409, detail=str(exc)) from exc
+
+    return profiling_router
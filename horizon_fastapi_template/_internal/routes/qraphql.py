@@ -1,22 +1,64 @@
+from datetime import timedelta
 from pathlib import Path
 
 import strawberry
 from fastapi import APIRouter, HTTPException
 from starlette.responses import FileResponse
-from strawberry.fastapi import GraphQLRouter
+from strawberry.extensions import ParserCache, ValidationCache
 
+from .api_route import TemplateAPIRoute
+from ..gql import ResolverMetricsExtension, TracingExtension, with_extensions
+from ..gql.limits import query_limits_extension
+from ..gql.router import TemplateGraphQLRouter
 from ..models.graphql import GraphQLVersion
 
 def create_graphql_router(
         version: GraphQLVersion,
-        static_files_path: Path
+        static_files_path: Path,
+        enable_tracing: bool = False,
 ) -> APIRouter:
 
-    graphql_app = GraphQLRouter(
-        version.graphql_schema,
+    # the user's schema may be shared by several versions or apps, it is not modified
+    extensions = []
+
+    if enable_tracing:
+        extensions.append(TracingExtension)
+
+    limits = query_limits_extension(version.max_depth, version.max_complexity, version.max_aliases)
+    if limits is not None:
+        # prebuilt rule classes keep the validation cache key stable between requests
+        extensions.append(limits)
+
+    if version.resolver_metrics:
+        extensions.append(
+            ResolverMetricsExtension.factory(
+                version.version,
+                max_fields=version.resolver_metrics_max_fields,
+                slow_operation_threshold=version.slow_query_threshold,
+            )
+        )
+
+    if version.document_cache_size:
+        size = version.document_cache_size
+        extensions.append(lambda: ParserCache(maxsize=size))
+        extensions.append(lambda: ValidationCache(maxsize=size))
+
+    graphql_app = TemplateGraphQLRouter(
+        with_extensions(version.graphql_schema, extensions),
         prefix=f"/graphql/{version.version}",
         context_getter=version.context_getter,
-        graphiql=False
+        graphql_ide=None,
+        route_class=TemplateAPIRoute,
+        subscription_protocols=tuple(version.subscription_protocols),
+        connection_init_wait_timeout=timedelta(seconds=version.connection_init_wait_timeout),
+        max_subscriptions_per_connection=version.max_subscriptions_per_connection,
+        keep_alive=version.subscription_keep_alive_interval is not None,
+        keep_alive_interval=version.subscription_keep_alive_interval or 1,
+        version_name=version.version,
+        persisted_queries_size=version.persisted_queries_size if version.persisted_queries else None,
+        result_cache_size=version.result_cache_size,
+        result_cache_ttl=version.result_cache_ttl,
+        cacheable_operations=frozenset(version.cacheable_operations),
     )
 
     # Define paths
@@ -3,27 +3,31 @@
 from fastapi import APIRouter
 from fastapi.openapi.docs import get_redoc_html, get_swagger_ui_html
 
-from ..utils import settings
+from ..utils.runtime_config import RuntimeConfig
 
-router = APIRouter(include_in_schema=False)
 
+def create_swagger_router(config: RuntimeConfig) -> APIRouter:
+    router = APIRouter(include_in_schema=False)
+    static_files = config.swagger_static_files
+    openapi_url = config.swagger_openapi_json_url
 
-@router.get("/docs", include_in_schema=False)
-async def custom_swagger_ui_html():
-    return get_swagger_ui_html(
-        title="Swagger UI",
-        swagger_js_url=f"{settings.SWAGGER_STATIC_FILES}/swagger-ui-bundle.js",
-        swagger_css_url=f"{settings.SWAGGER_STATIC_FILES}/swagger-ui.css",
-        swagger_favicon_url=f"{settings.SWAGGER_STATIC_FILES}/favicon.ico",
-        openapi_url=settings.SWAGGER_OPENAPI_JSON_URL,
-    )
+    @router.get("/docs", include_in_schema=False)
+    async def custom_swagger_ui_html():
+        return get_swagger_ui_html(
+            title="Swagger UI",
+            swagger_js_url=f"{static_files}/swagger-ui-bundle.js",
+            swagger_css_url=f"{static_files}/swagger-ui.css",
+            swagger_favicon_url=f"{static_files}/favicon.ico",
+            openapi_url=openapi_url,
+        )
 
+    @router.get("/redoc", include_in_schema=False)
+    async def redoc_html():
+        return get_redoc_html(
+            title="ReDoc",
+            redoc_js_url=f"{static_files}/redoc.standalone.js",
+            redoc_favicon_url=f"{static_files}/favicon.ico",
+            openapi_url=openapi_url,
+        )
 
-@router.get("/redoc", include_in_schema=False)
-async def redoc_html():
-    return get_redoc_html(
-        title="ReDoc",
-        redoc_js_url=f"{settings.SWAGGER_STATIC_FILES}/redoc.standalone.js",
-        redoc_favicon_url=f"{settings.SWAGGER_STATIC_FILES}/favicon.ico",
-        openapi_url=settings.SWAGGER_OPENAPI_JSON_URL,
-    )
+    return router
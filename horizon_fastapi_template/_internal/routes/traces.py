@@ -0,0 +1,22 @@
+"""Endpoint exposing buffered request traces for the FastAPI Template application."""
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+
+from .profiling import create_token_check
+from ..utils.runtime_config import RuntimeConfig
+from ..utils.tracing import Tracer, to_otlp
+
+
+def create_traces_router(config: RuntimeConfig, tracer: Tracer) -> APIRouter:
+    # spans carry paths, statuses and timings, guarded like the profiling endpoints
+    traces_router = APIRouter(dependencies=[Depends(create_token_check(config))])
+    app_name = config.settings.APP_NAME
+
+    @traces_router.get(config.settings.TRACES_PATH)
+    def traces(limit: Optional[int] = None) -> JSONResponse:
+        return JSONResponse(content=to_otlp(tracer.traces(limit=limit), app_name))
+
+    return traces_router
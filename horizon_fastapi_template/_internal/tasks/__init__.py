@@ -2,15 +2,50 @@
 
 from __future__ import annotations
 
+import functools
 from collections.abc import Callable, Coroutine
+from typing import Optional, Sequence
 
+from .config_reload import watch_config
+from .job_queue import JobQueue
+from .leader_election import LeaderElector
+from .trace_export import export_traces
 from .uptime import update_uptime
+from ..utils.runtime_config import LiveConfig, RuntimeConfig
+from ..utils.tracing import Tracer
 
 
-def get_tasks(*, enable_uptime_background_task: bool = True) -> list[Callable[[], Coroutine]]:
+def get_tasks(
+    config: RuntimeConfig,
+    *,
+    enable_uptime_background_task: bool = True,
+    tracer: Optional[Tracer] = None,
+    live_config: Optional[LiveConfig] = None,
+    leader_elector: Optional[LeaderElector] = None,
+    leader_tasks: Sequence[Callable[[], Coroutine]] = (),
+    job_queue: Optional[JobQueue] = None,
+) -> list[Callable[[], Coroutine]]:
     tasks: list[Callable[[], Coroutine]] = []
 
     if enable_uptime_background_task:
         tasks.append(update_uptime)
 
+    if tracer is not None and config.settings.TRACE_EXPORT_FILE:
+        tasks.append(functools.partial(export_traces, config, tracer))
+
+    if live_config is not None:
+        tasks.append(functools.partial(
+            watch_config,
+            live_config,
+            config.settings.CONFIG_RELOAD_FILE,
+            config.settings.CONFIG_RELOAD_INTERVAL,
+        ))
+
+    if leader_elector is not None:
+        tasks.append(leader_elector.run)
+        tasks.extend(leader_elector.leader_only(task) for task in leader_tasks)
+
+    if job_queue is not None:
+        tasks.append(job_queue.run)
+
     return tasks
@@ -0,0 +1,120 @@
+"""Background task reloading the live configuration when the settings file changes."""
+
+import asyncio
+import os
+from typing import Any, AsyncIterator, Dict, Optional, Tuple, Type
+
+from loguru import logger
+from prometheus_client import Counter, Gauge
+from pydantic import ValidationError
+from pydantic_settings import DotEnvSettingsSource, SettingsError
+
+from ..utils.config import ApplicationSettings
+from ..utils.runtime_config import LiveConfig, RuntimeConfig
+
+try:
+    import watchfiles
+except ImportError:  # pragma: no cover - depends on the installed extras
+    watchfiles = None
+
+__all__ = ["CONFIG_GENERATION", "CONFIG_RELOADS", "reload_config", "watch_config"]
+
+CONFIG_GENERATION = Gauge(
+    "app_config_generation",
+    "Generation of the live configuration, bumped by every applied reload",
+    ["app"],
+)
+CONFIG_RELOADS = Counter(
+    "app_config_reloads_total",
+    "Configuration reloads by result: applied, unchanged or invalid",
+    ["result"],
+)
+
+
+def _stat(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+async def _poll_changes(path: str, interval: float) -> AsyncIterator[None]:
+    last = _stat(path)
+    while True:
+        await asyncio.sleep(interval)
+        current = _stat(path)
+        if current != last:
+            last = current
+            yield
+
+
+async def _notify_changes(path: str) -> AsyncIterator[None]:
+    # the directory is watched, editors and config maps replace files rather than write them
+    target = os.path.abspath(path)
+    async for _ in watchfiles.awatch(
+        os.path.dirname(target),
+        recursive=False,
+        watch_filter=lambda change, changed: os.path.abspath(changed) == target,
+    ):
+        yield
+
+
+def _file_values(settings_class: Type[ApplicationSettings], path: str) -> Dict[str, Any]:
+    values = DotEnvSettingsSource(settings_class, env_file=path)()
+    return {name: value for name, value in values.items() if name in settings_class.model_fields}
+
+
+def reload_config(live_config: LiveConfig, path: str) -> bool:
+    """Overlay the settings edited in ``path`` on the live ones, and swap them in if they changed.
+
+    Only the settings whose value in the file changed since ``live_config.file_values``
+    was read are applied; the others keep their current value, so those passed
+    explicitly to ``general_create_app`` or read from the environment still win over
+    the lines of the file nobody touched.
+    """
+
+    current = live_config.config.settings
+    settings_class = type(current)
+    try:
+        values = _file_values(settings_class, path)
+        overlay = {
+            name: value
+            for name, value in values.items()
+            if name not in live_config.file_values or live_config.file_values[name] != value
+        }
+        settings: ApplicationSettings = settings_class.model_validate({**dict(current), **overlay})
+    except (SettingsError, ValidationError) as exc:
+        CONFIG_RELOADS.labels("invalid").inc()
+        logger.error(f"Configuration in {path} is invalid, keeping the current one: {exc}")
+        return False
+    live_config.file_values = values
+
+    changed = [name for name in settings_class.model_fields if getattr(settings, name) != getattr(current, name)]
+    if not changed:
+        CONFIG_RELOADS.labels("unchanged").inc()
+        return False
+
+    generation = live_config.swap(RuntimeConfig.from_settings(settings))
+    CONFIG_RELOADS.labels("applied").inc()
+    # names only, values may be secrets
+    logger.info(f"Configuration reloaded from {path} (generation {generation}), changed: {', '.join(changed)}")
+    return True
+
+
+async def watch_config(live_config: LiveConfig, path: str, interval: float = 2.0) -> None:
+    """Reload ``live_config`` on every change of ``path``, watched with inotify (through
+    ``watchfiles``) when installed and by polling its mtime every ``interval`` seconds otherwise."""
+
+    generation = CONFIG_GENERATION.labels(live_config.config.settings.APP_NAME)
+    generation.set(live_config.generation)
+    try:
+        # the file as read at startup, only later edits are applied
+        live_config.file_values = _file_values(type(live_config.config.settings), path)
+    except SettingsError:
+        pass
+
+    changes = _notify_changes(path) if watchfiles is not None else _poll_changes(path, interval)
+    async for _ in changes:
+        reload_config(live_config, path)
+        generation.set(live_config.generation)
@@ -0,0 +1,418 @@
+"""In-process job queue running slow work triggered by requests in the background.
+
+Handlers are registered by name with :meth:`JobQueue.job` and enqueued with
+:meth:`JobQueue.enqueue`, which returns as soon as the job is queued. :meth:`JobQueue.run`
+is started by the ``general_create_app`` lifespan and runs the jobs on ``concurrency``
+workers, retrying failed ones before moving them to the dead letters.
+"""
+
+import asyncio
+import json
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, Callable, Coroutine, Dict, List, Optional, Set, Union
+
+from fastapi import Request
+from loguru import logger
+from prometheus_client import Counter, Gauge, Histogram
+
+from ..utils.config import ApplicationSettings
+
+__all__ = [
+    "JOB_DURATION",
+    "JOB_QUEUE_DEPTH",
+    "JOB_WAIT",
+    "JOBS",
+    "JOBS_DEAD",
+    "JOBS_RUNNING",
+    "Job",
+    "JobQueue",
+    "JobStore",
+    "SQLiteJobStore",
+    "get_job_queue",
+]
+
+JOB_QUEUE_DEPTH = Gauge(
+    "app_job_queue_depth",
+    "Jobs waiting to run, including failed ones waiting for their retry",
+    ["queue"],
+)
+JOBS_RUNNING = Gauge(
+    "app_jobs_running",
+    "Jobs currently running",
+    ["queue"],
+)
+JOBS_DEAD = Gauge(
+    "app_jobs_dead",
+    "Jobs moved to the dead letters after exhausting their retries",
+    ["queue"],
+)
+JOB_WAIT = Histogram(
+    "app_job_wait_seconds",
+    "Seconds a job waited between being due (enqueued or retry time) and starting",
+    ["queue", "job"],
+)
+JOB_DURATION = Histogram(
+    "app_job_duration_seconds",
+    "Seconds spent running each job attempt",
+    ["queue", "job"],
+)
+JOBS = Counter(
+    "app_jobs_total",
+    "Job attempts by result: succeeded, retried or dead",
+    ["queue", "job", "result"],
+)
+
+MAX_RETRY_DELAY = 300.0
+
+JobHandler = Callable[..., Coroutine]
+
+
+@dataclass
+class Job:
+    id: str
+    name: str
+    args: List[Any] = field(default_factory=list)
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    attempts: int = 0
+    enqueued_at: float = field(default_factory=time.time)
+    # when the job is due, later than enqueued_at once it waits for a retry
+    run_at: float = field(default_factory=time.time)
+    dead: bool = False
+    error: Optional[str] = None
+
+
+class JobStore(ABC):
+    """Persistence of the queued and dead jobs, read back when the queue starts."""
+
+    @abstractmethod
+    async def save(self, job: Job) -> None:
+        """Insert or update ``job``."""
+
+    @abstractmethod
+    async def delete(self, job_id: str) -> None:
+        ...
+
+    @abstractmethod
+    async def load(self) -> List[Job]:
+        """Return every stored job, dead ones included, oldest first."""
+
+    async def close(self) -> None:
+        pass
+
+
+class SQLiteJobStore(JobStore):
+    """Jobs kept in a SQLite database at ``path``, so they survive restarts.
+
+    Arguments are stored as JSON and must be serializable. A job is deleted once it
+    succeeded, so one interrupted by a shutdown runs again on the next start.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, name TEXT NOT NULL, payload TEXT NOT NULL, attempts INTEGER NOT NULL, "
+            "enqueued_at REAL NOT NULL, run_at REAL NOT NULL, dead INTEGER NOT NULL, error TEXT)"
+        )
+        return connection
+
+    def _execute(self, query: str, parameters: tuple = ()) -> List[tuple]:
+        with self._lock:
+            if self._connection is None:
+                self._connection = self._connect()
+            return self._connection.execute(query, parameters).fetchall()
+
+    async def save(self, job: Job) -> None:
+        payload = json.dumps({"args": job.args, "kwargs": job.kwargs})
+        await asyncio.to_thread(
+            self._execute,
+            "INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (job.id, job.name, payload, job.attempts, job.enqueued_at, job.run_at, int(job.dead), job.error),
+        )
+
+    async def delete(self, job_id: str) -> None:
+        await asyncio.to_thread(self._execute, "DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    async def load(self) -> List[Job]:
+        rows = await asyncio.to_thread(
+            self._execute,
+            "SELECT id, name, payload, attempts, enqueued_at, run_at, dead, error FROM jobs ORDER BY enqueued_at",
+        )
+        jobs = []
+        for job_id, name, payload, attempts, enqueued_at, run_at, dead, error in rows:
+            arguments = json.loads(payload)
+            jobs.append(Job(job_id, name, arguments["args"], arguments["kwargs"], attempts, enqueued_at, run_at,
+                            bool(dead), error))
+        return jobs
+
+    async def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+class JobQueue:
+    """Queue of jobs run in the background by ``concurrency`` worker coroutines.
+
+    A job whose handler raises, or runs longer than ``timeout`` seconds, is attempted
+    again up to ``max_retries`` times with jittered exponential backoff starting at
+    ``retry_delay`` seconds. It is then kept in :attr:`dead_letters` until
+    :meth:`requeue_dead` gives it another chance. Without a ``store`` the jobs live in
+    memory only and are lost when the process stops.
+    """
+
+    def __init__(
+        self,
+        name: str = "default",
+        *,
+        concurrency: int = 4,
+        max_retries: int = 3,
+        retry_delay: float = 1.0,
+        timeout: Optional[float] = None,
+        store: Optional[JobStore] = None,
+    ) -> None:
+        if concurrency < 1:
+            raise ValueError("A job queue needs at least one worker.")
+
+        self.name = name
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.timeout = timeout
+        self.store = store
+        self.dead_letters: List[Job] = []
+        self._handlers: Dict[str, JobHandler] = {}
+        # created in the running loop, the queue is usually built at import time
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ready: Optional["asyncio.Queue[Job]"] = None
+        self._idle: Optional[asyncio.Event] = None
+        # ids of the jobs queued, waiting for a retry or running
+        self._unfinished: Set[str] = set()
+        # jobs waiting for their retry, by timer
+        self._retries: Dict[asyncio.TimerHandle, Job] = {}
+        self._depth = JOB_QUEUE_DEPTH.labels(name)
+        self._running = JOBS_RUNNING.labels(name)
+        self._dead = JOBS_DEAD.labels(name)
+        self._depth.set(0)
+        self._running.set(0)
+        self._dead.set(0)
+
+    @classmethod
+    def from_settings(cls, settings: ApplicationSettings, name: str = "default") -> "JobQueue":
+        return cls(
+            name,
+            concurrency=settings.JOB_QUEUE_CONCURRENCY,
+            max_retries=settings.JOB_QUEUE_MAX_RETRIES,
+            retry_delay=settings.JOB_QUEUE_RETRY_DELAY,
+            timeout=settings.JOB_QUEUE_TIMEOUT,
+            store=SQLiteJobStore(settings.JOB_QUEUE_DATABASE) if settings.JOB_QUEUE_DATABASE else None,
+        )
+
+    def job(self, func: Optional[JobHandler] = None, *, name: Optional[str] = None) -> Any:
+        """Register an async function as the handler of the jobs called ``name``.
+
+        ``name`` defaults to the function's qualified name. Use as ``@queue.job`` or
+        ``@queue.job(name="sync-users")``; the function is returned unchanged.
+        """
+
+        def register(handler: JobHandler) -> JobHandler:
+            job_name = name or handler.__qualname__
+            if job_name in self._handlers:
+                raise ValueError(f"A handler is already registered for the job '{job_name}'.")
+            self._handlers[job_name] = handler
+            return handler
+
+        return register(func) if func is not None else register
+
+    def _handler_name(self, job: Union[str, JobHandler]) -> str:
+        if isinstance(job, str):
+            return job
+        for name, handler in self._handlers.items():
+            if handler is job:
+                return name
+        raise ValueError(f"{job!r} is not a registered job handler.")
+
+    async def enqueue(self, job: Union[str, JobHandler], *args: Any, **kwargs: Any) -> Job:
+        """Queue a run of the handler ``job``, given by name or function, and return at once."""
+
+        queued = Job(uuid.uuid4().hex, self._handler_name(job), list(args), kwargs)
+        if self.store is not None:
+            await self.store.save(queued)
+        self._push(queued)
+        return queued
+
+    def _bind(self) -> None:
+        """Create the queue and its idle event in the running loop, keeping the queued jobs."""
+
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        pending = []
+        while self._ready is not None and not self._ready.empty():
+            pending.append(self._ready.get_nowait())
+        self._loop = loop
+        self._ready = asyncio.Queue()
+        for job in pending:
+            self._ready.put_nowait(job)
+        self._idle = asyncio.Event()
+        if not self._unfinished:
+            self._idle.set()
+
+    def _push(self, job: Job) -> None:
+        self._bind()
+        self._unfinished.add(job.id)
+        self._idle.clear()
+        self._ready.put_nowait(job)
+        self._depth.inc()
+
+    def _finish(self, job: Job) -> None:
+        self._unfinished.discard(job.id)
+        if not self._unfinished and self._idle is not None:
+            self._idle.set()
+
+    def _schedule_retry(self, job: Job, delay: float) -> None:
+        def due() -> None:
+            del self._retries[handle]
+            self._ready.put_nowait(job)
+
+        handle = asyncio.get_running_loop().call_later(delay, due)
+        self._retries[handle] = job
+
+    @property
+    def depth(self) -> int:
+        """Jobs waiting to run, including failed ones waiting for their retry."""
+
+        return (self._ready.qsize() if self._ready is not None else 0) + len(self._retries)
+
+    async def join(self) -> None:
+        """Wait until every queued job succeeded or is dead."""
+
+        self._bind()
+        await self._idle.wait()
+
+    async def requeue_dead(self, job_id: Optional[str] = None) -> int:
+        """Queue the dead job ``job_id``, or every dead job, again with fresh retries."""
+
+        requeued = [job for job in self.dead_letters if job_id is None or job.id == job_id]
+        for job in requeued:
+            self.dead_letters.remove(job)
+            job.attempts, job.dead, job.error, job.run_at = 0, False, None, time.time()
+            if self.store is not None:
+                await self.store.save(job)
+            self._push(job)
+        self._dead.set(len(self.dead_letters))
+        return len(requeued)
+
+    async def _restore(self) -> None:
+        for job in await self.store.load():
+            if job.id in self._unfinished or any(dead.id == job.id for dead in self.dead_letters):
+                continue
+            if job.dead:
+                self.dead_letters.append(job)
+                continue
+            self._push(job)
+        self._dead.set(len(self.dead_letters))
+
+    async def _attempt(self, job: Job) -> None:
+        handler = self._handlers.get(job.name)
+        if handler is None:
+            raise LookupError(f"No handler is registered for the job '{job.name}'.")
+        if self.timeout is None:
+            await handler(*job.args, **job.kwargs)
+        else:
+            await asyncio.wait_for(handler(*job.args, **job.kwargs), self.timeout)
+
+    async def _failed(self, job: Job, exc: BaseException) -> None:
+        job.error = f"{type(exc).__name__}: {exc}"
+        if job.attempts <= self.max_retries:
+            delay = min(self.retry_delay * 2 ** (job.attempts - 1), MAX_RETRY_DELAY) * random.uniform(0.5, 1.0)
+            job.run_at = time.time() + delay
+            JOBS.labels(self.name, job.name, "retried").inc()
+            logger.warning(f"Job {job.name} ({job.id}) failed, attempt {job.attempts}, retrying in {delay:.1f}s: {job.error}")
+            if self.store is not None:
+                await self.store.save(job)
+            self._depth.inc()
+            self._schedule_retry(job, delay)
+            return
+
+        job.dead = True
+        self.dead_letters.append(job)
+        self._dead.set(len(self.dead_letters))
+        JOBS.labels(self.name, job.name, "dead").inc()
+        logger.error(f"Job {job.name} ({job.id}) is dead after {job.attempts} attempts: {job.error}")
+        if self.store is not None:
+            await self.store.save(job)
+        self._finish(job)
+
+    async def _work(self) -> None:
+        while True:
+            job = await self._ready.get()
+            self._depth.dec()
+            JOB_WAIT.labels(self.name, job.name).observe(max(0.0, time.time() - job.run_at))
+            job.attempts += 1
+            self._running.inc()
+            start = time.perf_counter()
+            try:
+                await self._attempt(job)
+            except asyncio.CancelledError:
+                # interrupted by the shutdown, the attempt does not count and the job
+                # runs again on the next start
+                job.attempts -= 1
+                self._ready.put_nowait(job)
+                self._depth.inc()
+                raise
+            except Exception as exc:
+                await self._failed(job, exc)
+            else:
+                JOBS.labels(self.name, job.name, "succeeded").inc()
+                if self.store is not None:
+                    await self.store.delete(job.id)
+                self._finish(job)
+            finally:
+                JOB_DURATION.labels(self.name, job.name).observe(time.perf_counter() - start)
+                self._running.dec()
+
+    async def run(self) -> None:
+        """Restore the stored jobs and run the workers until cancelled."""
+
+        self._bind()
+        if self.store is not None:
+            # join() waits for the stored jobs too
+            self._idle.clear()
+            await self._restore()
+            if not self._unfinished:
+                self._idle.set()
+
+        workers = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            # retries wait no longer, so a restart of the queue runs them at once
+            for handle, job in self._retries.items():
+                handle.cancel()
+                self._ready.put_nowait(job)
+            self._retries.clear()
+            if self.store is not None:
+                await self.store.close()
+
+
+def get_job_queue(request: Request) -> JobQueue:
+    """Dependency returning the application's job queue, ``app.state.job_queue``."""
+
+    return request.app.state.job_queue
@@ -0,0 +1,403 @@
+"""Leader election running background tasks on a single replica at a time."""
+
+import asyncio
+import functools
+import os
+import socket
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Any, Callable, Coroutine, Optional, Tuple
+
+from loguru import logger
+from prometheus_client import Counter, Gauge
+
+from ..database.kube_client import _raise_for_status, get_dynamic_client
+from ..utils.config import ApplicationSettings
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+__all__ = [
+    "FileLockBackend",
+    "KubeLeaseBackend",
+    "LEADER",
+    "LEADER_ELECTION_BACKENDS",
+    "LEADER_TRANSITIONS",
+    "LeaderElector",
+    "LeaseBackend",
+]
+
+LEADER = Gauge(
+    "app_leader",
+    "Whether this process currently holds the leader lease (1) or not (0)",
+    ["lock"],
+)
+LEADER_TRANSITIONS = Counter(
+    "app_leader_transitions_total",
+    "Leadership changes of this process by event: acquired, lost or released",
+    ["lock", "event"],
+)
+
+LEADER_ELECTION_BACKENDS = ("file", "kube")
+
+_SERVICE_ACCOUNT_NAMESPACE = "/var/run/secrets/kubernetes.io/serviceaccount/namespace"
+
+
+def _default_identity() -> str:
+    return f"{socket.gethostname()}_{os.getpid()}"
+
+
+class LeaseBackend(ABC):
+    """Storage of a lease held by at most one identity at a time."""
+
+    name: str
+
+    @abstractmethod
+    async def acquire(self, identity: str, lease_duration: float) -> bool:
+        """Acquire the lease for ``identity``, or renew it if already held, and tell whether it is held."""
+
+    @abstractmethod
+    async def release(self, identity: str) -> None:
+        """Give the lease up so another identity can take it without waiting for it to expire."""
+
+
+class FileLockBackend(LeaseBackend):
+    """Lease held as an exclusive ``flock`` on ``path``, for processes sharing a host.
+
+    The operating system drops the lock when the holding process exits, so a crashed
+    leader is replaced on the next attempt of another process.
+    """
+
+    def __init__(self, path: str) -> None:
+        if fcntl is None:
+            raise RuntimeError("FileLockBackend needs fcntl, which is not available on this platform.")
+
+        self.path = path
+        self.name = os.path.basename(path)
+        self._fd: Optional[int] = None
+
+    async def acquire(self, identity: str, lease_duration: float) -> bool:
+        if self._fd is not None:
+            return True
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+
+        # informative only, the lock is what counts
+        os.ftruncate(fd, 0)
+        os.write(fd, identity.encode())
+        self._fd = fd
+        return True
+
+    async def release(self, identity: str) -> None:
+        if self._fd is None:
+            return
+        fd, self._fd = self._fd, None
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+class KubeLeaseBackend(LeaseBackend):
+    """Lease stored in a ``coordination.k8s.io/v1`` Lease object.
+
+    Updates carry the ``resourceVersion`` they were based on, so of two replicas racing
+    for the lease only one write succeeds. Expiry is measured from when this process
+    last saw the lease change rather than from its ``renewTime``, so clock skew between
+    nodes does not matter. ``dynamic_client`` defaults to :func:`get_dynamic_client`,
+    with the in-cluster configuration when running in a pod.
+    """
+
+    def __init__(self, name: str, namespace: Optional[str] = None, *, dynamic_client: Any = None) -> None:
+        self.name = name
+        self.namespace = namespace or self._pod_namespace()
+        self._client = dynamic_client
+        self._resource: Any = None
+        # (holder, renew time, duration) of the lease and when it was first seen
+        self._observed: Optional[Tuple[Any, ...]] = None
+        self._observed_at = 0.0
+
+    @staticmethod
+    def _pod_namespace() -> str:
+        try:
+            with open(_SERVICE_ACCOUNT_NAMESPACE) as file:
+                return file.read().strip()
+        except OSError:
+            return "default"
+
+    async def _lease_resource(self) -> Tuple[Any, Any]:
+        if self._client is None:
+            self._client = await get_dynamic_client(in_cluster="KUBERNETES_SERVICE_HOST" in os.environ)
+        if self._resource is None:
+            self._resource = await self._client.resources.get(api_version="coordination.k8s.io/v1", kind="Lease")
+        return self._client, self._resource
+
+    async def _read(self) -> Optional[dict]:
+        client, resource = await self._lease_resource()
+        response = await client.get(resource, name=self.name, namespace=self.namespace, serialize=False)
+        if response.status == 404:
+            response.release()
+            return None
+        await _raise_for_status(response)
+        return await response.json()
+
+    async def _write(self, pending: Coroutine) -> bool:
+        response = await pending
+        if response.status == 409:
+            # another replica updated the lease since it was read
+            response.release()
+            return False
+        await _raise_for_status(response)
+        response.release()
+        return True
+
+    async def acquire(self, identity: str, lease_duration: float) -> bool:
+        client, resource = await self._lease_resource()
+        now = _micro_time()
+        lease = await self._read()
+
+        if lease is None:
+            body = {
+                "apiVersion": "coordination.k8s.io/v1",
+                "kind": "Lease",
+                "metadata": {"name": self.name, "namespace": self.namespace},
+                "spec": {
+                    "holderIdentity": identity,
+                    "leaseDurationSeconds": max(1, round(lease_duration)),
+                    "acquireTime": now,
+                    "renewTime": now,
+                    "leaseTransitions": 0,
+                },
+            }
+            return await self._write(client.create(resource, body=body, namespace=self.namespace, serialize=False))
+
+        spec = lease.get("spec") or {}
+        holder = spec.get("holderIdentity")
+        record = (holder, spec.get("renewTime"), spec.get("leaseDurationSeconds"))
+        if record != self._observed:
+            self._observed, self._observed_at = record, time.monotonic()
+        if holder and holder != identity:
+            if time.monotonic() - self._observed_at < (spec.get("leaseDurationSeconds") or lease_duration):
+                return False
+
+        transitions = spec.get("leaseTransitions") or 0
+        lease["spec"] = {
+            **spec,
+            "holderIdentity": identity,
+            "leaseDurationSeconds": max(1, round(lease_duration)),
+            "acquireTime": spec.get("acquireTime") if holder == identity else now,
+            "renewTime": now,
+            "leaseTransitions": transitions if holder == identity else transitions + 1,
+        }
+        return await self._write(client.replace(resource, body=lease, namespace=self.namespace, serialize=False))
+
+    async def release(self, identity: str) -> None:
+        client, resource = await self._lease_resource()
+        lease = await self._read()
+        if lease is None or (lease.get("spec") or {}).get("holderIdentity") != identity:
+            return
+
+        lease["spec"] = {**lease["spec"], "holderIdentity": None, "leaseDurationSeconds": 1, "renewTime": _micro_time()}
+        await self._write(client.replace(resource, body=lease, namespace=self.namespace, serialize=False))
+
+
+def _micro_time() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+class LeaderElector:
+    """Elect one leader among the processes sharing ``backend``.
+
+    :meth:`run` attempts to take the lease every ``retry_period`` seconds and, once
+    leader, renews it at the same pace. A leader that cannot renew for
+    ``renew_deadline`` seconds steps down, which must be shorter than
+    ``lease_duration`` so it stops before another process may take over. Tasks wrapped
+    with :meth:`leader_only` start when this process becomes leader and are cancelled
+    when it steps down. The lease is released when :meth:`run` is cancelled, so the
+    next leader is elected within ``retry_period`` on a graceful shutdown.
+    """
+
+    def __init__(
+        self,
+        backend: LeaseBackend,
+        *,
+        identity: Optional[str] = None,
+        lease_duration: float = 15.0,
+        renew_deadline: float = 10.0,
+        retry_period: float = 2.0,
+    ) -> None:
+        if not retry_period < renew_deadline < lease_duration:
+            raise ValueError("Leader election needs retry_period < renew_deadline < lease_duration.")
+
+        self.backend = backend
+        self.identity = identity or _default_identity()
+        self.lease_duration = lease_duration
+        self.renew_deadline = renew_deadline
+        self.retry_period = retry_period
+        self._leader = False
+        # created in the running loop, the elector is built with the application
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._leading: Optional[asyncio.Event] = None
+        self._following: Optional[asyncio.Event] = None
+        self._renewed_at = 0.0
+        self._stepped_down = False
+        self._gauge = LEADER.labels(backend.name)
+        self._gauge.set(0)
+
+    @classmethod
+    def from_settings(cls, settings: ApplicationSettings) -> "LeaderElector":
+        if settings.LEADER_ELECTION_BACKEND not in LEADER_ELECTION_BACKENDS:
+            raise ValueError(
+                f"Invalid leader election backend '{settings.LEADER_ELECTION_BACKEND}', "
+                f"expected one of {', '.join(LEADER_ELECTION_BACKENDS)}."
+            )
+
+        name = settings.LEADER_ELECTION_NAME or f"{settings.APP_NAME.lower()}-leader"
+        if settings.LEADER_ELECTION_BACKEND == "kube":
+            backend: LeaseBackend = KubeLeaseBackend(name, settings.LEADER_ELECTION_NAMESPACE)
+        else:
+            backend = FileLockBackend(
+                settings.LEADER_ELECTION_LOCK_FILE or os.path.join(tempfile.gettempdir(), f"{name}.lock")
+            )
+        return cls(
+            backend,
+            lease_duration=settings.LEADER_ELECTION_LEASE_DURATION,
+            renew_deadline=settings.LEADER_ELECTION_RENEW_DEADLINE,
+            retry_period=settings.LEADER_ELECTION_RETRY_PERIOD,
+        )
+
+    @property
+    def is_leader(self) -> bool:
+        return self._leader
+
+    def _bind(self) -> None:
+        """Create the leadership events in the running loop, reflecting the current state."""
+
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        self._loop = loop
+        self._leading, self._following = asyncio.Event(), asyncio.Event()
+        (self._leading if self._leader else self._following).set()
+
+    async def wait_for_leadership(self) -> None:
+        self._bind()
+        await self._leading.wait()
+
+    def _transition(self, leading: bool, event: str) -> None:
+        self._bind()
+        self._leader = leading
+        if leading:
+            self._following.clear()
+            self._leading.set()
+        else:
+            self._leading.clear()
+            self._following.set()
+        self._gauge.set(1 if leading else 0)
+        LEADER_TRANSITIONS.labels(self.backend.name, event).inc()
+        logger.info(f"Leader election on {self.backend.name}: {self.identity} {event} the lease")
+
+    async def _release(self) -> None:
+        if self.is_leader:
+            self._transition(False, "released")
+            try:
+                await self.backend.release(self.identity)
+            except Exception as exc:
+                logger.warning(f"Could not release the lease {self.backend.name}: {exc}")
+
+    async def step_down(self) -> None:
+        """Release the lease and stop competing for it, e.g. while the application drains."""
+
+        self._stepped_down = True
+        await self._release()
+
+    async def _acquire(self, timeout: Optional[float]) -> bool:
+        # not asyncio.wait_for, which may swallow the cancellation of run() on Python < 3.12
+        attempt = asyncio.ensure_future(self.backend.acquire(self.identity, self.lease_duration))
+        try:
+            done, _ = await asyncio.wait({attempt}, timeout=timeout)
+        finally:
+            if not attempt.done():
+                attempt.cancel()
+                await asyncio.gather(attempt, return_exceptions=True)
+        if not done:
+            raise asyncio.TimeoutError
+        return attempt.result()
+
+    async def run(self) -> None:
+        self._bind()
+        self._stepped_down = False
+        try:
+            while True:
+                if self._stepped_down:
+                    await asyncio.sleep(self.retry_period)
+                    continue
+
+                held: Optional[bool]
+                started = time.monotonic()
+                # a hanging attempt must not outlast the renew deadline, the lease may expire meanwhile
+                timeout = max(0.0, self.renew_deadline - (started - self._renewed_at)) if self.is_leader else None
+                try:
+                    held = await self._acquire(timeout)
+                except asyncio.TimeoutError:
+                    logger.warning(f"Leader election on {self.backend.name} did not renew the lease in time")
+                    held = False
+                except Exception as exc:
+                    # unknown outcome, a leader keeps leading until its renew deadline
+                    logger.warning(f"Leader election on {self.backend.name} failed: {exc}")
+                    held = None
+
+                if self._stepped_down:
+                    # stepped down during the attempt, which may have taken the lease again
+                    if held:
+                        await asyncio.gather(self.backend.release(self.identity), return_exceptions=True)
+                    continue
+
+                now = time.monotonic()
+                if held:
+                    # the lease runs from when the attempt was sent, not from its answer
+                    self._renewed_at = started
+                    if not self.is_leader:
+                        self._transition(True, "acquired")
+                elif self.is_leader and (held is False or now - self._renewed_at >= self.renew_deadline):
+                    self._transition(False, "lost")
+
+                await asyncio.sleep(self.retry_period)
+        finally:
+            await self._release()
+
+    def leader_only(self, task: Callable[[], Coroutine]) -> Callable[[], Coroutine]:
+        """Wrap a background task so it runs only while this process is leader.
+
+        The task is started on every election and cancelled when leadership is lost.
+        """
+
+        name = getattr(task, "__name__", repr(task))
+
+        @functools.wraps(task)
+        async def run_when_leader() -> Any:
+            while True:
+                self._bind()
+                await self._leading.wait()
+                running = asyncio.ensure_future(task())
+                lost = asyncio.ensure_future(self._following.wait())
+                try:
+                    done, _ = await asyncio.wait({running, lost}, return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    lost.cancel()
+                    if not running.done():
+                        running.cancel()
+                        await asyncio.gather(running, return_exceptions=True)
+
+                if running in done:
+                    return running.result()
+                logger.info(f"Stopped {name}, this process is no longer leader")
+
+        return run_when_leader
@@ -0,0 +1,35 @@
+"""Background task appending buffered traces to an OTLP JSON lines file."""
+
+import asyncio
+import json
+from typing import List
+
+from ..utils.runtime_config import RuntimeConfig
+from ..utils.tracing import Trace, Tracer, to_otlp
+
+
+def _append_line(path: str, line: str) -> None:
+    with open(path, "a", encoding="utf-8") as file_handle:
+        file_handle.write(line + "\n")
+
+
+def _write(config: RuntimeConfig, traces: List[Trace]) -> None:
+    if traces:
+        line = json.dumps(to_otlp(traces, config.settings.APP_NAME), separators=(",", ":"))
+        _append_line(config.settings.TRACE_EXPORT_FILE, line)
+
+
+async def export_traces(config: RuntimeConfig, tracer: Tracer) -> None:
+    exported = tracer.sequence
+
+    try:
+        while True:
+            await asyncio.sleep(config.settings.TRACE_EXPORT_INTERVAL)
+
+            sequence = tracer.sequence
+            traces = tracer.traces(since=exported)
+            exported = sequence
+            await asyncio.to_thread(_write, config, traces)
+    finally:
+        # the traces of the last interval are written when the application stops
+        _write(config, tracer.traces(since=exported))
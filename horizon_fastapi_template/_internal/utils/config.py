@@ -1,5 +1,7 @@
 """Settings definition for the FastAPI Template application factory."""
 
+from typing import Dict, Optional
+
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -33,6 +35,19 @@ class ApplicationSettings(BaseSettings):
         examples=[["*.py"]]
     )
 
+    CONFIG_RELOAD_FILE: str = Field(
+        default=".env",
+        description="Settings file watched when the application is created with enable_config_reload=True.",
+        examples=[".env", "/etc/app/app.env"],
+    )
+
+    CONFIG_RELOAD_INTERVAL: float = Field(
+        default=2.0,
+        gt=0,
+        description="Seconds between checks of CONFIG_RELOAD_FILE when watchfiles is not installed.",
+        examples=[2.0, 10.0],
+    )
+
     APP_NAME: str = Field(
         default="MyApp",
         description="The name of the application.",
@@ -84,11 +99,47 @@ class ApplicationSettings(BaseSettings):
     )
 
     LOG_REQUEST_EXCLUDE_PATHS: list[str] = Field(
-        default=["/health", "/metrics", "/static", "/docs", "/redoc", "/openapi.json", "/.well-known", "/graphql/v.*/playground"],
+        default=[
+            "/health", "/metrics", "/traces", "/static", "/docs", "/redoc", "/openapi.json", "/.well-known",
+            "/graphql/v.*/playground",
+        ],
         description="List of paths to ignore for logging.",
         examples=[["/health", "/metrics"]],
     )
 
+    LOG_REQUEST_MODE: str = Field(
+        default="full",
+        description="'full' logs each request on arrival and completion, 'combined' logs one sampled completion line.",
+        examples=["full", "combined"],
+    )
+
+    LOG_REQUEST_SAMPLE_RATE: float = Field(
+        default=1.0,
+        ge=0.0,
+        le=1.0,
+        description="Fraction of completion lines logged in 'combined' mode, errors and slow requests are always logged.",
+        examples=[1.0, 0.01],
+    )
+
+    LOG_REQUEST_SLOW_THRESHOLD: Optional[float] = Field(
+        default=None,
+        gt=0,
+        description="Requests slower than this many seconds are always logged in 'combined' mode.",
+        examples=[0.5, 2.0],
+    )
+
+    LOG_REQUEST_ALWAYS_LOG_STATUS: int = Field(
+        default=500,
+        description="Responses with at least this status are always logged in 'combined' mode.",
+        examples=[500, 400],
+    )
+
+    LOG_REQUEST_PATH_LIMITS: Dict[str, str] = Field(
+        default={},
+        description="Caps on logged completion lines keyed by path regular expression, the first match wins.",
+        examples=[{"^/api/items": "10/second"}],
+    )
+
     PROBE_READINESS_PATH: str = Field(
         default="/readiness",
         description="Path for readiness probe.",
@@ -101,3 +152,293 @@ class ApplicationSettings(BaseSettings):
         examples=["/liveness", "/api/liveness"],
     )
 
+
+    TRACE_SAMPLE_RATE: float = Field(
+        default=1.0,
+        ge=0.0,
+        le=1.0,
+        description="Fraction of requests traced when the tracing middleware is enabled.",
+        examples=[1.0, 0.01],
+    )
+
+    TRACE_BUFFER_SIZE: int = Field(
+        default=1024,
+        gt=0,
+        description="Number of finished traces kept in memory for the traces endpoint.",
+        examples=[1024, 128],
+    )
+
+    TRACES_PATH: str = Field(
+        default="/traces",
+        description="Path of the endpoint exposing buffered traces as OTLP JSON, guarded by PROFILING_TOKEN.",
+        examples=["/traces", "/internal/traces"],
+    )
+
+    TRACE_EXPORT_FILE: Optional[str] = Field(
+        default=None,
+        description="File that buffered traces are appended to as OTLP JSON lines.",
+        examples=["/var/log/app/traces.jsonl"],
+    )
+
+    TRACE_EXPORT_INTERVAL: float = Field(
+        default=5.0,
+        gt=0,
+        description="Seconds between two flushes of buffered traces to the export file.",
+        examples=[5.0, 30.0],
+    )
+
+    PROFILING_PATH: str = Field(
+        default="/debug",
+        description="Path prefix of the on-demand profiling endpoints.",
+        examples=["/debug", "/internal/debug"],
+    )
+
+    PROFILING_TOKEN: Optional[str] = Field(
+        default=None,
+        description="Token expected in the X-Profiling-Token header by the profiling and traces endpoints; "
+        "they are refused while unset.",
+        examples=["change-me"],
+    )
+
+    PROFILING_MAX_SECONDS: float = Field(
+        default=60.0,
+        gt=0,
+        description="Longest CPU profile that can be requested.",
+        examples=[30.0, 60.0],
+    )
+
+    COMPRESSION_MINIMUM_SIZE: int = Field(
+        default=1000,
+        ge=0,
+        description="Smallest response body, in bytes, compressed by the compression middleware.",
+        examples=[1000, 4096],
+    )
+
+    COMPRESSION_GZIP_LEVEL: int = Field(
+        default=6,
+        ge=1,
+        le=9,
+        description="gzip compression level.",
+        examples=[6, 9],
+    )
+
+    COMPRESSION_BROTLI_QUALITY: int = Field(
+        default=4,
+        ge=0,
+        le=11,
+        description="Brotli quality, used when the brotli package is installed.",
+        examples=[4, 11],
+    )
+
+    COMPRESSION_ZSTD_LEVEL: int = Field(
+        default=3,
+        ge=1,
+        le=22,
+        description="zstd compression level, used when the zstandard package is installed.",
+        examples=[3, 19],
+    )
+
+    COMPRESSION_EXCLUDED_CONTENT_TYPES: list[str] = Field(
+        default=[
+            "image/", "video/", "audio/", "font/woff", "application/zip", "application/gzip",
+            "application/x-gzip", "application/zstd", "application/x-7z-compressed",
+            "application/x-bzip2", "application/x-xz",
+        ],
+        description="Content type prefixes of already compressed bodies that are sent as is.",
+        examples=[["image/", "application/zip"]],
+    )
+
+    COMPRESSION_OFFLOAD_SIZE: Optional[int] = Field(
+        default=None,
+        gt=0,
+        description="Body chunks of at least this many bytes are compressed in a worker thread.",
+        examples=[65536],
+    )
+
+    RESPONSE_CACHE_MAX_ENTRIES: int = Field(
+        default=1024,
+        gt=0,
+        description="Responses kept by the default in-memory response cache.",
+        examples=[1024, 10000],
+    )
+
+    RESPONSE_CACHE_MAX_BYTES: int = Field(
+        default=64 * 1024 * 1024,
+        gt=0,
+        description="Bytes of responses kept by the default in-memory response cache.",
+        examples=[67108864],
+    )
+
+    RATE_LIMIT_DEFAULT: Optional[str] = Field(
+        default="600/minute",
+        description="Limit applied to routes without a specific rule, e.g. '100/minute' or '10/second burst 50'.",
+        examples=["100/minute", "10/second burst 50"],
+    )
+
+    RATE_LIMIT_ROUTES: Dict[str, str] = Field(
+        default={},
+        description="Per-route limits keyed by path regular expression, the first match wins.",
+        examples=[{"^/graphql": "20/second", "^/reports/": "10/minute"}],
+    )
+
+    RATE_LIMIT_KEY: str = Field(
+        default="ip",
+        description="How clients are told apart: 'ip', 'api_key' or 'header:<name>'.",
+        examples=["ip", "api_key", "header:X-Tenant"],
+    )
+
+    RATE_LIMIT_API_KEY_HEADER: str = Field(
+        default="X-API-Key",
+        description="Header carrying the API key when RATE_LIMIT_KEY is 'api_key'.",
+        examples=["X-API-Key", "Authorization"],
+    )
+
+    RATE_LIMIT_TRUST_FORWARDED_FOR: bool = Field(
+        default=False,
+        description="Identify clients by the first X-Forwarded-For address, only behind a trusted proxy.",
+        examples=[True, False],
+    )
+
+    RATE_LIMIT_EXCLUDE_PATHS: list[str] = Field(
+        default=["/health", "/static", "/docs", "/redoc", "/openapi.json", "/.well-known"],
+        description="Paths never rate limited, in addition to the probe, metrics and traces paths.",
+        examples=[["/health", "/internal"]],
+    )
+
+    EXCEPTION_CLIENT_ERROR_SAMPLE_RATE: float = Field(
+        default=1.0,
+        ge=0.0,
+        le=1.0,
+        description="Fraction of 4xx errors logged, they are always counted in http_exceptions_total.",
+        examples=[1.0, 0.1],
+    )
+
+    EXCEPTION_CLIENT_ERROR_LOG_LIMIT: Optional[str] = Field(
+        default=None,
+        description="Upper bound on logged 4xx errors per process, e.g. '10/second', unlimited when unset.",
+        examples=["10/second", "100/minute burst 20"],
+    )
+
+    EXCEPTION_DEDUP_WINDOW: float = Field(
+        default=60.0,
+        ge=0.0,
+        description="Seconds during which repeats of an identical unhandled error are counted instead of logged, "
+                    "0 logs every occurrence.",
+        examples=[60.0, 0.0],
+    )
+
+    LEADER_ELECTION_BACKEND: str = Field(
+        default="file",
+        description="Where leader_background_tasks elect their leader: 'file' (a lock file, single host) or "
+                    "'kube' (a coordination.k8s.io Lease).",
+        examples=["file", "kube"],
+    )
+
+    LEADER_ELECTION_NAME: Optional[str] = Field(
+        default=None,
+        description="Name of the Lease object or lock file, '<app name>-leader' when unset.",
+        examples=["reports-leader"],
+    )
+
+    LEADER_ELECTION_NAMESPACE: Optional[str] = Field(
+        default=None,
+        description="Namespace of the Lease object, the pod's namespace (or 'default') when unset.",
+        examples=["my-team"],
+    )
+
+    LEADER_ELECTION_LOCK_FILE: Optional[str] = Field(
+        default=None,
+        description="Lock file of the 'file' backend, '<name>.lock' in the temporary directory when unset.",
+        examples=["/var/run/app/leader.lock"],
+    )
+
+    LEADER_ELECTION_LEASE_DURATION: float = Field(
+        default=15.0,
+        gt=0,
+        description="Seconds a lease is valid without renewal, followers wait this long before taking it over.",
+        examples=[15.0, 30.0],
+    )
+
+    LEADER_ELECTION_RENEW_DEADLINE: float = Field(
+        default=10.0,
+        gt=0,
+        description="Seconds a leader keeps leading without a successful renewal, shorter than the lease duration.",
+        examples=[10.0, 20.0],
+    )
+
+    LEADER_ELECTION_RETRY_PERIOD: float = Field(
+        default=2.0,
+        gt=0,
+        description="Seconds between attempts to acquire or renew the lease.",
+        examples=[2.0, 5.0],
+    )
+
+    JOB_QUEUE_CONCURRENCY: int = Field(
+        default=4,
+        ge=1,
+        description="Worker coroutines running the jobs of the job queue concurrently.",
+        examples=[4, 16],
+    )
+
+    JOB_QUEUE_MAX_RETRIES: int = Field(
+        default=3,
+        ge=0,
+        description="Retries of a failed job before it is moved to the dead letters.",
+        examples=[3, 10],
+    )
+
+    JOB_QUEUE_RETRY_DELAY: float = Field(
+        default=1.0,
+        gt=0,
+        description="Seconds before the first retry of a failed job, doubled on each further retry.",
+        examples=[1.0, 30.0],
+    )
+
+    JOB_QUEUE_TIMEOUT: Optional[float] = Field(
+        default=None,
+        gt=0,
+        description="Seconds a job attempt may run before it is cancelled and counted as failed, unlimited when unset.",
+        examples=[60.0, 600.0],
+    )
+
+    JOB_QUEUE_DATABASE: Optional[str] = Field(
+        default=None,
+        description="SQLite database keeping queued and dead jobs across restarts, in memory only when unset.",
+        examples=["/var/lib/app/jobs.sqlite3"],
+    )
+
+    PROCESS_POOL_WORKERS: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="Worker processes of the process pool running CPU-bound calls, the CPU count when unset.",
+        examples=[2, 8],
+    )
+
+    PROCESS_POOL_TIMEOUT: Optional[float] = Field(
+        default=None,
+        gt=0,
+        description="Seconds a process pool call may take, queueing included, before it raises; unlimited when unset.",
+        examples=[10.0, 60.0],
+    )
+
+    PROCESS_POOL_START_METHOD: Optional[str] = Field(
+        default=None,
+        description="multiprocessing start method of the pool workers: 'fork', 'forkserver' or 'spawn', "
+                    "the platform default when unset.",
+        examples=["spawn", "forkserver"],
+    )
+
+    SHUTDOWN_DRAIN_DELAY: float = Field(
+        default=5.0,
+        ge=0,
+        description="Seconds between SIGTERM, which turns the readiness probe to 503, and the wait for the "
+                    "requests in flight, so load balancers stop sending new ones.",
+        examples=[5.0, 15.0],
+    )
+
+    SHUTDOWN_DRAIN_TIMEOUT: float = Field(
+        default=20.0,
+        ge=0,
+        description="Seconds to wait for the requests in flight to finish before shutting down anyway.",
+        examples=[20.0, 60.0],
+    )
@@ -0,0 +1,53 @@
+"""JSON encoding through orjson when it is installed, the standard library otherwise."""
+
+import json
+from typing import Any, Union
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the installed extras
+    orjson = None
+
+__all__ = ["HAS_ORJSON", "FastJSONResponse", "json_dumps", "json_loads"]
+
+HAS_ORJSON = orjson is not None
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def json_dumps(content: Any) -> bytes:
+        """Encode ``content`` to compact UTF-8 JSON bytes."""
+        return orjson.dumps(content, option=_ORJSON_OPTIONS)
+
+    def json_loads(data: Union[str, bytes]) -> Any:
+        """Decode one JSON document."""
+        return orjson.loads(data)
+
+else:
+    def json_dumps(content: Any) -> bytes:
+        """Encode ``content`` to compact UTF-8 JSON bytes."""
+        return json.dumps(
+            content,
+            ensure_ascii=False,
+            allow_nan=False,
+            indent=None,
+            separators=(",", ":"),
+        ).encode("utf-8")
+
+    def json_loads(data: Union[str, bytes]) -> Any:
+        """Decode one JSON document."""
+        return json.loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    """``JSONResponse`` rendered with :func:`json_dumps`.
+
+    Drop-in for Starlette's response class: install the ``fast-json`` extra to get
+    orjson, without it the output is the same as ``JSONResponse``.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return json_dumps(content)
@@ -0,0 +1,181 @@
+"""Connection draining between SIGTERM and the end of the application.
+
+On SIGTERM the readiness probe turns to 503 at once, so the endpoint is removed from
+load balancers, while requests keep being served. After ``drain_delay`` seconds and
+once the requests in flight finished, or ``drain_timeout`` seconds passed, the signal
+is handed to the server's own handler (uvicorn's), which stops accepting connections
+and runs the lifespan shutdown. That shutdown flushes the logs and runs the cleanups
+before the background tasks are cancelled; the shared client pools are closed after.
+"""
+
+import asyncio
+import inspect
+import signal
+import sys
+from types import FrameType
+from typing import Any, Callable, List, Optional
+
+from loguru import logger
+from prometheus_client import Gauge
+
+from .config import ApplicationSettings
+
+__all__ = ["APP_DRAINING", "HTTP_REQUESTS_IN_FLIGHT", "GracefulShutdown"]
+
+APP_DRAINING = Gauge(
+    "app_draining",
+    "Whether the application is draining its requests before shutting down (1) or serving (0)",
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests being processed",
+)
+
+
+class GracefulShutdown:
+    """Drain of the requests in flight before the application stops.
+
+    ``app.state.graceful_shutdown`` when enabled. Register what should be closed
+    before the background tasks are cancelled with :meth:`add_cleanup`.
+    """
+
+    def __init__(self, *, drain_delay: float = 5.0, drain_timeout: float = 20.0) -> None:
+        self.drain_delay = drain_delay
+        self.drain_timeout = drain_timeout
+        self.in_flight = 0
+        self._draining = False
+        # created in the running loop by start(), the application is built before it runs
+        self._idle: Optional[asyncio.Event] = None
+        self._cleanups: List[Callable[[], Any]] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._previous_handler: Any = None
+        self._signalled = False
+        self._drain_task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_settings(cls, settings: ApplicationSettings) -> "GracefulShutdown":
+        return cls(drain_delay=settings.SHUTDOWN_DRAIN_DELAY, drain_timeout=settings.SHUTDOWN_DRAIN_TIMEOUT)
+
+    @property
+    def draining(self) -> bool:
+        return self._draining
+
+    def add_cleanup(self, callback: Callable[[], Any]) -> Callable[[], Any]:
+        """Run ``callback``, sync or async, on shutdown once the requests are drained.
+
+        Cleanups run in registration order and their errors are logged, not raised.
+        Returns ``callback`` so it can be used as a decorator.
+        """
+
+        self._cleanups.append(callback)
+        return callback
+
+    def _new_idle_event(self) -> asyncio.Event:
+        self._idle = asyncio.Event()
+        if self.in_flight == 0:
+            self._idle.set()
+        return self._idle
+
+    def request_started(self) -> None:
+        self.in_flight += 1
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        if self._idle is not None:
+            self._idle.clear()
+
+    def request_finished(self) -> None:
+        self.in_flight -= 1
+        HTTP_REQUESTS_IN_FLIGHT.dec()
+        if self.in_flight == 0 and self._idle is not None:
+            self._idle.set()
+
+    def start_draining(self) -> None:
+        if not self._draining:
+            self._draining = True
+            APP_DRAINING.set(1)
+            logger.info(f"Draining {self.in_flight} requests in flight before shutting down")
+
+    async def wait_for_requests(self, timeout: float) -> bool:
+        """Wait up to ``timeout`` seconds for the requests in flight and tell whether they finished."""
+
+        idle = self._idle if self._idle is not None else self._new_idle_event()
+        try:
+            await asyncio.wait_for(idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Shutting down with {self.in_flight} requests still in flight after {timeout}s")
+            return False
+        return True
+
+    def start(self) -> None:
+        """Serve again and handle SIGTERM ahead of the server's handler, called once drained.
+
+        Called from the lifespan startup, once the server installed its own handler with
+        ``signal.signal``, as uvicorn does.
+        """
+
+        self._draining = self._signalled = False
+        self._drain_task = None
+        APP_DRAINING.set(0)
+        self._loop = asyncio.get_running_loop()
+        self._new_idle_event()
+        try:
+            self._previous_handler = signal.signal(signal.SIGTERM, self._on_signal)
+        except ValueError:
+            # not the main thread, as under a test client, signals are left to the server
+            self._previous_handler = None
+            logger.debug("SIGTERM is not handled outside the main thread, requests will not be drained")
+
+    def restore_signal_handler(self) -> None:
+        if self._previous_handler is not None:
+            handler, self._previous_handler = self._previous_handler, None
+            signal.signal(signal.SIGTERM, handler)
+
+    def _on_signal(self, signum: int, frame: Optional[FrameType]) -> None:
+        if self._signalled:
+            # a second SIGTERM stops without waiting any longer
+            self._forward(signum, frame)
+            return
+        self._signalled = True
+        self.start_draining()
+        self._loop.call_soon_threadsafe(self._start_drain, signum)
+
+    def _start_drain(self, signum: int) -> None:
+        self._drain_task = asyncio.ensure_future(self._drain_then_stop(signum))
+
+    async def _drain_then_stop(self, signum: int) -> None:
+        # endpoints take a while to be removed from load balancers, which keep sending requests
+        await asyncio.sleep(self.drain_delay)
+        await self.wait_for_requests(self.drain_timeout)
+        self._forward(signum, None)
+
+    def _forward(self, signum: int, frame: Optional[FrameType]) -> None:
+        handler = self._previous_handler
+        self.restore_signal_handler()
+        if callable(handler):
+            handler(signum, frame)
+        elif handler == signal.SIG_DFL:
+            signal.raise_signal(signum)
+
+    async def shutdown(self) -> None:
+        """Drain the requests still in flight, flush the logs and run the cleanups.
+
+        Called by the lifespan shutdown before the background tasks are cancelled.
+        """
+
+        self.start_draining()
+        if self._drain_task is not None and not self._drain_task.done():
+            # the server stops for another reason, such as SIGINT
+            self._drain_task.cancel()
+        self.restore_signal_handler()
+        await self.wait_for_requests(self.drain_timeout)
+
+        await logger.complete()
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+        for cleanup in self._cleanups:
+            try:
+                result = cleanup()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as exc:
+                logger.warning(f"Shutdown cleanup {getattr(cleanup, '__qualname__', cleanup)} failed: {exc}")
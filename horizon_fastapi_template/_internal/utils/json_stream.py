@@ -0,0 +1,172 @@
+"""Incremental decoding of the items of a JSON array from a stream of text chunks."""
+
+import json
+import re
+from typing import Any, AsyncIterator, Optional, Sequence
+
+__all__ = ["iter_json_items"]
+
+_WHITESPACE = " \t\n\r"
+_STRUCTURE = re.compile(r'["\[\]{}]')
+_STRING_END = re.compile(r'["\\]')
+_SCALAR_END = re.compile(r"[\s,:\]}]")
+_decoder = json.JSONDecoder()
+
+
+class _ValueEnd:
+    """Finds where the value starting with ``first`` ends, fed its text a chunk at a time.
+
+    Only brackets and strings are followed, ``json`` still validates the value.
+    """
+
+    def __init__(self, first: str) -> None:
+        self._scalar = first not in '[{"'
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def find(self, text: str, start: int = 0) -> int:
+        """Return the index just past the end of the value in ``text``, ``-1`` if it goes on."""
+
+        if self._scalar:
+            match = _SCALAR_END.search(text, start)
+            return match.start() if match else -1
+
+        index = start
+        if self._escaped:
+            self._escaped = False
+            index += 1
+        while True:
+            match = (_STRING_END if self._in_string else _STRUCTURE).search(text, index)
+            if match is None:
+                return -1
+            char, index = match.group(), match.end()
+            if char == "\\":
+                if index == len(text):
+                    self._escaped = True
+                    return -1
+                index += 1
+            elif char == '"':
+                self._in_string = not self._in_string
+                if not self._in_string and self._depth == 0:
+                    return index
+            elif char in "[{":
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    return index
+
+
+class _JSONReader:
+    """Text buffer over ``chunks`` holding the unread part of the document only."""
+
+    def __init__(self, chunks: AsyncIterator[str]) -> None:
+        self._chunks = chunks.__aiter__()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    async def _next_chunk(self) -> Optional[str]:
+        if self._eof:
+            return None
+        try:
+            return await self._chunks.__anext__()
+        except StopAsyncIteration:
+            self._eof = True
+            return None
+
+    async def _fill(self) -> bool:
+        chunk = await self._next_chunk()
+        if chunk is None:
+            return False
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    async def peek(self) -> str:
+        """Return the next non-whitespace character, ``""`` at the end of the document."""
+
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not await self._fill():
+                return ""
+
+    async def take(self, expected: str) -> str:
+        char = await self.peek()
+        if char not in expected:
+            raise json.JSONDecodeError(f"Expecting one of {expected!r}", self._buffer, self._pos)
+        self._pos += 1
+        return char
+
+    async def value(self) -> Any:
+        """Decode the next complete value, reading chunks until it is.
+
+        The chunks are only scanned for the end of the value as they arrive, and joined
+        and decoded once, so a value spread over many chunks costs linear time.
+        """
+
+        if not await self.peek():
+            raise json.JSONDecodeError("Expecting value", self._buffer, self._pos)
+        value_end = _ValueEnd(self._buffer[self._pos])
+        end = value_end.find(self._buffer, self._pos)
+        if end < 0:
+            chunks = [self._buffer[self._pos:]]
+            offset = len(chunks[0])
+            while end < 0:
+                chunk = await self._next_chunk()
+                if chunk is None:
+                    break
+                chunks.append(chunk)
+                end = value_end.find(chunk)
+                if end >= 0:
+                    end += offset
+                offset += len(chunk)
+            self._buffer = "".join(chunks)
+            self._pos = 0
+
+        value, self._pos = _decoder.raw_decode(self._buffer, self._pos)
+        return value
+
+
+async def _items(reader: _JSONReader, path: Sequence[str]) -> AsyncIterator[Any]:
+    if not path:
+        await reader.take("[")
+        if await reader.peek() == "]":
+            return
+        while True:
+            yield await reader.value()
+            if await reader.take(",]") == "]":
+                return
+
+    await reader.take("{")
+    if await reader.peek() == "}":
+        raise KeyError(path[0])
+    while True:
+        key = await reader.value()
+        await reader.take(":")
+        if key == path[0]:
+            async for item in _items(reader, path[1:]):
+                yield item
+            return
+        # skipped values are decoded whole, keep large arrays on the path
+        await reader.value()
+        if await reader.take(",}") == "}":
+            raise KeyError(path[0])
+
+
+async def iter_json_items(chunks: AsyncIterator[str], path: Sequence[str] = ()) -> AsyncIterator[Any]:
+    """Yield the items of a JSON array as soon as each one is complete in ``chunks``.
+
+    ``path`` names the keys leading from the top-level object to the array, for
+    example ``("data", "items")``; the array is the document itself when empty. Only
+    one item, plus at most a chunk, is buffered at a time. Reading stops at the end of
+    the array, the remainder of the document is not validated. Raises ``KeyError``
+    when ``path`` does not lead to a value and ``json.JSONDecodeError`` on malformed input.
+    """
+
+    async for item in _items(_JSONReader(chunks), path):
+        yield item
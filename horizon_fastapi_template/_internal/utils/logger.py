@@ -5,7 +5,8 @@ import logging.config
 import sys
 import traceback as _tb
 import os
-from typing import Iterable, List
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List
 from loguru import logger
 from uvicorn.config import LOGGING_CONFIG as UVICORN_LOGGING_CONFIG
 
@@ -91,10 +92,14 @@ class UvicornHandler(logging.Handler):
         )
 
 
-def setup_loguru(log_level: str = "INFO") -> None:
+def setup_loguru(log_level: str = "INFO") -> int:
     logger.opt(depth=1)
     logger.remove()
-    logger.add(
+    return _add_stdout_sink(log_level)
+
+
+def _add_stdout_sink(log_level: str) -> int:
+    return logger.add(
         sys.stdout,
         level=log_level,
         format=base_formatter,
@@ -190,5 +195,33 @@ def configure_uvicorn(log_level: str = "INFO") -> None:
 
 class Logger:
     def __init__(self, log_level: str = "INFO") -> None:
-        setup_loguru(log_level)
+        self.log_level = log_level
+        self._handler_id = setup_loguru(log_level)
         configure_uvicorn(log_level)
+
+    @contextmanager
+    def muted(self) -> Iterator[None]:
+        """Format the records for the stdout sink but drop them, then restore the sink."""
+
+        handler_id = logger.add(lambda message: None, level=self.log_level, format=base_formatter)
+        logger.remove(self._handler_id)
+        try:
+            yield
+        finally:
+            self._handler_id = _add_stdout_sink(self.log_level)
+            logger.remove(handler_id)
+
+    def set_level(self, log_level: str) -> None:
+        """Replace the stdout sink with one at ``log_level``, leaving other sinks alone."""
+
+        if log_level.upper() == self.log_level.upper():
+            return
+        handler_id = _add_stdout_sink(log_level)
+        logger.remove(self._handler_id)
+        self._handler_id = handler_id
+        self.log_level = log_level
+        for name in ("uvicorn", "uvicorn.access"):
+            uvicorn_logger = logging.getLogger(name)
+            uvicorn_logger.setLevel(log_level.upper())
+            for handler in uvicorn_logger.handlers:
+                handler.setLevel(log_level.upper())
@@ -0,0 +1,299 @@
+"""Process pool running CPU-bound work off the event loop.
+
+A :class:`ProcessPool` passed to ``general_create_app`` is started and shut down by
+the lifespan. Coroutines await :meth:`ProcessPool.run`, or call functions decorated
+with :func:`run_in_process`, while the event loop keeps serving other requests.
+"""
+
+import asyncio
+import functools
+import importlib
+import multiprocessing
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from fastapi import Request
+from prometheus_client import Counter, Gauge, Histogram
+
+from .config import ApplicationSettings
+
+__all__ = [
+    "PROCESS_POOL_CALLS",
+    "PROCESS_POOL_CALL_DURATION",
+    "PROCESS_POOL_IN_FLIGHT",
+    "PROCESS_POOL_WORKERS",
+    "ProcessPool",
+    "SharedBytes",
+    "get_process_pool",
+    "run_in_process",
+]
+
+PROCESS_POOL_WORKERS = Gauge(
+    "app_process_pool_workers",
+    "Worker processes of the process pool",
+    ["pool"],
+)
+PROCESS_POOL_IN_FLIGHT = Gauge(
+    "app_process_pool_in_flight",
+    "Calls submitted to the process pool and not finished yet, queued ones included; "
+    "the pool is saturated when it exceeds the worker count",
+    ["pool"],
+)
+PROCESS_POOL_CALL_DURATION = Histogram(
+    "app_process_pool_call_seconds",
+    "Seconds from submitting a call to the process pool to its result, queueing included",
+    ["pool", "function"],
+)
+PROCESS_POOL_CALLS = Counter(
+    "app_process_pool_calls_total",
+    "Process pool calls by result: ok, error or timeout",
+    ["pool", "function", "result"],
+)
+
+# bytes results at least this large come back through shared memory
+SHARED_RESULT_THRESHOLD = 1024 * 1024
+
+
+class SharedBytes:
+    """Bytes sent to a worker through shared memory rather than the pool's pipe.
+
+    The data is copied once into a shared memory block, which the worker maps without
+    copying: the function receives a read-only ``memoryview``, valid during the call only.
+    """
+
+    def __init__(self, data: Union[bytes, bytearray, memoryview]) -> None:
+        self.data = data
+
+
+@dataclass(frozen=True)
+class _SharedBlock:
+    name: str
+    size: int
+
+
+@dataclass(frozen=True)
+class _Reference:
+    """A function decorated with :func:`run_in_process`, found again by name in the worker."""
+
+    module: str
+    qualname: str
+
+    def resolve(self) -> Callable:
+        target: Any = importlib.import_module(self.module)
+        for part in self.qualname.split("."):
+            target = getattr(target, part)
+        return target.__wrapped__
+
+
+def _unlink(block: _SharedBlock) -> None:
+    memory = SharedMemory(block.name)
+    memory.close()
+    memory.unlink()
+
+
+def _read_block(block: _SharedBlock) -> bytes:
+    memory = SharedMemory(block.name)
+    try:
+        return bytes(memory.buf[:block.size])
+    finally:
+        memory.close()
+        memory.unlink()
+
+
+def _invoke(function: Union[Callable, _Reference], args: tuple, kwargs: Dict[str, Any]) -> Any:
+    """Run in the worker: map the shared arguments, call the function and share a large result."""
+
+    if isinstance(function, _Reference):
+        function = function.resolve()
+
+    attached: List[Tuple[SharedMemory, memoryview]] = []
+
+    def attach(value: Any) -> Any:
+        if not isinstance(value, _SharedBlock):
+            return value
+        memory = SharedMemory(value.name)
+        view = memory.buf[:value.size].toreadonly()
+        attached.append((memory, view))
+        return view
+
+    try:
+        result = function(*map(attach, args), **{key: attach(value) for key, value in kwargs.items()})
+    finally:
+        for memory, view in attached:
+            view.release()
+            try:
+                memory.close()
+            except BufferError:
+                # the function kept a slice of the view, the mapping goes with it
+                pass
+
+    if isinstance(result, (bytes, bytearray)) and len(result) >= SHARED_RESULT_THRESHOLD:
+        memory = SharedMemory(create=True, size=len(result))
+        memory.buf[:len(result)] = result
+        memory.close()
+        return _SharedBlock(memory.name, len(result))
+    return result
+
+
+def _discard_result(future: Future) -> None:
+    # the caller gave up waiting, nobody else will read a shared result
+    if not future.cancelled() and future.exception() is None and isinstance(future.result(), _SharedBlock):
+        _unlink(future.result())
+
+
+class ProcessPool:
+    """A ``ProcessPoolExecutor`` with timeouts, shared memory transfers and metrics.
+
+    ``max_workers`` defaults to the CPU count and ``start_method`` to the platform's
+    default. Functions and arguments must be picklable, so functions are defined at
+    module level. A call cancelled by its ``timeout`` before it started never runs;
+    one already running keeps its worker busy until it returns, as processes of the
+    pool cannot be interrupted.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        *,
+        name: str = "default",
+        timeout: Optional[float] = None,
+        start_method: Optional[str] = None,
+    ) -> None:
+        self.max_workers = max_workers or multiprocessing.cpu_count()
+        self.name = name
+        self.timeout = timeout
+        self.start_method = start_method
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._in_flight = PROCESS_POOL_IN_FLIGHT.labels(name)
+        self._workers = PROCESS_POOL_WORKERS.labels(name)
+        self._in_flight.set(0)
+        self._workers.set(0)
+
+    @classmethod
+    def from_settings(cls, settings: ApplicationSettings, name: str = "default") -> "ProcessPool":
+        return cls(
+            settings.PROCESS_POOL_WORKERS,
+            name=name,
+            timeout=settings.PROCESS_POOL_TIMEOUT,
+            start_method=settings.PROCESS_POOL_START_METHOD,
+        )
+
+    @property
+    def running(self) -> bool:
+        return self._executor is not None
+
+    def start(self) -> None:
+        """Create the executor and make this pool the one :func:`run_in_process` uses."""
+
+        global _current_pool
+        if self._executor is None:
+            context = multiprocessing.get_context(self.start_method) if self.start_method else None
+            self._executor = ProcessPoolExecutor(self.max_workers, mp_context=context)
+            self._workers.set(self.max_workers)
+        _current_pool = self
+
+    async def shutdown(self) -> None:
+        """Cancel the queued calls and wait for the running ones and the workers to exit."""
+
+        global _current_pool
+        if _current_pool is self:
+            _current_pool = None
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+            self._workers.set(0)
+
+    async def run(self, function: Callable, *args: Any, timeout: Optional[float] = None, **kwargs: Any) -> Any:
+        """Call ``function(*args, **kwargs)`` in a worker process and return its result.
+
+        ``SharedBytes`` arguments go through shared memory and a ``bytes`` result of
+        1 MiB or more comes back the same way. Raises ``asyncio.TimeoutError`` after
+        ``timeout`` seconds, the pool's own by default.
+        """
+
+        if self._executor is None:
+            raise RuntimeError(f"The process pool '{self.name}' is not running.")
+
+        label = getattr(function, "__qualname__", repr(function))
+        target = (
+            _Reference(function.__module__, function.__qualname__)
+            if getattr(function, "__process_pool__", False)
+            else function
+        )
+        timeout = self.timeout if timeout is None else timeout
+
+        blocks: List[SharedMemory] = []
+
+        def share(value: Any) -> Any:
+            if not isinstance(value, SharedBytes):
+                return value
+            data = memoryview(value.data).cast("B")
+            memory = SharedMemory(create=True, size=max(1, len(data)))
+            memory.buf[:len(data)] = data
+            blocks.append(memory)
+            return _SharedBlock(memory.name, len(data))
+
+        start = time.perf_counter()
+        outcome = "error"
+        self._in_flight.inc()
+        try:
+            future = self._executor.submit(
+                _invoke, target, tuple(map(share, args)), {key: share(value) for key, value in kwargs.items()}
+            )
+            try:
+                value = await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+            except asyncio.TimeoutError:
+                outcome = "timeout"
+                future.add_done_callback(_discard_result)
+                raise
+            if isinstance(value, _SharedBlock):
+                value = _read_block(value)
+            outcome = "ok"
+            return value
+        finally:
+            self._in_flight.dec()
+            PROCESS_POOL_CALL_DURATION.labels(self.name, label).observe(time.perf_counter() - start)
+            PROCESS_POOL_CALLS.labels(self.name, label, outcome).inc()
+            for memory in blocks:
+                # a worker still reading keeps its mapping after the unlink
+                memory.close()
+                memory.unlink()
+
+
+_current_pool: Optional[ProcessPool] = None
+
+
+def run_in_process(
+    function: Optional[Callable] = None,
+    *,
+    timeout: Optional[float] = None,
+    pool: Optional[ProcessPool] = None,
+) -> Any:
+    """Turn a module level function into a coroutine function running it in a process pool.
+
+    ``pool`` defaults to the pool started by the application. Use as
+    ``@run_in_process`` or ``@run_in_process(timeout=5)``; the decorated function must
+    stay reachable under its name in its module.
+    """
+
+    def decorator(target: Callable) -> Callable:
+        @functools.wraps(target)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            selected = pool or _current_pool
+            if selected is None or not selected.running:
+                raise RuntimeError(f"No process pool is running to call {target.__qualname__}.")
+            return await selected.run(wrapper, *args, timeout=timeout, **kwargs)
+
+        wrapper.__process_pool__ = True
+        return wrapper
+
+    return decorator(function) if function is not None else decorator
+
+
+def get_process_pool(request: Request) -> ProcessPool:
+    """Dependency returning the application's process pool, ``app.state.process_pool``."""
+
+    return request.app.state.process_pool
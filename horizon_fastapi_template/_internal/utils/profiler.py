@@ -0,0 +1,195 @@
+"""Standard library sampling profiler and runtime introspection helpers."""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from types import FrameType
+from typing import Any, Dict, List, Optional, Tuple
+
+__all__ = [
+    "sample_stacks",
+    "to_collapsed",
+    "to_speedscope",
+    "dump_tasks",
+    "TracemallocSession",
+]
+
+Frame = Tuple[str, str, int]
+Stack = Tuple[Frame, ...]
+
+
+def _frame_key(frame: FrameType) -> Frame:
+    code = frame.f_code
+    return code.co_name, code.co_filename, code.co_firstlineno
+
+
+def _walk(frame: Optional[FrameType]) -> List[Frame]:
+    stack: List[Frame] = []
+    while frame is not None:
+        stack.append(_frame_key(frame))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+def sample_stacks(duration: float, interval: float) -> Counter:
+    """Sample the stacks of every other thread for ``duration`` seconds.
+
+    Blocking, meant to run in a worker thread. Each stack is rooted at a pseudo frame
+    named after its thread so the output separates the event loop from the threadpool.
+    """
+
+    own_id = threading.get_ident()
+    samples: Counter = Counter()
+    deadline = time.monotonic() + duration
+
+    while time.monotonic() < deadline:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            root: Frame = (names.get(thread_id, f"thread-{thread_id}"), "", 0)
+            samples[(root, *_walk(frame))] += 1
+        time.sleep(interval)
+
+    return samples
+
+
+def _frame_name(frame: Frame) -> str:
+    name, filename, line = frame
+    if not filename:
+        return name
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+def to_collapsed(samples: Counter) -> str:
+    """Render samples in Brendan Gregg's collapsed stack format."""
+
+    lines = [
+        ";".join(_frame_name(frame).replace(";", ":") for frame in stack) + f" {count}"
+        for stack, count in samples.most_common()
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def to_speedscope(samples: Counter, interval: float, name: str = "cpu") -> Dict[str, Any]:
+    """Render samples as a speedscope ``sampled`` profile."""
+
+    frame_index: Dict[Frame, int] = {}
+    frames: List[Dict[str, Any]] = []
+    stacks: List[List[int]] = []
+    weights: List[float] = []
+    interval_ms = interval * 1000
+
+    for stack, count in samples.items():
+        indexes = []
+        for frame in stack:
+            if frame not in frame_index:
+                frame_index[frame] = len(frames)
+                frames.append({"name": frame[0], "file": frame[1] or None, "line": frame[2] or None})
+            indexes.append(frame_index[frame])
+        stacks.append(indexes)
+        weights.append(count * interval_ms)
+
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "shared": {"frames": frames},
+        "profiles": [
+            {
+                "type": "sampled",
+                "name": name,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": stacks,
+                "weights": weights,
+            }
+        ],
+        "name": name,
+        "exporter": "horizon_fastapi_template",
+    }
+
+
+def dump_tasks(limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Describe every asyncio task of the running loop with its current stack."""
+
+    dumped = []
+    for task in asyncio.all_tasks():
+        coro = task.get_coro()
+        dumped.append(
+            {
+                "name": task.get_name(),
+                "coroutine": getattr(coro, "__qualname__", repr(coro)),
+                "done": task.done(),
+                "cancelled": task.cancelled(),
+                "stack": [
+                    _frame_name((frame.f_code.co_name, frame.f_code.co_filename, frame.f_lineno))
+                    for frame in task.get_stack(limit=limit)
+                ],
+            }
+        )
+    return dumped
+
+
+class TracemallocSession:
+    """Keeps the previous snapshot around so consecutive calls can be diffed."""
+
+    def __init__(self) -> None:
+        self._previous: Optional[tracemalloc.Snapshot] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def start(frames: int = 1) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def stop(self) -> None:
+        with self._lock:
+            self._previous = None
+        tracemalloc.stop()
+
+    def _take(self) -> tracemalloc.Snapshot:
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc is not tracing, start it first.")
+        snapshot = tracemalloc.take_snapshot()
+        return snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+
+    def snapshot(self, limit: int = 20, key_type: str = "lineno") -> Dict[str, Any]:
+        snapshot = self._take()
+        with self._lock:
+            self._previous = snapshot
+        current, peak = tracemalloc.get_traced_memory()
+        return {
+            "traced_bytes": current,
+            "peak_bytes": peak,
+            "top": [
+                {"site": str(stat.traceback), "size": stat.size, "count": stat.count}
+                for stat in snapshot.statistics(key_type)[:limit]
+            ],
+        }
+
+    def diff(self, limit: int = 20, key_type: str = "lineno") -> Dict[str, Any]:
+        snapshot = self._take()
+        with self._lock:
+            previous, self._previous = self._previous, snapshot
+        if previous is None:
+            raise RuntimeError("No previous snapshot to compare with.")
+        return {
+            "top": [
+                {
+                    "site": str(stat.traceback),
+                    "size_diff": stat.size_diff,
+                    "size": stat.size,
+                    "count_diff": stat.count_diff,
+                    "count": stat.count,
+                }
+                for stat in snapshot.compare_to(previous, key_type)[:limit]
+            ],
+        }
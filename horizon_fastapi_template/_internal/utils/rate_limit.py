@@ -0,0 +1,123 @@
+"""Token bucket rate limits and the backends storing their state."""
+
+import re
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Dict, List, NamedTuple, Optional
+
+__all__ = [
+    "RateLimit",
+    "RateLimitResult",
+    "RateLimitBackend",
+    "MemoryRateLimitBackend",
+    "parse_rate_limit",
+]
+
+_PERIODS = {"second": 1.0, "minute": 60.0, "hour": 3600.0, "day": 86400.0}
+_LIMIT_PATTERN = re.compile(r"^\s*(\d+)\s*/\s*(\d*)\s*(second|minute|hour|day)s?\s*(?:burst\s+(\d+))?\s*$")
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """Refill ``rate`` tokens per second up to ``capacity``; each request takes one."""
+
+    rate: float
+    capacity: float
+
+    def __str__(self) -> str:
+        return f"{self.rate:g}/s burst {self.capacity:g}"
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    remaining: float
+    retry_after: float
+
+
+def parse_rate_limit(value: str) -> RateLimit:
+    """Parse ``"100/minute"``, ``"5/10 seconds"`` or ``"10/second burst 50"``.
+
+    The burst defaults to the request count of the period.
+    """
+
+    match = _LIMIT_PATTERN.match(value.lower())
+    if match is None:
+        raise ValueError(f"Invalid rate limit '{value}', expected e.g. '100/minute' or '10/second burst 50'.")
+
+    count, multiplier, period, burst = match.groups()
+    seconds = _PERIODS[period] * (int(multiplier) if multiplier else 1)
+    if int(count) <= 0:
+        raise ValueError(f"Invalid rate limit '{value}', the request count must be positive.")
+    return RateLimit(rate=int(count) / seconds, capacity=float(burst or count))
+
+
+class RateLimitBackend(ABC):
+    """Storage of token buckets.
+
+    Implement :meth:`acquire` atomically over a store shared by every worker (for
+    example a Redis script) to enforce limits across processes instead of per process.
+    """
+
+    @abstractmethod
+    async def acquire(self, key: str, limit: RateLimit, cost: float = 1.0) -> RateLimitResult:
+        ...
+
+    async def reset(self) -> None:
+        """Forget every bucket."""
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """Per-process buckets, O(1) per request, with idle buckets evicted periodically.
+
+    A bucket is dropped once it has refilled completely, which is indistinguishable
+    from keeping it. Eviction sweeps run at most every ``sweep_interval`` seconds.
+    """
+
+    def __init__(self, sweep_interval: float = 60.0) -> None:
+        self.sweep_interval = sweep_interval
+        # key -> [tokens, updated at, full at]
+        self._buckets: Dict[str, List[float]] = {}
+        self._next_sweep = time.monotonic() + sweep_interval
+
+    def take(self, key: str, limit: RateLimit, cost: float = 1.0) -> RateLimitResult:
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            self.sweep(now)
+
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            tokens = limit.capacity
+            bucket = self._buckets[key] = [tokens, now, now]
+        else:
+            tokens = min(limit.capacity, bucket[0] + (now - bucket[1]) * limit.rate)
+
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        bucket[0] = tokens
+        bucket[1] = now
+        bucket[2] = now + (limit.capacity - tokens) / limit.rate
+
+        if allowed:
+            return RateLimitResult(True, tokens, 0.0)
+        return RateLimitResult(False, tokens, (cost - tokens) / limit.rate)
+
+    async def acquire(self, key: str, limit: RateLimit, cost: float = 1.0) -> RateLimitResult:
+        return self.take(key, limit, cost)
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Drop the buckets that are full again and return how many were dropped."""
+
+        now = time.monotonic() if now is None else now
+        self._next_sweep = now + self.sweep_interval
+        idle = [key for key, (_, _, full_at) in self._buckets.items() if full_at <= now]
+        for key in idle:
+            del self._buckets[key]
+        return len(idle)
+
+    async def reset(self) -> None:
+        self._buckets.clear()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
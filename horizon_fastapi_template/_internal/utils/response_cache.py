@@ -0,0 +1,509 @@
+"""Route level HTTP response cache with ETags and stale-while-revalidate.
+
+Routes opt in with the :func:`cache_response` decorator or by adding a
+:class:`ResponseCachePolicy` to their dependencies; ``TemplateAPIRoute`` then serves
+their GET responses through :meth:`ResponseCachePolicy.serve`.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from fastapi import Request, Response
+from loguru import logger
+from prometheus_client import Counter, Gauge
+from starlette.datastructures import MutableHeaders
+from starlette.routing import compile_path
+
+from . import settings
+
+__all__ = [
+    "CachedResponse",
+    "ResponseCacheBackend",
+    "MemoryCacheBackend",
+    "FileCacheBackend",
+    "ResponseCachePolicy",
+    "cache_response",
+    "get_response_cache_policy",
+]
+
+RESPONSE_CACHE_REQUESTS = Counter(
+    "http_response_cache_requests_total",
+    "Response cache lookups of cached routes",
+    ["route", "result"],
+)
+
+RESPONSE_CACHE_HIT_RATIO = Gauge(
+    "http_response_cache_hit_ratio",
+    "Share of cached route requests served from the cache, fresh, stale or as 304",
+    ["route"],
+)
+
+RESPONSE_CACHE_BYTES = Gauge(
+    "http_response_cache_bytes",
+    "Bytes of response bodies held by in-memory response caches",
+)
+
+POLICY_ATTRIBUTE = "__response_cache__"
+CACHE_STATUS_HEADER = "X-Cache"
+# scope key marking the request replayed through the application to refresh a stale entry
+REFRESH_SCOPE_KEY = "response_cache.refresh"
+# scope keys set by the server, the rest is left for the application to fill in again
+_SERVER_SCOPE_KEYS = (
+    "type", "asgi", "http_version", "method", "scheme", "path", "raw_path", "root_path",
+    "query_string", "headers", "client", "server", "state", "extensions",
+)
+
+Handler = Callable[[Request], Awaitable[Response]]
+
+
+@dataclass
+class CachedResponse:
+    status_code: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+    etag: str
+    stored_at: float
+    fresh_until: float
+    stale_until: float
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(name) + len(value) for name, value in self.headers)
+
+    def is_fresh(self, now: float) -> bool:
+        return now < self.fresh_until
+
+    def to_bytes(self) -> bytes:
+        meta = {
+            "status_code": self.status_code,
+            "headers": [[name.decode("latin-1"), value.decode("latin-1")] for name, value in self.headers],
+            "etag": self.etag,
+            "stored_at": self.stored_at,
+            "fresh_until": self.fresh_until,
+            "stale_until": self.stale_until,
+        }
+        return json.dumps(meta, separators=(",", ":")).encode() + b"\n" + self.body
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CachedResponse":
+        meta, _, body = data.partition(b"\n")
+        fields = json.loads(meta)
+        fields["headers"] = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in fields["headers"]]
+        return cls(body=body, **fields)
+
+
+class ResponseCacheBackend(ABC):
+    """Storage of cached responses; entries are dropped once ``stale_until`` is past."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, entry: CachedResponse) -> None:
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    async def clear(self) -> None:
+        ...
+
+
+class MemoryCacheBackend(ResponseCacheBackend):
+    """Per-process LRU bounded by entry count and total bytes."""
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+
+    def _discard(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry.size
+            RESPONSE_CACHE_BYTES.dec(entry.size)
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.stale_until <= time.time():
+            self._discard(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    async def set(self, key: str, entry: CachedResponse) -> None:
+        self._discard(key)
+        if entry.size > self.max_bytes:
+            return
+
+        self._entries[key] = entry
+        self.bytes += entry.size
+        RESPONSE_CACHE_BYTES.inc(entry.size)
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            self._discard(next(iter(self._entries)))
+
+    async def delete(self, key: str) -> None:
+        self._discard(key)
+
+    async def clear(self) -> None:
+        RESPONSE_CACHE_BYTES.dec(self.bytes)
+        self._entries.clear()
+        self.bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class FileCacheBackend(ResponseCacheBackend):
+    """One file per entry in ``directory``, shared by every worker on the host.
+
+    Writes are atomic renames so readers never see partial entries. There is no size
+    bound beyond expiry; point it at a tmpfs mount for a shared-memory store.
+    """
+
+    def __init__(self, directory: Union[str, Path]) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / hashlib.sha256(key.encode()).hexdigest()
+
+    def _read(self, key: str) -> Optional[CachedResponse]:
+        path = self._path(key)
+        try:
+            entry = CachedResponse.from_bytes(path.read_bytes())
+        except FileNotFoundError:
+            return None
+        except (ValueError, TypeError, KeyError):
+            logger.warning(f"Dropping unreadable response cache entry {path}")
+            path.unlink(missing_ok=True)
+            return None
+
+        if entry.stale_until <= time.time():
+            path.unlink(missing_ok=True)
+            return None
+        return entry
+
+    def _write(self, key: str, entry: CachedResponse) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(entry.to_bytes())
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    def _clear(self) -> None:
+        for path in self.directory.iterdir():
+            path.unlink(missing_ok=True)
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        return await asyncio.to_thread(self._read, key)
+
+    async def set(self, key: str, entry: CachedResponse) -> None:
+        await asyncio.to_thread(self._write, key, entry)
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(self._path(key).unlink, missing_ok=True)
+
+    async def clear(self) -> None:
+        await asyncio.to_thread(self._clear)
+
+
+_default_backend: Optional[ResponseCacheBackend] = None
+
+
+def _get_default_backend() -> ResponseCacheBackend:
+    global _default_backend
+    if _default_backend is None:
+        _default_backend = MemoryCacheBackend(
+            max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+            max_bytes=settings.RESPONSE_CACHE_MAX_BYTES,
+        )
+    return _default_backend
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    return any(
+        (tag.strip()[2:] if tag.strip().startswith("W/") else tag.strip()) == opaque
+        for tag in if_none_match.split(",")
+    )
+
+
+def _header_names(value: str) -> Tuple[str, ...]:
+    return tuple(sorted({name.strip().lower() for name in value.split(",") if name.strip()}))
+
+
+class ResponseCachePolicy:
+    """Caching rules of one route.
+
+    Responses are fresh for ``ttl`` seconds, then served stale for up to
+    ``stale_while_revalidate`` more seconds while a single background call refreshes
+    them. Keys cover the path, the query string and the request headers named in
+    ``vary`` or in the response's own ``Vary`` header. Concurrent misses on a key wait
+    for one handler call instead of each calling it. Requests carrying an
+    ``Authorization`` header bypass the cache unless ``vary`` lists it.
+
+    Use it as a dependency, ``dependencies=[Depends(ResponseCachePolicy(ttl=5))]``, or
+    through :func:`cache_response`.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        *,
+        stale_while_revalidate: float = 0.0,
+        vary: Sequence[str] = (),
+        backend: Optional[ResponseCacheBackend] = None,
+        statuses: Sequence[int] = (200,),
+    ) -> None:
+        if ttl <= 0:
+            raise ValueError("ttl must be positive.")
+        self.ttl = ttl
+        self.stale_while_revalidate = stale_while_revalidate
+        self.vary = _header_names(",".join(vary))
+        self._backend = backend
+        self.statuses = frozenset(statuses)
+        # by route path template, so it stays bounded by the routes using the policy
+        self._learned_vary: Dict[str, Tuple[str, ...]] = {}
+        self._inflight: Dict[str, "asyncio.Future[Optional[CachedResponse]]"] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._served = 0
+        self._hits = 0
+
+    async def __call__(self) -> None:
+        """No-op so the policy can be declared as a route dependency."""
+
+    @property
+    def backend(self) -> ResponseCacheBackend:
+        return self._backend if self._backend is not None else _get_default_backend()
+
+    def _key(self, request: Request, base: str, vary: Tuple[str, ...]) -> str:
+        headers = request.headers
+        return base + "".join(f"|{name}={headers.get(name, '')}" for name in vary)
+
+    def _record(self, route: str, result: str) -> None:
+        RESPONSE_CACHE_REQUESTS.labels(route, result).inc()
+        self._served += 1
+        if result != "miss":
+            self._hits += 1
+        RESPONSE_CACHE_HIT_RATIO.labels(route).set(self._hits / self._served)
+
+    def _cacheable(self, response: Response) -> bool:
+        if response.status_code not in self.statuses or not hasattr(response, "body"):
+            return False
+        headers = response.headers
+        cache_control = headers.get("cache-control", "")
+        return (
+            "set-cookie" not in headers
+            and "no-store" not in cache_control
+            and "private" not in cache_control
+            and headers.get("vary", "").strip() != "*"
+        )
+
+    def _entry(self, response: Response) -> CachedResponse:
+        now = time.time()
+        etag = response.headers.get("etag") or _etag(response.body)
+        if "etag" not in response.headers:
+            response.headers["ETag"] = etag
+        return CachedResponse(
+            status_code=response.status_code,
+            headers=list(response.raw_headers),
+            body=response.body,
+            etag=etag,
+            stored_at=now,
+            fresh_until=now + self.ttl,
+            stale_until=now + self.ttl + self.stale_while_revalidate,
+        )
+
+    async def _store(self, request: Request, base: str, route: str, response: Response) -> Optional[CachedResponse]:
+        if not self._cacheable(response):
+            return None
+
+        entry = self._entry(response)
+        vary = tuple(sorted(set(self.vary) | set(_header_names(response.headers.get("vary", "")))))
+        self._learned_vary[route] = vary
+        await self.backend.set(self._key(request, base, vary), entry)
+        return entry
+
+    @staticmethod
+    def _not_modified(request: Request, entry: CachedResponse) -> Optional[Response]:
+        if_none_match = request.headers.get("if-none-match")
+        if not if_none_match or not _etag_matches(if_none_match, entry.etag):
+            return None
+        response = Response(status_code=304)
+        response.headers["ETag"] = entry.etag
+        return response
+
+    def _respond(self, request: Request, entry: CachedResponse, status: str) -> Response:
+        response = self._not_modified(request, entry)
+        if response is None:
+            response = Response(status_code=entry.status_code)
+            response.body = entry.body
+            response.raw_headers = list(entry.headers)
+        headers = MutableHeaders(raw=response.raw_headers)
+        headers["Age"] = str(max(0, int(time.time() - entry.stored_at)))
+        headers[CACHE_STATUS_HEADER] = status
+        return response
+
+    async def _refresh(self, request: Request) -> None:
+        """Recompute a stale entry outside of the request that noticed it.
+
+        The request is replayed through the application, whose cached route stores
+        the new response instead of answering from the cache. Marked with
+        ``REFRESH_SCOPE_KEY``, it is not rate limited, logged or traced.
+        """
+
+        scope = {key: request.scope[key] for key in _SERVER_SCOPE_KEYS if key in request.scope}
+        scope[REFRESH_SCOPE_KEY] = True
+        received = False
+        responded = asyncio.Event()
+        status: List[int] = []
+
+        async def receive() -> Dict[str, Any]:
+            nonlocal received
+            if not received:
+                received = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await responded.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                status.append(message["status"])
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                responded.set()
+
+        try:
+            await request.app(scope, receive, send)
+        except Exception as exc:  # noqa: BLE001 - the stale entry keeps being served
+            logger.warning(f"Refreshing cached response of {request.url.path} failed: {exc}")
+            return
+        if status and status[0] not in self.statuses:
+            logger.warning(f"Refreshing cached response of {request.url.path} answered {status[0]}")
+
+    async def serve(self, handler: Handler, request: Request, route: str) -> Response:
+        """Answer ``request`` from the cache, calling ``handler`` on misses."""
+
+        if "authorization" in request.headers and "authorization" not in self.vary:
+            return await handler(request)
+
+        base = f"{request.method} {request.url.path}?{'&'.join(sorted(request.url.query.split('&')))}"
+        key = self._key(request, base, self._learned_vary.get(route, self.vary))
+
+        if request.scope.get(REFRESH_SCOPE_KEY):
+            response = await handler(request)
+            await self._store(request, base, route, response)
+            return response
+
+        entry = await self.backend.get(key)
+        if entry is not None:
+            if entry.is_fresh(time.time()):
+                self._record(route, "hit")
+                return self._respond(request, entry, "HIT")
+
+            if key not in self._refreshing:
+                task = asyncio.create_task(self._refresh(request))
+                self._refreshing[key] = task
+                task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+            self._record(route, "stale")
+            return self._respond(request, entry, "STALE")
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            entry = await asyncio.shield(inflight)
+            if entry is not None:
+                self._record(route, "coalesced")
+                return self._respond(request, entry, "HIT")
+
+        self._record(route, "miss")
+        future: "asyncio.Future[Optional[CachedResponse]]" = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        entry = None
+        try:
+            response = await handler(request)
+            entry = await self._store(request, base, route, response)
+        finally:
+            future.set_result(entry)
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+        if entry is None:
+            return response
+        # the handler's own response keeps its background tasks
+        not_modified = self._not_modified(request, entry)
+        if not_modified is not None:
+            not_modified.background = response.background
+            return not_modified
+        response.headers[CACHE_STATUS_HEADER] = "MISS"
+        return response
+
+    async def invalidate(self, path: str, query: str = "") -> None:
+        """Drop the cached GET response of ``path`` for requests without varying headers."""
+
+        base = f"GET {path}?{'&'.join(sorted(query.split('&')))}"
+        vary = next(
+            (vary for route, vary in self._learned_vary.items() if compile_path(route)[0].match(path)),
+            self.vary,
+        )
+        await self.backend.delete(base + "".join(f"|{name}=" for name in vary))
+
+
+def cache_response(
+    ttl: float,
+    *,
+    stale_while_revalidate: float = 0.0,
+    vary: Sequence[str] = (),
+    backend: Optional[ResponseCacheBackend] = None,
+    statuses: Sequence[int] = (200,),
+) -> Callable[[Callable], Callable]:
+    """Decorate a GET endpoint (below the route decorator) to cache its responses."""
+
+    policy = ResponseCachePolicy(
+        ttl,
+        stale_while_revalidate=stale_while_revalidate,
+        vary=vary,
+        backend=backend,
+        statuses=statuses,
+    )
+
+    def decorator(endpoint: Callable) -> Callable:
+        setattr(endpoint, POLICY_ATTRIBUTE, policy)
+        return endpoint
+
+    return decorator
+
+
+def get_response_cache_policy(endpoint: Callable, dependencies: Sequence[Any] = ()) -> Optional[ResponseCachePolicy]:
+    """Find the policy attached to an endpoint or declared among its dependencies."""
+
+    policy = getattr(endpoint, POLICY_ATTRIBUTE, None)
+    if policy is not None:
+        return policy
+    for dependency in dependencies:
+        if isinstance(getattr(dependency, "dependency", None), ResponseCachePolicy):
+            return dependency.dependency
+    return None
@@ -0,0 +1,116 @@
+"""Immutable per-application configuration derived from ``ApplicationSettings``."""
+
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple, Union
+
+from .config import ApplicationSettings
+
+__all__ = ["LiveConfig", "PathMatcher", "RuntimeConfig"]
+
+
+class PathMatcher:
+    """Match paths starting with, or matching as a regular expression, any of ``patterns``.
+
+    Prefixes are checked with a single ``str.startswith`` call and the patterns are
+    compiled into one alternation, so a lookup costs two C calls whatever their number.
+    """
+
+    __slots__ = ("patterns", "_regex")
+
+    def __init__(self, patterns: Iterable[str] = ()) -> None:
+        self.patterns: Tuple[str, ...] = tuple(patterns)
+        self._regex = re.compile("|".join(f"(?:{pattern})" for pattern in self.patterns)) if self.patterns else None
+
+    @classmethod
+    def of(cls, patterns: Union["PathMatcher", Sequence[str]]) -> "PathMatcher":
+        return patterns if isinstance(patterns, PathMatcher) else cls(patterns)
+
+    def __call__(self, path: str) -> bool:
+        return path.startswith(self.patterns) or (self._regex is not None and self._regex.match(path) is not None)
+
+    def __repr__(self) -> str:
+        return f"PathMatcher({list(self.patterns)!r})"
+
+
+@dataclass(frozen=True)
+class RuntimeConfig:
+    """Configuration of one application, computed once by ``general_create_app``.
+
+    ``settings`` is a private copy of the settings the application was created with and
+    must be treated as read-only. Values used on every request are precomputed: header
+    names as lowercase bytes and path lists as :class:`PathMatcher` instances. Proxy
+    prefixes are applied here instead of on the settings, so applications created from
+    different settings can share a process.
+    """
+
+    settings: ApplicationSettings
+    root_path: str
+    openapi_json_url: str
+    swagger_openapi_json_url: str
+    swagger_static_files: str
+    process_time_header: bytes
+    log_request_exclude: PathMatcher
+    rate_limit_exclude: PathMatcher
+
+    @classmethod
+    def from_settings(cls, settings: ApplicationSettings) -> "RuntimeConfig":
+        settings = settings.model_copy(deep=True)
+
+        root_path = settings.PROXY_LISTEN_PATH.rstrip("/") if settings.PROXIED else ""
+        log_request_exclude = list(settings.LOG_REQUEST_EXCLUDE_PATHS)
+        if root_path:
+            swagger_static_files = root_path + "/" + settings.SWAGGER_STATIC_FILES.lstrip("/")
+            swagger_openapi_json_url = root_path + "/" + settings.OPENAPI_JSON_URL.lstrip("/")
+            log_request_exclude += [root_path + "/" + path.lstrip("/") for path in settings.LOG_REQUEST_EXCLUDE_PATHS]
+        else:
+            swagger_static_files = settings.SWAGGER_STATIC_FILES
+            swagger_openapi_json_url = settings.SWAGGER_OPENAPI_JSON_URL
+
+        return cls(
+            settings=settings,
+            root_path=root_path,
+            openapi_json_url=settings.OPENAPI_JSON_URL,
+            swagger_openapi_json_url=swagger_openapi_json_url,
+            swagger_static_files=swagger_static_files,
+            process_time_header=settings.PROCESS_TIME_HEADER.lower().encode("latin-1"),
+            log_request_exclude=PathMatcher(log_request_exclude),
+            rate_limit_exclude=PathMatcher([
+                settings.PROBE_LIVENESS_PATH,
+                settings.PROBE_READINESS_PATH,
+                "/metrics",
+                settings.TRACES_PATH,
+                *settings.RATE_LIMIT_EXCLUDE_PATHS,
+            ]),
+        )
+
+
+class LiveConfig:
+    """The current :class:`RuntimeConfig` of an application, replaced as a whole on reload.
+
+    Readers compare :attr:`generation` with the one they last saw, an integer check per
+    request, and rebuild their state from :attr:`config` when it moved. ``swap`` publishes
+    the new config before bumping the generation, so a reader never sees a generation
+    newer than the config it reads next.
+
+    :attr:`file_values` holds the settings last read from the reloaded file, so a
+    reload only applies the ones edited since.
+    """
+
+    def __init__(self, config: RuntimeConfig) -> None:
+        self.config = config
+        self.generation = 0
+        self.file_values: Dict[str, Any] = {}
+        self._subscribers: List[Callable[[RuntimeConfig], None]] = []
+
+    def subscribe(self, callback: Callable[[RuntimeConfig], None]) -> None:
+        """Call ``callback`` with every new config."""
+
+        self._subscribers.append(callback)
+
+    def swap(self, config: RuntimeConfig) -> int:
+        self.config = config
+        self.generation += 1
+        for callback in self._subscribers:
+            callback(config)
+        return self.generation
@@ -0,0 +1,271 @@
+"""Lightweight request-scoped tracing built on context variables.
+
+Spans are only recorded while a sampled trace is active in the current context,
+so instrumented code pays a single ``ContextVar.get`` when tracing is off.
+"""
+
+import functools
+import inspect
+import os
+import random
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from .config import ApplicationSettings
+
+__all__ = [
+    "Span",
+    "Trace",
+    "Tracer",
+    "current_span",
+    "span",
+    "traced",
+    "record_span",
+    "server_timing",
+    "to_otlp",
+]
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class Trace:
+    __slots__ = ("trace_id", "spans")
+
+    def __init__(self) -> None:
+        self.trace_id = os.urandom(16).hex()
+        self.spans: List[Span] = []
+
+
+class Span:
+    __slots__ = (
+        "trace",
+        "span_id",
+        "parent_id",
+        "name",
+        "kind",
+        "attributes",
+        "start_time_ns",
+        "duration_ns",
+        "_perf_start",
+    )
+
+    def __init__(
+        self,
+        trace: Trace,
+        name: str,
+        parent_id: Optional[str] = None,
+        kind: int = SPAN_KIND_INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes or {}
+        self.start_time_ns = time.time_ns()
+        self.duration_ns: Optional[int] = None
+        self._perf_start = time.perf_counter_ns()
+        trace.spans.append(self)
+
+    def end(self) -> None:
+        if self.duration_ns is None:
+            self.duration_ns = time.perf_counter_ns() - self._perf_start
+
+    @property
+    def end_time_ns(self) -> int:
+        return self.start_time_ns + (self.duration_ns or 0)
+
+
+class Tracer:
+    """Samples traces and keeps finished ones in a bounded ring buffer.
+
+    Each application has its own, available as ``app.state.tracer``.
+    """
+
+    def __init__(self, sample_rate: float = 1.0, buffer_size: int = 1024) -> None:
+        self.sample_rate = sample_rate
+        self._buffer: Deque[Tuple[int, Trace]] = deque(maxlen=buffer_size)
+        self._sequence = 0
+
+    @classmethod
+    def from_settings(cls, settings: ApplicationSettings) -> "Tracer":
+        return cls(sample_rate=settings.TRACE_SAMPLE_RATE, buffer_size=settings.TRACE_BUFFER_SIZE)
+
+    def configure(self, *, sample_rate: float, buffer_size: int) -> None:
+        self.sample_rate = sample_rate
+        if buffer_size != self._buffer.maxlen:
+            self._buffer = deque(self._buffer, maxlen=buffer_size)
+
+    def should_sample(self) -> bool:
+        rate = self.sample_rate
+        if rate >= 1.0:
+            return True
+        if rate <= 0.0:
+            return False
+        return random.random() < rate
+
+    def finish(self, trace: Trace) -> None:
+        self._sequence += 1
+        self._buffer.append((self._sequence, trace))
+
+    @property
+    def sequence(self) -> int:
+        return self._sequence
+
+    def traces(self, since: int = 0, limit: Optional[int] = None) -> List[Trace]:
+        found = [trace for seq, trace in self._buffer if seq > since]
+        if limit is not None:
+            found = found[-limit:] if limit > 0 else []
+        return found
+
+    def clear(self) -> None:
+        self._buffer.clear()
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+@contextmanager
+def start_trace(name: str, attributes: Optional[Dict[str, Any]] = None) -> Iterator[Span]:
+    """Open the root span of a new trace in the current context."""
+
+    root = Span(Trace(), name, kind=SPAN_KIND_SERVER, attributes=attributes)
+    token = _current_span.set(root)
+    try:
+        yield root
+    finally:
+        root.end()
+        _current_span.reset(token)
+
+
+@contextmanager
+def span(name: str, kind: int = SPAN_KIND_INTERNAL, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Record a child span when a sampled trace is active, otherwise do nothing."""
+
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+
+    child = Span(parent.trace, name, parent.span_id, kind, attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    finally:
+        child.end()
+        _current_span.reset(token)
+
+
+def traced(name: str, kind: int = SPAN_KIND_INTERNAL) -> Callable[[Callable], Callable]:
+    """Decorate a function (sync or async) so every call is recorded as a span."""
+
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                if _current_span.get() is None:
+                    return await func(*args, **kwargs)
+                with span(name, kind):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _current_span.get() is None:
+                return func(*args, **kwargs)
+            with span(name, kind):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def record_span(
+    name: str,
+    perf_start_ns: int,
+    perf_end_ns: int,
+    kind: int = SPAN_KIND_INTERNAL,
+    **attributes: Any,
+) -> None:
+    """Record an already measured interval, for hook based instrumentation."""
+
+    parent = _current_span.get()
+    if parent is None:
+        return
+
+    child = Span(parent.trace, name, parent.span_id, kind, attributes)
+    child.start_time_ns -= time.perf_counter_ns() - perf_start_ns
+    child.duration_ns = perf_end_ns - perf_start_ns
+
+
+def server_timing(trace: Trace) -> str:
+    """Aggregate span durations by name into a ``Server-Timing`` header value."""
+
+    totals: Dict[str, int] = {}
+    for item in trace.spans:
+        duration = item.duration_ns
+        if duration is None:
+            duration = time.perf_counter_ns() - item._perf_start
+        totals[item.name] = totals.get(item.name, 0) + duration
+
+    return ", ".join(f"{name};dur={total / 1_000_000:.3f}" for name, total in totals.items())
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_span(item: Span) -> Dict[str, Any]:
+    data: Dict[str, Any] = {
+        "traceId": item.trace.trace_id,
+        "spanId": item.span_id,
+        "name": item.name,
+        "kind": item.kind,
+        "startTimeUnixNano": str(item.start_time_ns),
+        "endTimeUnixNano": str(item.end_time_ns),
+        "attributes": [
+            {"key": key, "value": _otlp_value(value)} for key, value in item.attributes.items()
+        ],
+    }
+    if item.parent_id:
+        data["parentSpanId"] = item.parent_id
+    return data
+
+
+def to_otlp(traces: List[Trace], service_name: str) -> Dict[str, Any]:
+    """Render traces as an OTLP/JSON ``ExportTraceServiceRequest`` document."""
+
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [
+                        {"key": "service.name", "value": {"stringValue": service_name}}
+                    ]
+                },
+                "scopeSpans": [
+                    {
+                        "scope": {"name": "horizon_fastapi_template"},
+                        "spans": [_otlp_span(item) for trace in traces for item in trace.spans],
+                    }
+                ],
+            }
+        ]
+    }
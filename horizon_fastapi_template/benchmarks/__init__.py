@@ -0,0 +1,6 @@
+"""In-process load and latency benchmarks for the application factory."""
+
+from .runner import BenchmarkResult, compare, run_suite
+from .scenarios import Endpoint, Scenario, build_scenarios
+
+__all__ = ["BenchmarkResult", "Endpoint", "Scenario", "build_scenarios", "compare", "run_suite"]
@@ -0,0 +1,80 @@
+"""Command line entrypoint: ``python -m horizon_fastapi_template.benchmarks``."""
+
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+from .runner import compare, run_suite
+from .scenarios import build_scenarios
+
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the overhead of general_create_app.")
+    parser.add_argument("--matrix", choices=["minimal", "each", "full"], default="each",
+                        help="flag combinations: defaults/all on/all off, each flag toggled, "
+                             "or every combination of the per-request flags")
+    parser.add_argument("--endpoint", action="append", dest="endpoints",
+                        help="only benchmark the named endpoint, may be repeated")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--repeats", type=int, default=3,
+                        help="runs of every scenario, the median of each metric is reported")
+    parser.add_argument("--alloc-requests", type=int, default=20,
+                        help="requests measured under tracemalloc, 0 disables allocation tracking")
+    parser.add_argument("--output", type=Path, help="write results JSON here instead of stdout")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.35,
+                        help="relative throughput/p50 change tolerated before reporting a regression")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5,
+                        help="smallest p50 increase, in milliseconds, reported as a regression")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = _parse_args()
+
+    results = asyncio.run(
+        run_suite(
+            build_scenarios(args.matrix, args.endpoints),
+            requests=args.requests,
+            warmup=args.warmup,
+            concurrency=args.concurrency,
+            repeats=args.repeats,
+            alloc_requests=args.alloc_requests,
+        )
+    )
+
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n")
+        return 0
+
+    regressions = []
+    if args.baseline.exists():
+        regressions = compare(
+            results, json.loads(args.baseline.read_text()), args.tolerance, args.min_delta_ms
+        )
+    results["regressions"] = regressions
+
+    rendered = json.dumps(results, indent=2)
+    if args.output:
+        args.output.write_text(rendered + "\n")
+    else:
+        print(rendered)
+
+    for regression in regressions:
+        print(
+            f"REGRESSION {regression['scenario']}/{regression['endpoint']} {regression['metric']}: "
+            f"{regression['baseline']} -> {regression['current']}",
+            file=sys.stderr,
+        )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+"""Drive scenarios in-process over ASGI and compare results with a baseline."""
+
+import asyncio
+import platform
+import statistics
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import fastapi
+from httpx import ASGITransport, AsyncClient
+
+from .scenarios import Endpoint, Scenario
+from .._internal.utils import logger_config
+
+
+@dataclass
+class BenchmarkResult:
+    scenario: str
+    endpoint: str
+    requests: int
+    concurrency: int
+    throughput_rps: float
+    p50_ms: float
+    p99_ms: float
+    alloc_bytes_per_request: float
+
+
+def _percentile(values: List[float], percentile: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(percentile / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def _request(client: AsyncClient, endpoint: Endpoint) -> None:
+    response = await client.request(endpoint.method, endpoint.path, json=endpoint.json)
+    if response.status_code != endpoint.expected_status:
+        raise RuntimeError(
+            f"{endpoint.method} {endpoint.path} returned {response.status_code}, "
+            f"expected {endpoint.expected_status}"
+        )
+
+
+async def _measure_latency(
+    client: AsyncClient, endpoint: Endpoint, requests: int, concurrency: int
+) -> Tuple[float, List[float]]:
+    latencies: List[float] = []
+    remaining = iter(range(requests))
+
+    async def worker() -> None:
+        for _ in remaining:
+            start = time.perf_counter()
+            await _request(client, endpoint)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start, latencies
+
+
+async def _measure_allocations(client: AsyncClient, endpoint: Endpoint, requests: int) -> float:
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(requests):
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            await _request(client, endpoint)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+    finally:
+        tracemalloc.stop()
+    return statistics.fmean(peaks) if peaks else 0.0
+
+
+async def run_scenario(
+    scenario: Scenario,
+    *,
+    requests: int = 500,
+    warmup: int = 50,
+    concurrency: int = 1,
+    alloc_requests: int = 20,
+) -> List[BenchmarkResult]:
+    results = []
+    transport = ASGITransport(app=scenario.create_app())
+
+    async with AsyncClient(transport=transport, base_url="http://bench") as client:
+        for endpoint in scenario.endpoints:
+            for _ in range(warmup):
+                await _request(client, endpoint)
+
+            elapsed, latencies = await _measure_latency(client, endpoint, requests, concurrency)
+            allocations = await _measure_allocations(client, endpoint, alloc_requests) if alloc_requests else 0.0
+
+            results.append(
+                BenchmarkResult(
+                    scenario=scenario.name,
+                    endpoint=endpoint.name,
+                    requests=requests,
+                    concurrency=concurrency,
+                    throughput_rps=round(requests / elapsed, 2),
+                    p50_ms=round(_percentile(latencies, 50), 4),
+                    p99_ms=round(_percentile(latencies, 99), 4),
+                    alloc_bytes_per_request=round(allocations, 1),
+                )
+            )
+    return results
+
+
+def _median_result(runs: List[BenchmarkResult]) -> BenchmarkResult:
+    first = runs[0]
+    return BenchmarkResult(
+        scenario=first.scenario,
+        endpoint=first.endpoint,
+        requests=first.requests,
+        concurrency=first.concurrency,
+        throughput_rps=statistics.median(run.throughput_rps for run in runs),
+        p50_ms=statistics.median(run.p50_ms for run in runs),
+        p99_ms=statistics.median(run.p99_ms for run in runs),
+        alloc_bytes_per_request=statistics.median(run.alloc_bytes_per_request for run in runs),
+    )
+
+
+async def run_suite(scenarios: List[Scenario], *, repeats: int = 3, **options: Any) -> Dict[str, Any]:
+    """Run every scenario ``repeats`` times and report the median of each metric.
+
+    The rounds go through all the scenarios in turn, so a slow spell of the machine is
+    spread over them instead of skewing one.
+    """
+
+    runs: Dict[Tuple[str, str], List[BenchmarkResult]] = {}
+    # keep the formatting cost of request logging, drop the terminal I/O
+    with logger_config.muted():
+        for _ in range(repeats):
+            for scenario in scenarios:
+                for result in await run_scenario(scenario, **options):
+                    runs.setdefault((result.scenario, result.endpoint), []).append(result)
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "fastapi": fastapi.__version__,
+            "repeats": repeats,
+            **options,
+        },
+        "results": [asdict(_median_result(results)) for results in runs.values()],
+    }
+
+
+def compare(
+    current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.35, min_delta_ms: float = 0.5
+) -> List[Dict[str, Any]]:
+    """Return throughput or median latency regressions larger than ``tolerance``.
+
+    Median latencies below a millisecond jitter by a large fraction of themselves, so
+    they only count as regressed once they also grew by ``min_delta_ms``.
+    """
+
+    previous = {(item["scenario"], item["endpoint"]): item for item in baseline.get("results", [])}
+    regressions = []
+
+    for item in current["results"]:
+        reference: Optional[Dict[str, Any]] = previous.get((item["scenario"], item["endpoint"]))
+        if reference is None:
+            continue
+
+        checks = (
+            ("throughput_rps", item["throughput_rps"] < reference["throughput_rps"] * (1 - tolerance)),
+            (
+                "p50_ms",
+                item["p50_ms"] > reference["p50_ms"] * (1 + tolerance)
+                and item["p50_ms"] - reference["p50_ms"] > min_delta_ms,
+            ),
+        )
+        for metric, regressed in checks:
+            if regressed:
+                regressions.append(
+                    {
+                        "scenario": item["scenario"],
+                        "endpoint": item["endpoint"],
+                        "metric": metric,
+                        "baseline": reference[metric],
+                        "current": item[metric],
+                    }
+                )
+    return regressions
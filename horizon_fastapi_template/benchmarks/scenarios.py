@@ -0,0 +1,173 @@
+"""Factory configurations and endpoints exercised by the benchmark suite."""
+
+import inspect
+import itertools
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import strawberry
+from fastapi.responses import JSONResponse
+
+from .._internal import general_create_app
+from .._internal.models import GraphQLVersion
+from .._internal.utils import settings
+from .._internal.utils.fast_json import FastJSONResponse
+
+FLAGS: List[str] = [
+    name
+    for name, parameter in inspect.signature(general_create_app).parameters.items()
+    if name.startswith("enable_")
+]
+DEFAULT_FLAGS: Dict[str, bool] = {
+    name: inspect.signature(general_create_app).parameters[name].default for name in FLAGS
+}
+# flags adding work to every request, combined by the full matrix; the others keep their default
+FULL_MATRIX_FLAGS: List[str] = [
+    "enable_logging_middleware",
+    "enable_time_recording_middleware",
+    "enable_tracing_middleware",
+    "enable_fast_json",
+    "enable_compression_middleware",
+    "enable_rate_limit_middleware",
+]
+
+
+@strawberry.type
+class Item:
+    id: int
+    name: str
+
+
+@strawberry.type
+class Query:
+    @strawberry.field
+    def hello(self) -> str:
+        return "world"
+
+    @strawberry.field
+    def items(self, count: int = 10) -> List[Item]:
+        return [Item(id=index, name=f"item-{index}") for index in range(count)]
+
+
+GRAPHQL_QUERY = "query Items { hello items(count: 20) { id name } }"
+
+LARGE_JSON_PATH = "/benchmark/large-json"
+# ~200 KB body, where the JSON encoder dominates the request cost
+LARGE_PAYLOAD: Dict[str, Any] = {
+    "items": [
+        {
+            "id": index,
+            "name": f"item-{index}",
+            "enabled": index % 2 == 0,
+            "score": index / 7,
+            "tags": ["alpha", "beta", "gamma"],
+            "labels": {"team": "horizon", "tier": str(index % 3)},
+        }
+        for index in range(1500)
+    ]
+}
+
+
+def create_benchmark_app(**kwargs: Any) -> Any:
+    """``general_create_app`` plus a route rendering a large body with the app's JSON class."""
+
+    # a limit that never triggers, so the rate limiter is measured without 429s
+    kwargs.setdefault("settings", settings.model_copy(update={"RATE_LIMIT_DEFAULT": "1000000/second"}))
+    app = general_create_app(**kwargs)
+    response_class = FastJSONResponse if kwargs.get("enable_fast_json") else JSONResponse
+
+    @app.get(LARGE_JSON_PATH, include_in_schema=False)
+    def large_json():
+        # returned as a response, like the exception handlers, so the encoder is measured
+        # rather than FastAPI's jsonable_encoder pass over untyped return values
+        return response_class(LARGE_PAYLOAD)
+
+    return app
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    name: str
+    method: str
+    path: str
+    json: Optional[Dict[str, Any]] = None
+    expected_status: int = 200
+    requires: Optional[str] = None
+
+
+@dataclass
+class Scenario:
+    name: str
+    flags: Dict[str, bool]
+    endpoints: List[Endpoint]
+    app_kwargs: Dict[str, Any] = field(default_factory=dict)
+    app_factory: Callable[..., Any] = create_benchmark_app
+
+    def create_app(self) -> Any:
+        return self.app_factory(**self.flags, **self.app_kwargs)
+
+
+def _endpoints() -> List[Endpoint]:
+    return [
+        Endpoint("root", "GET", "/", requires="enable_root_route"),
+        Endpoint("metrics", "GET", "/metrics", requires="enable_metrics_route"),
+        Endpoint("openapi", "GET", settings.OPENAPI_JSON_URL),
+        Endpoint("liveness", "GET", settings.PROBE_LIVENESS_PATH, requires="enable_probe_routes"),
+        Endpoint("readiness", "GET", settings.PROBE_READINESS_PATH, requires="enable_probe_routes"),
+        Endpoint("not_found", "GET", "/does-not-exist", expected_status=404),
+        Endpoint("graphql", "POST", "/graphql/v1", json={"query": GRAPHQL_QUERY}),
+        Endpoint("large_json", "GET", LARGE_JSON_PATH),
+    ]
+
+
+def _graphql_versions() -> List[GraphQLVersion]:
+    return [GraphQLVersion(version="v1", graphql_schema=strawberry.Schema(query=Query))]
+
+
+def _flag_sets(matrix: str) -> Dict[str, Dict[str, bool]]:
+    if matrix == "full":
+        return {
+            "+".join(name[len("enable_"):] for name, on in zip(FULL_MATRIX_FLAGS, values) if on) or "none": {
+                **DEFAULT_FLAGS,
+                **dict(zip(FULL_MATRIX_FLAGS, values)),
+            }
+            for values in itertools.product((True, False), repeat=len(FULL_MATRIX_FLAGS))
+        }
+
+    flag_sets = {
+        "defaults": dict(DEFAULT_FLAGS),
+        "all_on": {name: True for name in FLAGS},
+        "all_off": {name: False for name in FLAGS},
+    }
+    if matrix == "each":
+        for name in FLAGS:
+            toggled = dict(DEFAULT_FLAGS)
+            toggled[name] = not toggled[name]
+            flag_sets[f"{'without' if DEFAULT_FLAGS[name] else 'with'}_{name[len('enable_'):]}"] = toggled
+    return flag_sets
+
+
+def build_scenarios(matrix: str = "each", endpoints: Optional[List[str]] = None) -> List[Scenario]:
+    """Build scenarios for ``minimal`` (defaults, all on, all off), ``each`` or ``full`` flag matrices.
+
+    ``full`` combines the :data:`FULL_MATRIX_FLAGS` only, 2^6 apps rather than one per
+    combination of every flag.
+    """
+
+    scenarios = []
+    for name, flags in _flag_sets(matrix).items():
+        selected = [
+            endpoint
+            for endpoint in _endpoints()
+            if (endpoint.requires is None or flags[endpoint.requires])
+            and (endpoints is None or endpoint.name in endpoints)
+        ]
+        scenarios.append(
+            Scenario(
+                name=name,
+                flags=flags,
+                endpoints=selected,
+                app_kwargs={"graphql_versions": _graphql_versions()},
+            )
+        )
+    return scenarios
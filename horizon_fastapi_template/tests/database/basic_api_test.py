@@ -1,8 +1,21 @@
 # tests/test_base_api.py
+import asyncio
+import json
+import time
+
 import pytest
 import httpx
 import respx
+from fastapi import FastAPI
 from ..._internal.database.basic_api import BaseAPI  # adjust import path if needed
+from ..._internal.database.pagination import (
+    ChainedPagination,
+    CursorPagination,
+    LinkHeaderPagination,
+    OffsetPagination,
+    PageNumberPagination,
+)
+from ..._internal.utils.json_stream import iter_json_items
 
 # --------------------------- tests for BaseAPI ---------------------------
 
@@ -142,3 +155,272 @@ async def test_base_api_timeout():
             assert response.status_code == 200
             assert response.text == "ok"
             assert route.called
+
+# --------------------------- streaming tests ---------------------------
+
+def _chunked(data: bytes, size: int):
+    """Response content delivered ``size`` bytes at a time, recording how much was sent."""
+    sent = []
+
+    async def chunks():
+        for start in range(0, len(data), size):
+            sent.append(start + size)
+            yield data[start:start + size]
+
+    return chunks(), sent
+
+
+async def _text_chunks(text: str, size: int):
+    for start in range(0, len(text), size):
+        yield text[start:start + size]
+
+
+@pytest.mark.asyncio
+async def test_base_api_iter_ndjson_yields_records_as_lines_arrive():
+    api = BaseAPI(base_url="https://example.com")
+    body = b"".join(json.dumps({"id": index}).encode() + b"\n" for index in range(50)) + b"\n"
+    content, sent = _chunked(body, 7)
+    with respx.mock(base_url="https://example.com") as mock:
+        mock.get("/events").mock(return_value=httpx.Response(200, content=content))
+        records = []
+        async for record in api.iter_ndjson("/events"):
+            records.append(record)
+            if record["id"] == 0:
+                assert sent[-1] < len(body)
+
+    assert records == [{"id": index} for index in range(50)]
+
+
+@pytest.mark.asyncio
+async def test_base_api_iter_ndjson_raises_on_error_status():
+    api = BaseAPI(base_url="https://example.com")
+    with respx.mock(base_url="https://example.com") as mock:
+        mock.get("/events").respond(503)
+        with pytest.raises(httpx.HTTPStatusError):
+            async for _ in api.iter_ndjson("/events"):
+                pass
+
+
+@pytest.mark.asyncio
+async def test_base_api_iter_json_items_parses_arrays_incrementally():
+    api = BaseAPI(base_url="https://example.com")
+    items = [{"id": index, "name": f"item \u00e9 {index}", "tags": ["a", "b"]} for index in range(200)]
+    body = json.dumps({"meta": {"skip": [1, 2, {"x": "]"}]}, "data": {"items": items, "total": 200}}).encode()
+    content, sent = _chunked(body, 64)
+    with respx.mock(base_url="https://example.com") as mock:
+        mock.get("/items").mock(return_value=httpx.Response(200, content=content))
+        received = []
+        async for item in api.iter_json_items("/items", path=("data", "items"), chunk_size=64):
+            received.append(item)
+            if len(received) == 1:
+                assert sent[-1] < len(body) // 2
+
+    assert received == items
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("document, path, expected", [
+    ("[]", (), []),
+    (" [ 1 , 23.5e1 , -4 , true , null , \"a,]\" ] ", (), [1, 235.0, -4, True, None, "a,]"]),
+    ('{"a": 1, "rows": [[1, 2], {"b": [3]}]}', ("rows",), [[1, 2], {"b": [3]}]),
+    ("[12345678901234567890]", (), [12345678901234567890]),
+    ('[{"k": "a\\\\", "q": "}\\"]"}, "\\u00e9"]', (), [{"k": "a\\", "q": '}"]'}, "\u00e9"]),
+])
+async def test_iter_json_items_with_one_character_chunks(document, path, expected):
+    assert [item async for item in iter_json_items(_text_chunks(document, 1), path)] == expected
+
+
+@pytest.mark.asyncio
+async def test_iter_json_items_decodes_large_items_in_linear_time():
+    items = [{"blob": "x" * 1_000_000, "rows": [[index] for index in range(50_000)]}, 1]
+
+    start = time.perf_counter()
+    received = [item async for item in iter_json_items(_text_chunks(json.dumps(items), 100))]
+
+    assert received == items
+    assert time.perf_counter() - start < 2
+
+
+@pytest.mark.asyncio
+async def test_iter_json_items_reports_missing_paths_and_malformed_input():
+    with pytest.raises(KeyError):
+        async for _ in iter_json_items(_text_chunks('{"a": [1]}', 3), ("rows",)):
+            pass
+    with pytest.raises(json.JSONDecodeError):
+        async for _ in iter_json_items(_text_chunks("[1, 2", 3)):
+            pass
+    with pytest.raises(json.JSONDecodeError):
+        async for _ in iter_json_items(_text_chunks("[1 2]", 3)):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_base_api_download_to_file(tmp_path):
+    api = BaseAPI(base_url="https://example.com")
+    body = bytes(range(256)) * 1000
+    content, _ = _chunked(body, 4096)
+    with respx.mock(base_url="https://example.com") as mock:
+        mock.get("/blob").mock(return_value=httpx.Response(200, content=content))
+        size = await api.download_to_file("/blob", tmp_path / "blob.bin")
+
+    assert size == len(body)
+    assert (tmp_path / "blob.bin").read_bytes() == body
+
+
+@pytest.mark.asyncio
+async def test_base_api_proxy_streams_the_upstream_body():
+    api = BaseAPI(base_url="https://example.com")
+    body = b"x" * 200_000
+    content, _ = _chunked(body, 10_000)
+    app = FastAPI()
+
+    @app.get("/report")
+    async def report():
+        return await api.proxy("/report.csv", params={"year": 2024})
+
+    with respx.mock(base_url="https://example.com") as mock:
+        route = mock.get("/report.csv").mock(return_value=httpx.Response(
+            201,
+            content=content,
+            headers={"Content-Type": "text/csv", "Content-Disposition": "attachment", "Connection": "close"},
+        ))
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as ac:
+            response = await ac.get("/report")
+
+    assert route.calls[0].request.url.params["year"] == "2024"
+    assert response.status_code == 201
+    assert response.content == body
+    assert response.headers["content-type"] == "text/csv"
+    assert response.headers["content-disposition"] == "attachment"
+    assert "connection" not in response.headers
+
+# --------------------------- pagination tests ---------------------------
+
+class _SlowPages:
+    """Offset pages of ``total`` items, answered after ``delay`` seconds, tracking concurrency."""
+
+    def __init__(self, total, delay=0.02):
+        self.total = total
+        self.delay = delay
+        self.in_flight = self.peak = 0
+        self.offsets = []
+
+    async def __call__(self, request):
+        offset = int(request.url.params["offset"])
+        limit = int(request.url.params["limit"])
+        self.offsets.append(offset)
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        return httpx.Response(200, json={"items": list(range(offset, min(offset + limit, self.total)))})
+
+
+@pytest.mark.asyncio
+async def test_base_api_paginate_prefetches_offset_pages_in_order():
+    api = BaseAPI(base_url="https://example.com")
+    pages = _SlowPages(total=95)
+    with respx.mock(base_url="https://example.com") as mock:
+        mock.get("/items").mock(side_effect=pages)
+        items = [item async for item in api.paginate(
+            "/items", OffsetPagination(10, items_key="items"), params={"q": "x"}, prefetch=3
+        )]
+        assert mock.calls[0].request.url.params["q"] == "x"
+
+    assert items == list(range(95))
+    assert pages.peak == 4
+    # the last page (offset 90) is short, later prefetched pages are discarded
+    assert sorted(pages.offsets)[:10] == list(range(0, 100, 10))
+
+
+@pytest.mark.asyncio
+async def test_base_api_paginate_respects_connection_limits():
+    api = BaseAPI(base_url="https://example.com", limits=httpx.Limits(max_connections=2))
+    pages = _SlowPages(total=100)
+    with respx.mock(base_url="https://example.com") as mock:
+        mock.get("/items").mock(side_effect=pages)
+        items = [item async for item in api.paginate("/items", OffsetPagination(10, items_key="items"), prefetch=8)]
+
+    assert items == list(range(100))
+    assert pages.peak == 2
+
+
+@pytest.mark.asyncio
+async def test_base_api_paginate_stops_at_total():
+    api = BaseAPI(base_url="https://example.com")
+    with respx.mock(base_url="https://example.com") as mock:
+        route = mock.get("/users").mock(side_effect=lambda request: httpx.Response(200, json={
+            "data": [int(request.url.params["page"])] * 2,
+            "meta": {"total": 4},
+        }))
+        users = [user async for user in api.paginate(
+            "/users", PageNumberPagination(2, items_key="data", total_key="meta.total"), prefetch=0
+        )]
+
+    assert users == [1, 1, 2, 2]
+    assert [call.request.url.params["per_page"] for call in route.calls] == ["2", "2"]
+
+
+@pytest.mark.asyncio
+async def test_base_api_paginate_pipelines_cursor_pages():
+    api = BaseAPI(base_url="https://example.com")
+    cursors = {None: ("b", [1, 2]), "b": ("c", [3]), "c": (None, [4, 5])}
+    requested = []
+
+    def page(request):
+        cursor = request.url.params.get("cursor")
+        requested.append(cursor)
+        next_cursor, items = cursors[cursor]
+        return httpx.Response(200, json={"results": items, "paging": {"next": next_cursor}})
+
+    with respx.mock(base_url="https://example.com") as mock:
+        mock.get("/events").mock(side_effect=page)
+        items = []
+        async for item in api.paginate(
+            "/events", CursorPagination(cursor_key="paging.next", items_key="results"), params={"size": 2}
+        ):
+            if item == 1:
+                await asyncio.sleep(0.01)
+                # the second page was requested while the first one is processed
+                assert requested == [None, "b"]
+            items.append(item)
+
+        assert all(call.request.url.params["size"] == "2" for call in mock.calls)
+
+    assert items == [1, 2, 3, 4, 5]
+    assert requested == [None, "b", "c"]
+
+
+@pytest.mark.asyncio
+async def test_base_api_paginate_follows_link_headers():
+    api = BaseAPI(base_url="https://example.com")
+    with respx.mock(base_url="https://example.com") as mock:
+        mock.get("/repos", params={"page": "2"}).respond(200, json=[3])
+        mock.get("/repos").respond(200, json=[1, 2], headers={
+            "Link": '<https://example.com/repos?page=2>; rel="next", <https://example.com/repos?page=2>; rel="last"',
+        })
+        async with api:
+            repos = [repo async for repo in api.paginate("/repos", LinkHeaderPagination())]
+
+    assert repos == [1, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_base_api_paginate_raises_on_error_status():
+    api = BaseAPI(base_url="https://example.com")
+    with respx.mock(base_url="https://example.com") as mock:
+        mock.get("/items").respond(500)
+        with pytest.raises(httpx.HTTPStatusError):
+            async for _ in api.paginate("/items", OffsetPagination(10)):
+                pass
+
+
+def test_pagination_strategies_must_implement_their_methods():
+    class Incomplete(ChainedPagination):
+        def page_request(self, url, params, index):
+            return url, params
+
+    with pytest.raises(TypeError, match="next_request"):
+        Incomplete()
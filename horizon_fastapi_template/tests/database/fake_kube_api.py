@@ -0,0 +1,279 @@
+"""A minimal in-process Kubernetes API server for the Kubernetes helper tests.
+
+It serves discovery for a few resources and lists them with ``limit``/``continue``,
+equality label selectors, ``metadata.name``/``metadata.namespace`` field selectors and
+``PartialObjectMetadataList`` responses. Single objects can be created, read, replaced
+(checking ``resourceVersion``), patched (apply and merge patches both merge into the
+stored object) and deleted; ``fail`` queues error
+statuses returned to the next writes of an object, or lists of a resource plural. Every request is recorded in
+``requests``.
+"""
+
+import json
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from kubernetes_asyncio import client
+from kubernetes_asyncio.dynamic import DynamicClient
+
+# (group, version, plural) -> kind, namespaced
+RESOURCES: Dict[Tuple[str, str, str], Tuple[str, bool]] = {
+    ("", "v1", "pods"): ("Pod", True),
+    ("", "v1", "configmaps"): ("ConfigMap", True),
+    ("", "v1", "namespaces"): ("Namespace", False),
+    ("apps", "v1", "deployments"): ("Deployment", True),
+    ("coordination.k8s.io", "v1", "leases"): ("Lease", True),
+}
+
+
+def _matches_labels(obj: dict, selector: str) -> bool:
+    labels = obj["metadata"].get("labels") or {}
+    for requirement in filter(None, selector.split(",")):
+        key, _, value = requirement.partition("=")
+        if labels.get(key) != value:
+            return False
+    return True
+
+
+def _matches_fields(obj: dict, selector: str) -> bool:
+    for requirement in filter(None, selector.split(",")):
+        field, _, value = requirement.partition("=")
+        if obj["metadata"].get(field.split(".", 1)[1]) != value:
+            return False
+    return True
+
+
+def _merge(target: dict, patch: dict) -> None:
+    for key, value in patch.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge(target[key], value)
+        elif value is None:
+            target.pop(key, None)
+        else:
+            target[key] = value
+
+
+def _status(code: int, message: str) -> web.Response:
+    return web.json_response(
+        {"kind": "Status", "apiVersion": "v1", "status": "Failure", "message": message, "code": code},
+        status=code,
+        # as the API server's priority and fairness throttling does
+        headers={"Retry-After": "1"} if code == 429 else None,
+    )
+
+
+class FakeKubeAPI:
+    def __init__(self) -> None:
+        # (group, version, plural) -> list of objects
+        self.objects: Dict[Tuple[str, str, str], List[dict]] = {key: [] for key in RESOURCES}
+        self.requests: List[web.Request] = []
+        # object name or resource plural -> statuses answered to its next writes or lists
+        self.failures: Dict[str, List[int]] = {}
+        self.app = web.Application(middlewares=[self._record])
+        self.app.router.add_get("/version", self._version)
+        self.app.router.add_get("/apis", self._groups)
+        self.app.router.add_get("/api/{version}", self._resources)
+        self.app.router.add_get("/apis/{group}/{version}", self._resources)
+        for path in ("/api/{version}", "/apis/{group}/{version}"):
+            self.app.router.add_get(path + "/{plural}", self._list)
+            self.app.router.add_get(path + "/namespaces/{namespace}/{plural}", self._list)
+            self.app.router.add_post(path + "/namespaces/{namespace}/{plural}", self._create)
+            for prefix in (path, path + "/namespaces/{namespace}"):
+                self.app.router.add_get(prefix + "/{plural}/{name}", self._get)
+                self.app.router.add_put(prefix + "/{plural}/{name}", self._replace)
+                self.app.router.add_patch(prefix + "/{plural}/{name}", self._patch)
+                self.app.router.add_delete(prefix + "/{plural}/{name}", self._delete)
+
+    def add(self, group: str, version: str, plural: str, name: str, namespace: str = "default", **fields) -> dict:
+        kind, namespaced = RESOURCES[(group, version, plural)]
+        metadata = {"name": name, "resourceVersion": "1", **fields.pop("metadata", {})}
+        if namespaced:
+            metadata["namespace"] = namespace
+        obj = {"apiVersion": f"{group}/{version}" if group else version, "kind": kind, "metadata": metadata, **fields}
+        self.objects[(group, version, plural)].append(obj)
+        return obj
+
+    def get(self, group: str, version: str, plural: str, name: str, namespace: str = "default") -> Optional[dict]:
+        for obj in self.objects[(group, version, plural)]:
+            if obj["metadata"]["name"] == name and obj["metadata"].get("namespace", namespace) == namespace:
+                return obj
+        return None
+
+    def fail(self, name: str, *statuses: int) -> None:
+        self.failures.setdefault(name, []).extend(statuses)
+
+    def lists(self) -> List[web.Request]:
+        return [request for request in self.requests if request.match_info.get("plural") and "name" not in request.match_info]
+
+    def writes(self) -> List[web.Request]:
+        return [request for request in self.requests if request.method in ("POST", "PUT", "PATCH", "DELETE")]
+
+    @web.middleware
+    async def _record(self, request: web.Request, handler):
+        self.requests.append(request)
+        return await handler(request)
+
+    def _lookup(self, request: web.Request) -> Tuple[Tuple[str, str, str], Optional[dict]]:
+        key = (request.match_info.get("group", ""), request.match_info["version"], request.match_info["plural"])
+        namespace = request.match_info.get("namespace", "default")
+        return key, self.get(*key, request.match_info["name"], namespace)
+
+    def _failure(self, request: web.Request) -> Optional[web.Response]:
+        statuses = self.failures.get(request.match_info.get("name", request.match_info["plural"]))
+        if statuses:
+            return _status(statuses.pop(0), "injected failure")
+        return None
+
+    async def _get(self, request: web.Request) -> web.Response:
+        _, obj = self._lookup(request)
+        if obj is None:
+            return _status(404, f"{request.match_info['name']} not found")
+        return web.json_response(obj)
+
+    async def _create(self, request: web.Request) -> web.Response:
+        body = json.loads(await request.text())
+        name = body["metadata"]["name"]
+        key = (request.match_info.get("group", ""), request.match_info["version"], request.match_info["plural"])
+        if self.get(*key, name, request.match_info["namespace"]) is not None:
+            return _status(409, f"{name} already exists")
+
+        fields = {field: value for field, value in body.items() if field not in ("apiVersion", "kind", "metadata")}
+        return web.json_response(self.add(*key, name, request.match_info["namespace"], **fields), status=201)
+
+    async def _replace(self, request: web.Request) -> web.Response:
+        failure = self._failure(request)
+        if failure is not None:
+            return failure
+
+        key, obj = self._lookup(request)
+        body = json.loads(await request.text())
+        if obj is None:
+            return _status(404, f"{request.match_info['name']} not found")
+        if body["metadata"].get("resourceVersion") != obj["metadata"]["resourceVersion"]:
+            return _status(409, "the object has been modified")
+
+        obj.clear()
+        obj.update(body)
+        obj["metadata"]["resourceVersion"] = str(int(body["metadata"]["resourceVersion"]) + 1)
+        return web.json_response(obj)
+
+    async def _patch(self, request: web.Request) -> web.Response:
+        failure = self._failure(request)
+        if failure is not None:
+            return failure
+
+        key, obj = self._lookup(request)
+        patch = json.loads(await request.text())
+        if obj is None:
+            if request.content_type != "application/apply-patch+yaml":
+                return _status(404, f"{request.match_info['name']} not found")
+            obj = self.add(*key, request.match_info["name"], request.match_info.get("namespace", "default"))
+        _merge(obj, patch)
+        obj["metadata"]["resourceVersion"] = str(int(obj["metadata"]["resourceVersion"]) + 1)
+        return web.json_response(obj)
+
+    async def _delete(self, request: web.Request) -> web.Response:
+        failure = self._failure(request)
+        if failure is not None:
+            return failure
+
+        key, obj = self._lookup(request)
+        if obj is None:
+            return _status(404, f"{request.match_info['name']} not found")
+        self.objects[key].remove(obj)
+        return web.json_response({"kind": "Status", "apiVersion": "v1", "status": "Success"})
+
+    async def _version(self, request: web.Request) -> web.Response:
+        return web.json_response({"major": "1", "minor": "30", "gitVersion": "v1.30.0"})
+
+    async def _groups(self, request: web.Request) -> web.Response:
+        groups = sorted({group for group, _, _ in RESOURCES if group})
+        return web.json_response({
+            "kind": "APIGroupList",
+            "groups": [
+                {
+                    "name": group,
+                    "versions": [{"groupVersion": f"{group}/v1", "version": "v1"}],
+                    "preferredVersion": {"groupVersion": f"{group}/v1", "version": "v1"},
+                }
+                for group in groups
+            ],
+        })
+
+    async def _resources(self, request: web.Request) -> web.Response:
+        group = request.match_info.get("group", "")
+        version = request.match_info["version"]
+        return web.json_response({
+            "kind": "APIResourceList",
+            "groupVersion": f"{group}/{version}" if group else version,
+            "resources": [
+                {
+                    "name": plural,
+                    "singularName": kind.lower(),
+                    "namespaced": namespaced,
+                    "kind": kind,
+                    "verbs": ["create", "delete", "get", "list", "patch", "update", "watch"],
+                }
+                for (g, v, plural), (kind, namespaced) in RESOURCES.items()
+                if (g, v) == (group, version)
+            ],
+        })
+
+    async def _list(self, request: web.Request) -> web.Response:
+        failure = self._failure(request)
+        if failure is not None:
+            return failure
+
+        key = (request.match_info.get("group", ""), request.match_info["version"], request.match_info["plural"])
+        namespace = request.match_info.get("namespace")
+        query = request.query
+
+        items = [
+            obj for obj in self.objects[key]
+            if (namespace is None or obj["metadata"].get("namespace") == namespace)
+            and _matches_labels(obj, query.get("labelSelector", ""))
+            and _matches_fields(obj, query.get("fieldSelector", ""))
+        ]
+
+        start = int(query.get("continue") or 0)
+        limit = int(query.get("limit") or 0) or len(items)
+        page = items[start:start + limit]
+        metadata = {"resourceVersion": "1"}
+        if start + limit < len(items):
+            metadata["continue"] = str(start + limit)
+
+        kind = RESOURCES[key][0]
+        if "as=PartialObjectMetadataList" in request.headers.get("Accept", ""):
+            body = {
+                "apiVersion": "meta.k8s.io/v1",
+                "kind": "PartialObjectMetadataList",
+                "metadata": metadata,
+                "items": [
+                    {"apiVersion": "meta.k8s.io/v1", "kind": "PartialObjectMetadata", "metadata": obj["metadata"]}
+                    for obj in page
+                ],
+            }
+        else:
+            body = {"apiVersion": page[0]["apiVersion"] if page else "v1", "kind": f"{kind}List",
+                    "metadata": metadata, "items": page}
+        return web.Response(text=json.dumps(body), content_type="application/json")
+
+
+@asynccontextmanager
+async def serve_fake_kube_api(cache_dir) -> AsyncIterator[FakeKubeAPI]:
+    """Serve a :class:`FakeKubeAPI` with an initialised ``DynamicClient`` as its ``client``."""
+
+    api = FakeKubeAPI()
+    server = TestServer(api.app)
+    await server.start_server()
+
+    configuration = client.Configuration(host=str(server.make_url("")).rstrip("/"))
+    api_client = client.ApiClient(configuration)
+    api.client = await DynamicClient(api_client, cache_file=str(cache_dir / "discovery.json"))
+    try:
+        yield api
+    finally:
+        await api_client.close()
+        await server.close()
@@ -1,8 +1,12 @@
 # tests/test_async_ftp_client_basic.py
+import hashlib
+
+import aioftp
 import pytest
+import pytest_asyncio
 from unittest.mock import AsyncMock, MagicMock, patch, Mock
 
-from ..._internal.database.ftp_client import AsyncFTPClient
+from ..._internal.database.ftp_client import AsyncFTPClient, TransferVerificationError, _Digests
 
 
 # ------------------------------
@@ -109,6 +113,8 @@ async def test_delete_calls_remove_file(ftp_client_patch):
 @pytest.mark.asyncio
 async def test_upload_calls_upload_file(ftp_client_patch, stream_patch):
     client_mock = AsyncMock()
+    # FEAT without hash commands, then SIZE of the uploaded file
+    client_mock.command.side_effect = [("211", []), ("213", [" 4"])]
     write_mock = AsyncMock()
 
     ftp = AsyncFTPClient("host", "user", "pass")
@@ -193,3 +199,258 @@ async def test_rename_raises_if_source_missing(ftp_client_patch):
             await ftp.rename("old.txt", "new.txt")
         client_mock.rename.assert_not_awaited()
 
+
+# ------------------------------ resumable transfers ------------------------------
+
+PAYLOAD = bytes(range(256)) * 1024
+
+
+@pytest_asyncio.fixture
+async def ftp_server(tmp_path):
+    root = tmp_path / "server"
+    root.mkdir()
+    server = aioftp.Server([aioftp.User("user", "pass", base_path=root)])
+    await server.start("127.0.0.1", 0)
+    try:
+        yield AsyncFTPClient("127.0.0.1", "user", "pass", port=server.server_port), root
+    finally:
+        await server.close()
+
+
+def _fail_first_stream(monkeypatch, method, after_bytes):
+    """Make the first data transfer through ``method`` die after ``after_bytes`` bytes."""
+
+    original = getattr(aioftp.Client, method)
+    calls = []
+
+    def patched(self, path, *, offset=0):
+        calls.append(offset)
+        context = original(self, path, offset=offset)
+        if len(calls) > 1:
+            return context
+
+        class Dying:
+            async def __aenter__(self):
+                self.stream = await context.__aenter__()
+                self.sent = 0
+                return self
+
+            async def __aexit__(self, *exc_info):
+                await context.__aexit__(*exc_info)
+
+            async def write(self, data):
+                await self.stream.write(data)
+                self.sent += len(data)
+                if self.sent >= after_bytes:
+                    raise ConnectionResetError("link dropped")
+
+            async def iter_by_block(self, size):
+                async for block in self.stream.iter_by_block(size):
+                    yield block
+                    self.sent += len(block)
+                    if self.sent >= after_bytes:
+                        raise ConnectionResetError("link dropped")
+
+        return Dying()
+
+    monkeypatch.setattr(aioftp.Client, method, patched)
+    return calls
+
+
+@pytest.mark.ftp
+@pytest.mark.asyncio
+async def test_download_resumes_after_failure(ftp_server, tmp_path, monkeypatch):
+    ftp, root = ftp_server
+    (root / "big.bin").write_bytes(PAYLOAD)
+    offsets = _fail_first_stream(monkeypatch, "download_stream", 100_000)
+    local = tmp_path / "big.bin"
+
+    result = await ftp.download_to_file(
+        "big.bin", str(local), retry_delay=0, expected_sha256=hashlib.sha256(PAYLOAD).hexdigest()
+    )
+
+    assert local.read_bytes() == PAYLOAD
+    assert result.attempts == 2 and result.verified_with == "size"
+    assert offsets[0] == 0 and 100_000 <= offsets[1] < len(PAYLOAD)
+
+
+@pytest.mark.ftp
+@pytest.mark.asyncio
+async def test_download_continues_partial_local_file_it_can_confirm(ftp_server, tmp_path, monkeypatch):
+    ftp, root = ftp_server
+    (root / "big.bin").write_bytes(PAYLOAD)
+    local = tmp_path / "big.bin"
+    local.write_bytes(PAYLOAD[:5000])
+    offsets = _fail_first_stream(monkeypatch, "download_stream", len(PAYLOAD))
+
+    await ftp.download_to_file("big.bin", str(local), expected_sha256=hashlib.sha256(PAYLOAD).hexdigest())
+
+    assert offsets == [5000]
+    assert local.read_bytes() == PAYLOAD
+
+
+@pytest.mark.ftp
+@pytest.mark.asyncio
+async def test_download_overwrites_stale_local_file(ftp_server, tmp_path, monkeypatch):
+    ftp, root = ftp_server
+    (root / "big.bin").write_bytes(PAYLOAD)
+    local = tmp_path / "big.bin"
+    local.write_bytes(b"older version of the file")
+    offsets = _fail_first_stream(monkeypatch, "download_stream", 2 * len(PAYLOAD))
+
+    result = await ftp.download_to_file("big.bin", str(local))
+
+    assert offsets == [0]
+    assert local.read_bytes() == PAYLOAD
+    assert result.attempts == 1
+
+
+@pytest.mark.ftp
+@pytest.mark.asyncio
+async def test_upload_overwrites_stale_temporary_file(ftp_server, tmp_path, monkeypatch):
+    ftp, root = ftp_server
+    (root / "big.bin.tmp").write_bytes(b"left by another upload")
+    local = tmp_path / "big.bin"
+    local.write_bytes(PAYLOAD)
+    offsets = _fail_first_stream(monkeypatch, "upload_stream", 2 * len(PAYLOAD))
+
+    await ftp.upload_from_file(str(local))
+
+    assert offsets == [0]
+    assert (root / "big.bin").read_bytes() == PAYLOAD
+
+
+@pytest.mark.ftp
+@pytest.mark.asyncio
+async def test_upload_resumes_after_failure(ftp_server, tmp_path, monkeypatch):
+    ftp, root = ftp_server
+    local = tmp_path / "big.bin"
+    local.write_bytes(PAYLOAD)
+    offsets = _fail_first_stream(monkeypatch, "upload_stream", 3 * 64 * 1024)
+
+    result = await ftp.upload_from_file(str(local), retry_delay=0)
+
+    assert (root / "big.bin").read_bytes() == PAYLOAD
+    assert not (root / "big.bin.tmp").exists()
+    assert result.attempts == 2
+    assert offsets[0] == 0 and offsets[1] > 0
+
+
+@pytest.mark.ftp
+@pytest.mark.asyncio
+async def test_checksum_mismatch_raises_after_restart(ftp_server, tmp_path):
+    ftp, root = ftp_server
+    (root / "big.bin").write_bytes(PAYLOAD)
+
+    with pytest.raises(TransferVerificationError):
+        await ftp.download_to_file("big.bin", str(tmp_path / "big.bin"), expected_sha256="00" * 32, retry_delay=0)
+
+
+@pytest.mark.asyncio
+async def test_server_hash_commands_are_detected_and_compared():
+    ftp = AsyncFTPClient("host", "user", "pass")
+    md5 = hashlib.md5(b"data").hexdigest().upper()
+    client_mock = AsyncMock()
+    client_mock.command.side_effect = [
+        ("211", ["-Features:", " MDTM", " XCRC", " XMD5", "End"]),
+        ("213", [" 4"]),
+        ("250", [f" {md5}"]),
+    ]
+
+    digests = await ftp._digests(client_mock, verify=True)
+    digests.update(b"data")
+
+    assert await ftp._verify(client_mock, "file.txt", 4, digests) == "XMD5"
+    client_mock.command.assert_awaited_with("XMD5 file.txt", "2xx")
+
+    client_mock.command.side_effect = [("213", [" 4"]), ("250", [" 0123abcd"])]
+    with pytest.raises(TransferVerificationError):
+        await ftp._verify(client_mock, "file.txt", 4, digests)
+
+
+@pytest.mark.asyncio
+async def test_hash_feature_uses_the_selected_algorithm():
+    ftp = AsyncFTPClient("host", "user", "pass")
+    client_mock = AsyncMock()
+    client_mock.command.return_value = ("211", ["-Features:", " HASH SHA-1;SHA-256*;MD5", "End"])
+
+    assert await ftp._hash_command(client_mock) == ("HASH", "SHA-256")
+    digests = _Digests(["SHA-256"])
+    digests.update(b"data")
+    assert digests.hexdigest("SHA-256") == hashlib.sha256(b"data").hexdigest()
+
+
+# ------------------------------ walk / glob ------------------------------
+
+def _tree(root):
+    for directory in ("logs/2024/01", "logs/2024/02", "logs/tmp", "data"):
+        (root / directory).mkdir(parents=True)
+    for name in ("logs/2024/01/a.gz", "logs/2024/02/b.gz", "logs/2024/02/b.txt", "logs/tmp/c.gz", "data/d.csv", "e.csv"):
+        (root / name).write_bytes(b"x" * len(name))
+
+
+@pytest.mark.ftp
+@pytest.mark.asyncio
+async def test_walk_yields_every_entry_with_metadata(ftp_server):
+    ftp, root = ftp_server
+    _tree(root)
+
+    entries = {entry.path: entry async for entry in ftp.walk(sessions=3)}
+
+    assert set(entries) == {
+        "logs", "logs/2024", "logs/2024/01", "logs/2024/02", "logs/tmp", "data",
+        "logs/2024/01/a.gz", "logs/2024/02/b.gz", "logs/2024/02/b.txt", "logs/tmp/c.gz", "data/d.csv", "e.csv",
+    }
+    assert entries["data/d.csv"].type == "file" and entries["data/d.csv"].size == len("data/d.csv")
+    assert entries["data/d.csv"].modified is not None
+    assert entries["logs"].type == "dir"
+
+
+@pytest.mark.ftp
+@pytest.mark.asyncio
+async def test_walk_filters_and_depth(ftp_server):
+    ftp, root = ftp_server
+    _tree(root)
+
+    gz = {entry.path async for entry in ftp.walk("logs", include=["*.gz"], exclude=["tmp"])}
+    shallow = {entry.path async for entry in ftp.walk(max_depth=1)}
+
+    assert gz == {"logs/2024/01/a.gz", "logs/2024/02/b.gz"}
+    assert shallow == {"logs", "data", "e.csv"}
+
+
+@pytest.mark.ftp
+@pytest.mark.asyncio
+async def test_glob(ftp_server):
+    ftp, root = ftp_server
+    _tree(root)
+
+    assert {entry.path async for entry in ftp.glob("logs/**/*.gz")} == {
+        "logs/2024/01/a.gz", "logs/2024/02/b.gz", "logs/tmp/c.gz",
+    }
+    assert {entry.path async for entry in ftp.glob("logs/*/0?/b.*")} == {"logs/2024/02/b.gz", "logs/2024/02/b.txt"}
+    assert {entry.path async for entry in ftp.glob("*.csv")} == {"e.csv"}
+
+
+@pytest.mark.ftp
+@pytest.mark.asyncio
+async def test_walk_can_stop_early(ftp_server):
+    ftp, root = ftp_server
+    _tree(root)
+
+    async for entry in ftp.walk(buffer_size=1):
+        break
+
+    assert entry.path
+
+
+@pytest.mark.asyncio
+async def test_cd_applies_to_later_sessions(ftp_client_patch):
+    client_mock = AsyncMock()
+    client_mock.get_current_directory.return_value = "/srv/data"
+    ftp = AsyncFTPClient("host", "user", "pass")
+
+    with ftp_client_patch(ftp, client_mock):
+        await ftp.cd("data")
+
+    assert ftp.base_dir == "/srv/data"
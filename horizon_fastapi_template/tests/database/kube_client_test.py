@@ -0,0 +1,269 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+import pytest_asyncio
+from kubernetes_asyncio.dynamic.exceptions import ForbiddenError
+
+from ..._internal.database import kube_client
+from ..._internal.database.kube_client import (
+    get_dynamic_client,
+    kube_bulk_apply,
+    kube_bulk_delete,
+    kube_bulk_patch,
+    kube_list,
+    kube_list_pages,
+)
+from .fake_kube_api import serve_fake_kube_api
+
+
+@pytest_asyncio.fixture
+async def kube_api(tmp_path):
+    async with serve_fake_kube_api(tmp_path) as api:
+        yield api
+
+
+class _AwaitableClient:
+    awaited = 0
+
+    def __await__(self):
+        self.awaited += 1
+        return asyncio.sleep(0, result=self).__await__()
+
+
+@pytest.mark.asyncio
+async def test_get_dynamic_client_is_awaited_and_cached():
+    dynamic_client = _AwaitableClient()
+    with patch.object(kube_client.config, "load_kube_config", AsyncMock()) as load, \
+            patch.object(kube_client.client, "ApiClient"), \
+            patch.object(kube_client, "DynamicClient", return_value=dynamic_client) as create:
+        first, second = await asyncio.gather(get_dynamic_client(), get_dynamic_client())
+        kube_client._clients.clear()
+
+    assert first is second is dynamic_client
+    assert dynamic_client.awaited == 1
+    load.assert_awaited_once()
+    create.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_kube_list_pages_follows_continue_tokens(kube_api):
+    for index in range(7):
+        kube_api.add("", "v1", "pods", f"pod-{index}")
+
+    pages = [page async for page in kube_list_pages(kube_api.client, "v1", "Pod", page_size=3)]
+
+    assert [[pod["metadata"]["name"] for pod in page] for page in pages] == [
+        ["pod-0", "pod-1", "pod-2"],
+        ["pod-3", "pod-4", "pod-5"],
+        ["pod-6"],
+    ]
+    assert [(r.query.get("limit"), r.query.get("continue")) for r in kube_api.lists()] == [
+        ("3", None), ("3", "3"), ("3", "6"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_kube_list_pages_prefetches_the_next_page_only(kube_api):
+    for index in range(10):
+        kube_api.add("", "v1", "pods", f"pod-{index}")
+
+    pages = kube_list_pages(kube_api.client, "v1", "Pod", page_size=2)
+    await pages.__anext__()
+    await asyncio.sleep(0.05)
+    assert len(kube_api.lists()) == 2
+
+    await pages.aclose()
+    await asyncio.sleep(0.05)
+    assert len(kube_api.lists()) == 2
+
+
+@pytest.mark.asyncio
+async def test_kube_list_pages_without_prefetch_waits_for_the_consumer(kube_api):
+    for index in range(4):
+        kube_api.add("", "v1", "pods", f"pod-{index}")
+
+    pages = kube_list_pages(kube_api.client, "v1", "Pod", page_size=2, prefetch=False)
+    await pages.__anext__()
+    await asyncio.sleep(0.05)
+    assert len(kube_api.lists()) == 1
+    await pages.aclose()
+
+
+@pytest.mark.asyncio
+async def test_kube_list_pushes_selectors_down(kube_api):
+    kube_api.add("", "v1", "pods", "web-1", metadata={"labels": {"app": "web"}})
+    kube_api.add("", "v1", "pods", "web-2", namespace="other", metadata={"labels": {"app": "web"}})
+    kube_api.add("", "v1", "pods", "db-1", metadata={"labels": {"app": "db"}})
+
+    names = [pod["metadata"]["name"] async for pod in kube_list(
+        kube_api.client, "v1", "Pod", namespace="default", label_selector="app=web"
+    )]
+    assert names == ["web-1"]
+
+    names = [pod["metadata"]["name"] async for pod in kube_list(
+        kube_api.client, "v1", "Pod", field_selector="metadata.name=web-2"
+    )]
+    assert names == ["web-2"]
+
+    listed = kube_api.lists()
+    assert listed[0].path == "/api/v1/namespaces/default/pods"
+    assert listed[0].query["labelSelector"] == "app=web"
+    assert listed[1].query["fieldSelector"] == "metadata.name=web-2"
+
+
+@pytest.mark.asyncio
+async def test_kube_list_metadata_only(kube_api):
+    kube_api.add("apps", "v1", "deployments", "api", spec={"replicas": 3})
+
+    deployments = [item async for item in kube_list(kube_api.client, "apps/v1", "Deployment", metadata_only=True)]
+
+    assert deployments == [{
+        "apiVersion": "meta.k8s.io/v1",
+        "kind": "PartialObjectMetadata",
+        "metadata": {"name": "api", "resourceVersion": "1", "namespace": "default"},
+    }]
+    assert "as=PartialObjectMetadataList" in kube_api.lists()[0].headers["Accept"]
+
+
+@pytest.mark.asyncio
+async def test_kube_list_pages_raises_api_errors(kube_api):
+    kube_api.fail("pods", 403)
+
+    with pytest.raises(ForbiddenError):
+        async for _ in kube_list_pages(kube_api.client, "v1", "Pod"):
+            pass
+
+
+def _config_map(name, namespace="default", **data):
+    return {"apiVersion": "v1", "kind": "ConfigMap", "metadata": {"name": name, "namespace": namespace}, "data": data}
+
+
+@pytest.mark.asyncio
+async def test_kube_bulk_apply_creates_and_updates_in_order(kube_api):
+    kube_api.add("", "v1", "configmaps", "existing", data={"a": "1"})
+    manifests = [_config_map(f"cm-{index}", value=str(index)) for index in range(20)]
+    manifests.append(_config_map("existing", b="2"))
+
+    results = await kube_bulk_apply(kube_api.client, manifests, field_manager="tests", concurrency=4)
+
+    assert [result.name for result in results] == [manifest["metadata"]["name"] for manifest in manifests]
+    assert all(result.succeeded and result.status == 200 and result.attempts == 1 for result in results)
+    assert kube_api.get("", "v1", "configmaps", "cm-7")["data"] == {"value": "7"}
+    assert kube_api.get("", "v1", "configmaps", "existing")["data"] == {"a": "1", "b": "2"}
+
+    writes = kube_api.writes()
+    assert {request.content_type for request in writes} == {"application/apply-patch+yaml"}
+    assert {request.query["fieldManager"] for request in writes} == {"tests"}
+    assert all("force" not in request.query for request in writes)
+    # discovery of the v1 group ran once for all the objects
+    assert len([request for request in kube_api.requests if request.path == "/api/v1"]) == 1
+
+    await kube_bulk_apply(kube_api.client, [_config_map("existing", c="3")], force_conflicts=True)
+    assert kube_api.writes()[-1].query["force"] == "true"
+
+
+@pytest.mark.asyncio
+async def test_kube_bulk_apply_bounds_concurrency(kube_api, monkeypatch):
+    in_flight = peak = 0
+    server_side_apply = kube_api.client.server_side_apply
+
+    async def counting(*args, **kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            return await server_side_apply(*args, **kwargs)
+        finally:
+            in_flight -= 1
+
+    monkeypatch.setattr(kube_api.client, "server_side_apply", counting)
+    results = await kube_bulk_apply(kube_api.client, [_config_map(f"cm-{index}") for index in range(12)], concurrency=3)
+
+    assert all(result.succeeded for result in results)
+    assert peak == 3
+
+
+@pytest.mark.asyncio
+async def test_kube_bulk_retries_unavailable_servers_with_backoff(kube_api):
+    kube_api.add("", "v1", "configmaps", "busy")
+    kube_api.add("", "v1", "configmaps", "stuck")
+    kube_api.fail("busy", 500, 503)
+    kube_api.fail("stuck", 503, 503, 503)
+
+    results = await kube_bulk_patch(
+        kube_api.client,
+        [_config_map("busy", a="1"), _config_map("stuck", a="1")],
+        retries=2,
+        retry_delay=0.01,
+    )
+
+    busy, stuck = results
+    assert (busy.succeeded, busy.status, busy.attempts) == (True, 200, 3)
+    assert (stuck.succeeded, stuck.status, stuck.attempts) == (False, 503, 3)
+    assert stuck.error == "injected failure"
+    assert kube_api.get("", "v1", "configmaps", "busy")["data"] == {"a": "1"}
+
+
+@pytest.mark.asyncio
+async def test_kube_bulk_apply_and_patch_do_not_retry_conflicts(kube_api):
+    kube_api.add("", "v1", "configmaps", "changed")
+    kube_api.fail("owned", 409)
+    kube_api.fail("changed", 409)
+
+    (owned,) = await kube_bulk_apply(kube_api.client, [_config_map("owned", a="1")], retry_delay=0.01)
+    (changed,) = await kube_bulk_patch(kube_api.client, [_config_map("changed", a="1")], retry_delay=0.01)
+
+    assert (owned.succeeded, owned.status, owned.attempts) == (False, 409, 1)
+    assert (changed.succeeded, changed.status, changed.attempts) == (False, 409, 1)
+
+
+@pytest.mark.asyncio
+async def test_kube_bulk_waits_for_retry_after_when_throttled(kube_api):
+    kube_api.add("", "v1", "configmaps", "throttled")
+    kube_api.fail("throttled", 429)
+    start = time.monotonic()
+
+    (throttled,) = await kube_bulk_patch(kube_api.client, [_config_map("throttled", a="1")], retry_delay=0.01)
+
+    assert (throttled.succeeded, throttled.attempts) == (True, 2)
+    assert time.monotonic() - start >= 1.0
+
+
+@pytest.mark.asyncio
+async def test_kube_bulk_reports_failures_per_object(kube_api):
+    results = await kube_bulk_patch(
+        kube_api.client,
+        [
+            _config_map("missing", a="1"),
+            {"apiVersion": "v1", "kind": "Unknown", "metadata": {"name": "x", "namespace": "default"}},
+            {"apiVersion": "v1", "kind": "ConfigMap", "metadata": {"name": "no-namespace"}},
+        ],
+        retry_delay=0.01,
+    )
+
+    missing, unknown, no_namespace = results
+    assert (missing.succeeded, missing.status, missing.attempts) == (False, 404, 1)
+    assert (unknown.succeeded, unknown.attempts) == (False, 0)
+    assert (no_namespace.succeeded, no_namespace.status) == (False, None)
+    assert "Namespace is required" in no_namespace.error
+    assert [request.match_info["name"] for request in kube_api.writes()] == ["missing"]
+
+
+@pytest.mark.asyncio
+async def test_kube_bulk_delete_tolerates_missing_objects(kube_api):
+    kube_api.add("", "v1", "configmaps", "old")
+
+    results = await kube_bulk_delete(kube_api.client, [_config_map("old"), _config_map("gone")])
+
+    assert [(result.name, result.succeeded, result.status) for result in results] == [
+        ("old", True, 200),
+        ("gone", True, 404),
+    ]
+    assert kube_api.get("", "v1", "configmaps", "old") is None
+    assert kube_api.writes()[0].query["propagationPolicy"] == "Background"
+
+    results = await kube_bulk_delete(kube_api.client, [_config_map("gone")], missing_ok=False)
+    assert results[0].succeeded is False
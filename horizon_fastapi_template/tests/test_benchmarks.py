@@ -0,0 +1,70 @@
+import pytest
+from loguru import logger
+
+from ..benchmarks import build_scenarios, compare, run_suite
+from ..benchmarks.scenarios import DEFAULT_FLAGS, FLAGS, FULL_MATRIX_FLAGS
+
+
+def test_each_matrix_toggles_every_flag():
+    scenarios = build_scenarios("each")
+    assert len(scenarios) == 3 + len(FLAGS)
+    assert {name for scenario in scenarios for name in scenario.flags} == set(FLAGS)
+
+
+def test_full_matrix_combines_the_per_request_flags():
+    scenarios = build_scenarios("full")
+    assert len(scenarios) == 2 ** len(FULL_MATRIX_FLAGS)
+    assert all(
+        scenario.flags[name] == DEFAULT_FLAGS[name]
+        for scenario in scenarios
+        for name in FLAGS
+        if name not in FULL_MATRIX_FLAGS
+    )
+
+
+def test_disabled_routes_are_not_benchmarked():
+    all_off = next(scenario for scenario in build_scenarios("minimal") if scenario.name == "all_off")
+    assert {endpoint.name for endpoint in all_off.endpoints} == {"openapi", "not_found", "graphql", "large_json"}
+
+
+@pytest.mark.asyncio
+async def test_run_suite_reports_latency_and_allocations(capsys):
+    scenarios = build_scenarios("minimal", endpoints=["root", "graphql"])[:1]
+    results = await run_suite(scenarios, requests=5, warmup=1, concurrency=2, alloc_requests=2)
+
+    # request logs are muted during the run only
+    logger.info("after the benchmark")
+    assert capsys.readouterr().out.count("after the benchmark") == 1
+
+    assert [item["endpoint"] for item in results["results"]] == ["root", "graphql"]
+    for item in results["results"]:
+        assert item["throughput_rps"] > 0
+        assert item["p99_ms"] >= item["p50_ms"] > 0
+        assert item["alloc_bytes_per_request"] > 0
+
+
+@pytest.mark.asyncio
+async def test_run_suite_reports_the_median_of_the_repeats():
+    scenarios = build_scenarios("minimal", endpoints=["root"])[:2]
+    results = await run_suite(scenarios, repeats=3, requests=3, warmup=0, alloc_requests=0)
+
+    assert results["meta"]["repeats"] == 3
+    assert [(item["scenario"], item["endpoint"]) for item in results["results"]] == [
+        (scenario.name, "root") for scenario in scenarios
+    ]
+
+
+def test_compare_flags_throughput_and_latency_regressions():
+    baseline = {"results": [{"scenario": "s", "endpoint": "e", "throughput_rps": 1000, "p50_ms": 1.0}]}
+    current = {"results": [{"scenario": "s", "endpoint": "e", "throughput_rps": 700, "p50_ms": 2.0}]}
+
+    assert {item["metric"] for item in compare(current, baseline, tolerance=0.2)} == {"throughput_rps", "p50_ms"}
+    assert compare(current, baseline, tolerance=1.0) == []
+
+
+def test_compare_ignores_sub_millisecond_latency_jitter():
+    baseline = {"results": [{"scenario": "s", "endpoint": "e", "throughput_rps": 1000, "p50_ms": 0.3}]}
+    current = {"results": [{"scenario": "s", "endpoint": "e", "throughput_rps": 1000, "p50_ms": 0.6}]}
+
+    assert compare(current, baseline) == []
+    assert [item["metric"] for item in compare(current, baseline, min_delta_ms=0.1)] == ["p50_ms"]
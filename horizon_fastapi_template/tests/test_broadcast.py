@@ -0,0 +1,157 @@
+import asyncio
+from typing import AsyncGenerator
+
+import pytest
+import strawberry
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from .._internal import general_create_app
+from .._internal.gql import BroadcastHub, SlowConsumerError
+from .._internal.models import GraphQLVersion
+
+
+async def _collect(hub: BroadcastHub, topic: str, count: int) -> list:
+    received = []
+    async for message in hub.subscribe(topic):
+        received.append(message)
+        if len(received) == count:
+            break
+    return received
+
+
+async def _started(hub: BroadcastHub, topic: str, subscribers: int) -> None:
+    while hub.subscribers(topic) < subscribers:
+        await asyncio.sleep(0)
+
+
+# -------------------------- hub --------------------------
+
+@pytest.mark.asyncio
+async def test_publish_fans_out_to_every_subscriber():
+    hub = BroadcastHub("fanout")
+    tasks = [asyncio.create_task(_collect(hub, "events", 2)) for _ in range(3)]
+    await _started(hub, "events", 3)
+
+    assert hub.publish("events", 1) == 3
+    assert hub.publish("other", 1) == 0
+    hub.publish("events", 2)
+
+    assert await asyncio.gather(*tasks) == [[1, 2]] * 3
+    assert hub.subscribers("events") == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("overflow, expected", [("drop_oldest", [2, 3]), ("drop_newest", [1, 2])])
+async def test_full_queues_drop_messages(overflow, expected):
+    hub = BroadcastHub(f"overflow-{overflow}", queue_size=2, overflow=overflow)
+    task = asyncio.create_task(_collect(hub, "events", 2))
+    await _started(hub, "events", 1)
+
+    for message in (1, 2, 3):
+        hub.publish("events", message)
+
+    assert await task == expected
+    assert REGISTRY.get_sample_value(
+        "graphql_broadcast_messages_total", {"hub": f"overflow-{overflow}", "result": "dropped"}
+    ) == 1
+
+
+@pytest.mark.asyncio
+async def test_disconnect_policy_raises_in_slow_subscriber():
+    hub = BroadcastHub("disconnect", queue_size=1, overflow="disconnect")
+    task = asyncio.create_task(_collect(hub, "events", 2))
+    await _started(hub, "events", 1)
+
+    hub.publish("events", 1)
+    hub.publish("events", 2)
+
+    with pytest.raises(SlowConsumerError):
+        await task
+
+
+@pytest.mark.asyncio
+async def test_source_is_shared_and_stopped_with_the_last_subscriber():
+    started = []
+    release = asyncio.Event()
+    stopped = asyncio.Event()
+
+    async def source():
+        started.append(True)
+        try:
+            await release.wait()
+            for message in range(3):
+                yield message
+            await asyncio.Event().wait()
+        finally:
+            stopped.set()
+
+    hub = BroadcastHub("source")
+    hub.add_source("numbers", source)
+    tasks = [asyncio.create_task(_collect(hub, "numbers", 3)) for _ in range(5)]
+    await _started(hub, "numbers", 5)
+    release.set()
+
+    assert await asyncio.gather(*tasks) == [[0, 1, 2]] * 5
+    await asyncio.wait_for(stopped.wait(), 1)
+    assert len(started) == 1
+
+
+@pytest.mark.asyncio
+async def test_source_failure_ends_subscriptions():
+    async def source():
+        yield "first"
+        raise RuntimeError("watch expired")
+
+    hub = BroadcastHub("failing")
+    hub.add_source("events", source)
+
+    with pytest.raises(RuntimeError, match="watch expired"):
+        await _collect(hub, "events", 2)
+
+
+def test_invalid_overflow_policy():
+    with pytest.raises(ValueError):
+        BroadcastHub("invalid", overflow="block")
+
+
+# -------------------------- websocket route --------------------------
+
+HUB = BroadcastHub("websocket")
+
+
+async def _greetings():
+    yield "hello"
+    await asyncio.Event().wait()
+
+
+HUB.add_source("messages", _greetings)
+
+
+@strawberry.type
+class Query:
+    ok: bool = True
+
+
+@strawberry.type
+class Subscription:
+    @strawberry.subscription
+    async def messages(self) -> AsyncGenerator[str, None]:
+        async for message in HUB.subscribe("messages"):
+            yield message
+
+
+@pytest.mark.graphql
+def test_subscription_over_graphql_transport_ws():
+    version = GraphQLVersion(graphql_schema=strawberry.Schema(query=Query, subscription=Subscription))
+    client = TestClient(general_create_app(graphql_versions=[version]))
+
+    with client.websocket_connect("/graphql/v1", subprotocols=["graphql-transport-ws"]) as ws:
+        ws.send_json({"type": "connection_init"})
+        assert ws.receive_json()["type"] == "connection_ack"
+        assert REGISTRY.get_sample_value("graphql_websocket_connections", {"version": "v1"}) == 1
+
+        ws.send_json({"id": "1", "type": "subscribe", "payload": {"query": "subscription { messages }"}})
+        message = ws.receive_json()
+
+    assert message == {"id": "1", "type": "next", "payload": {"data": {"messages": "hello"}}}
@@ -0,0 +1,137 @@
+import gzip
+import zlib
+
+import pytest
+from fastapi import FastAPI, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from httpx import AsyncClient, ASGITransport
+
+from .._internal import general_create_app
+from .._internal.middlewares.compress_response import CompressResponsesMiddleware, select_encoding
+
+LARGE_TEXT = "horizon " * 1000
+
+
+def _app(**middleware_kwargs) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/large")
+    def large():
+        return PlainTextResponse(LARGE_TEXT)
+
+    @app.get("/small")
+    def small():
+        return PlainTextResponse("tiny")
+
+    @app.get("/image")
+    def image():
+        return Response(b"\x89PNG" + b"\x00" * 4000, media_type="image/png")
+
+    @app.get("/stream")
+    def stream():
+        def chunks():
+            for index in range(5):
+                yield f"chunk-{index} ".encode() * 300
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    app.add_middleware(CompressResponsesMiddleware, **middleware_kwargs)
+    return app
+
+
+async def _get(app: FastAPI, path: str, accept_encoding: str = "gzip") -> Response:
+    # raw bytes are compared below, so httpx must not decode the body
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        async with ac.stream("GET", path, headers={"Accept-Encoding": accept_encoding}) as response:
+            response.raw_body = b"".join([chunk async for chunk in response.aiter_raw()])
+            return response
+
+
+@pytest.mark.asyncio
+async def test_large_bodies_are_gzipped():
+    response = await _get(_app(), "/large")
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) == len(response.raw_body)
+    assert gzip.decompress(response.raw_body).decode() == LARGE_TEXT
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path, accept_encoding", [
+    ("/small", "gzip"),
+    ("/image", "gzip"),
+    ("/large", "gzip;q=0, identity"),
+    ("/large", "unknown"),
+])
+async def test_responses_sent_uncompressed(path, accept_encoding):
+    response = await _get(_app(), path, accept_encoding)
+
+    assert "content-encoding" not in response.headers
+    assert int(response.headers["content-length"]) == len(response.raw_body)
+    assert ("vary" in response.headers) == (path != "/image")
+
+
+@pytest.mark.asyncio
+async def test_streaming_bodies_are_compressed_incrementally():
+    response = await _get(_app(minimum_size=100), "/stream")
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    expected = b"".join(f"chunk-{index} ".encode() * 300 for index in range(5))
+    assert zlib.decompress(response.raw_body, 31) == expected
+
+
+@pytest.mark.asyncio
+async def test_small_stream_chunks_are_sent_as_they_arrive():
+    sent = []
+
+    async def events(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/event-stream")]})
+        await send({"type": "http.response.body", "body": b"data: first\n\n", "more_body": True})
+        # the first event reached the client before the next one is produced
+        assert [message["type"] for message in sent] == ["http.response.start", "http.response.body"]
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": [(b"accept-encoding", b"gzip")]}
+    await CompressResponsesMiddleware(events)(scope, None, send)
+
+    assert (b"content-encoding", b"gzip") in sent[0]["headers"]
+    decompressor = zlib.decompressobj(31)
+    assert decompressor.decompress(sent[1]["body"]) == b"data: first\n\n"
+
+
+@pytest.mark.asyncio
+async def test_offloaded_compression():
+    response = await _get(_app(offload_size=1), "/large")
+
+    assert gzip.decompress(response.raw_body).decode() == LARGE_TEXT
+
+
+def test_select_encoding():
+    assert select_encoding("gzip, deflate", ("br", "gzip")) == "gzip"
+    assert select_encoding("br;q=0.5, gzip", ("br", "gzip")) == "br"
+    assert select_encoding("*", ("gzip",)) == "gzip"
+    assert select_encoding("*, gzip;q=0", ("gzip",)) is None
+    assert select_encoding("", ("gzip",)) is None
+
+
+def test_unavailable_encoding_is_rejected():
+    with pytest.raises(ValueError):
+        CompressResponsesMiddleware(FastAPI(), encodings=("gzip", "lz4"))
+
+
+@pytest.mark.asyncio
+async def test_factory_flag_enables_compression():
+    app = general_create_app(enable_compression_middleware=True)
+
+    @app.get("/large")
+    def large():
+        return PlainTextResponse(LARGE_TEXT)
+
+    response = await _get(app, "/large")
+
+    assert response.headers["content-encoding"] == "gzip"
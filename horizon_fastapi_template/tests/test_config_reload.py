@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+from prometheus_client import REGISTRY
+
+from .._internal import general_create_app
+from .._internal.tasks import config_reload
+from .._internal.tasks.config_reload import reload_config, watch_config
+from .._internal.utils import ApplicationSettings, RuntimeConfig
+from .._internal.utils.runtime_config import LiveConfig
+
+
+@pytest.fixture
+def env_file(tmp_path):
+    path = tmp_path / "app.env"
+    path.write_text("APP_NAME=Reloaded\n")
+    return path
+
+
+def _app(env_file):
+    return general_create_app(
+        enable_config_reload=True,
+        enable_rate_limit_middleware=True,
+        settings=ApplicationSettings(_env_file=env_file),
+    )
+
+
+async def _statuses(app, count):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        return [(await ac.get("/")).status_code for _ in range(count)]
+
+
+@pytest.mark.asyncio
+async def test_reload_applies_rate_limits_live(env_file):
+    app = _app(env_file)
+    assert await _statuses(app, 3) == [200] * 3
+
+    env_file.write_text("APP_NAME=Reloaded\nRATE_LIMIT_DEFAULT=1/minute\n")
+    assert reload_config(app.state.live_config, str(env_file))
+
+    assert app.state.live_config.generation == 1
+    assert app.state.config.settings.RATE_LIMIT_DEFAULT == "1/minute"
+    assert await _statuses(app, 2) == [200, 429]
+
+
+def test_unchanged_and_invalid_files_keep_the_config(env_file):
+    live_config = LiveConfig(RuntimeConfig.from_settings(ApplicationSettings(_env_file=env_file)))
+
+    assert not reload_config(live_config, str(env_file))
+
+    env_file.write_text("LOG_REQUEST_SAMPLE_RATE=5\n")
+    assert not reload_config(live_config, str(env_file))
+    assert live_config.generation == 0
+
+
+def test_reload_keeps_settings_missing_from_the_file(env_file):
+    settings = ApplicationSettings(_env_file=env_file, PORT=9000, RATE_LIMIT_DEFAULT="5/minute")
+    live_config = LiveConfig(RuntimeConfig.from_settings(settings))
+
+    env_file.write_text('APP_NAME=Reloaded\nLOG_REQUEST_PATH_LIMITS={"/health": "1/minute"}\n')
+    assert reload_config(live_config, str(env_file))
+
+    reloaded = live_config.config.settings
+    assert reloaded.LOG_REQUEST_PATH_LIMITS == {"/health": "1/minute"}
+    assert (reloaded.PORT, reloaded.RATE_LIMIT_DEFAULT) == (9000, "5/minute")
+
+
+@pytest.mark.asyncio
+async def test_watcher_polls_the_file(env_file, monkeypatch):
+    monkeypatch.setattr(config_reload, "watchfiles", None)
+    live_config = LiveConfig(RuntimeConfig.from_settings(ApplicationSettings(_env_file=env_file)))
+    task = asyncio.create_task(watch_config(live_config, str(env_file), interval=0.01))
+    try:
+        await asyncio.sleep(0.05)
+        env_file.write_text("APP_NAME=Reloaded\nLOG_REQUEST_MODE=combined\n")
+        for _ in range(100):
+            if live_config.generation:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        task.cancel()
+
+    assert live_config.config.settings.LOG_REQUEST_MODE == "combined"
+    assert REGISTRY.get_sample_value("app_config_generation", {"app": "Reloaded"}) == 1
+
+
+@pytest.mark.asyncio
+async def test_watcher_only_applies_the_settings_edited_in_the_file(env_file, monkeypatch):
+    monkeypatch.setattr(config_reload, "watchfiles", None)
+    monkeypatch.setenv("LOG_LEVEL", "WARNING")
+    env_file.write_text("APP_NAME=Reloaded\nLOG_LEVEL=DEBUG\n")
+    live_config = LiveConfig(RuntimeConfig.from_settings(ApplicationSettings(_env_file=env_file)))
+    assert live_config.config.settings.LOG_LEVEL == "WARNING"
+
+    task = asyncio.create_task(watch_config(live_config, str(env_file), interval=0.01))
+    try:
+        await asyncio.sleep(0.05)
+        env_file.write_text("APP_NAME=Renamed\nLOG_LEVEL=DEBUG\n")
+        for _ in range(100):
+            if live_config.generation:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        task.cancel()
+
+    reloaded = live_config.config.settings
+    assert (reloaded.APP_NAME, reloaded.LOG_LEVEL) == ("Renamed", "WARNING")
+
+    env_file.write_text("APP_NAME=Renamed\nLOG_LEVEL=ERROR\n")
+    assert reload_config(live_config, str(env_file))
+    assert live_config.config.settings.LOG_LEVEL == "ERROR"
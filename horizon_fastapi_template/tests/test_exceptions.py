@@ -0,0 +1,123 @@
+import pytest
+from fastapi import FastAPI, HTTPException
+from httpx import AsyncClient, ASGITransport
+from loguru import logger
+from prometheus_client import REGISTRY
+
+from .._internal.middlewares import exception
+from .._internal.middlewares.exception import _ErrorDeduplicator, create_handlers
+
+
+def _app(**handler_kwargs) -> FastAPI:
+    app = FastAPI()
+    for handler in create_handlers(**handler_kwargs):
+        app.add_exception_handler(handler.exception_class, handler.handler)
+
+    @app.get("/teapot")
+    def teapot():
+        raise HTTPException(status_code=418, detail="short and stout")
+
+    @app.get("/unavailable")
+    def unavailable():
+        raise HTTPException(status_code=503, detail="try later")
+
+    @app.get("/items/{item_id}")
+    def item(item_id: int):
+        return {"item_id": item_id}
+
+    @app.get("/boom")
+    def boom():
+        raise RuntimeError("boom")
+
+    return app
+
+
+@pytest.fixture
+def records():
+    captured = []
+    sink = logger.add(lambda message: captured.append(message.record), level="INFO")
+    yield captured
+    logger.remove(sink)
+
+
+async def _get(app: FastAPI, path: str, times: int = 1):
+    async with AsyncClient(transport=ASGITransport(app=app, raise_app_exceptions=False), base_url="http://test") as ac:
+        for _ in range(times):
+            response = await ac.get(path)
+    return response
+
+
+def _count(status: str, exception: str) -> float:
+    return REGISTRY.get_sample_value("http_exceptions_total", {"status": status, "exception": exception}) or 0.0
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_logged_without_traceback(records):
+    before = _count("418", "HTTPException")
+
+    response = await _get(_app(), "/teapot")
+
+    assert response.status_code == 418
+    assert response.json() == {"detail": "short and stout"}
+    assert _count("418", "HTTPException") == before + 1
+    assert [record["exception"] for record in records] == [None]
+    assert "GET /teapot" in records[0]["message"]
+
+
+@pytest.mark.asyncio
+async def test_validation_errors_are_counted(records):
+    before = _count("422", "RequestValidationError")
+
+    response = await _get(_app(), "/items/abc")
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["path", "item_id"]
+    assert _count("422", "RequestValidationError") == before + 1
+    assert records[0]["exception"] is None
+
+
+@pytest.mark.asyncio
+async def test_client_error_logs_are_sampled_and_limited(records):
+    await _get(_app(client_error_sample_rate=0.0), "/teapot", times=5)
+    assert records == []
+
+    await _get(_app(client_error_log_limit="2/minute"), "/teapot", times=5)
+    assert len(records) == 2
+
+
+@pytest.mark.asyncio
+async def test_server_errors_keep_their_traceback(records):
+    response = await _get(_app(), "/unavailable")
+
+    assert response.status_code == 503
+    assert records[0]["exception"] is not None
+
+
+@pytest.mark.asyncio
+async def test_identical_unhandled_errors_are_deduplicated(records):
+    before = _count("500", "RuntimeError")
+
+    response = await _get(_app(), "/boom", times=3)
+
+    assert response.status_code == 500
+    assert response.json() == {"detail": "Internal Server Error"}
+    assert _count("500", "RuntimeError") == before + 3
+    assert len(records) == 1
+    assert records[0]["exception"] is not None
+
+    records.clear()
+    await _get(_app(dedup_window=0), "/boom", times=3)
+    assert len(records) == 3
+
+
+def test_deduplicated_errors_are_capped_oldest_first(monkeypatch):
+    monkeypatch.setattr(exception, "_DEDUP_MAX_ENTRIES", 3)
+    deduplicator = _ErrorDeduplicator(window=60)
+
+    for message in ("a", "b", "c", "d"):
+        assert deduplicator.record(RuntimeError(message)) == 0
+
+    assert len(deduplicator._seen) == 3
+    assert deduplicator.record(RuntimeError("b")) is None
+    # "a" was evicted and counts as a first occurrence again
+    assert deduplicator.record(RuntimeError("a")) == 0
@@ -0,0 +1,187 @@
+import asyncio
+import signal
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+from prometheus_client import REGISTRY
+
+from .._internal import general_create_app
+from .._internal.database import BaseAPI
+from .._internal.utils import ApplicationSettings
+
+
+def _app(background_tasks=(), close_shared_clients=False, **settings):
+    settings.setdefault("SHUTDOWN_DRAIN_DELAY", 0.05)
+    settings.setdefault("SHUTDOWN_DRAIN_TIMEOUT", 1.0)
+    app = general_create_app(
+        async_background_tasks=list(background_tasks),
+        enable_uptime_background_task=False,
+        enable_graceful_shutdown=True,
+        close_shared_clients=close_shared_clients,
+        settings=ApplicationSettings(**settings),
+    )
+    release = asyncio.Event()
+
+    @app.get("/slow")
+    async def slow():
+        await release.wait()
+        return {"done": True}
+
+    return app, release
+
+
+async def _until(condition, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+def server_handler():
+    """Stand-in for the handler uvicorn installs before the lifespan starts."""
+
+    calls = []
+    previous = signal.signal(signal.SIGTERM, lambda signum, frame: calls.append(signum))
+    try:
+        yield calls
+    finally:
+        signal.signal(signal.SIGTERM, previous)
+
+
+@pytest.mark.asyncio
+async def test_sigterm_fails_readiness_and_stops_the_server_once_drained(server_handler):
+    app, release = _app()
+
+    async with app.router.lifespan_context(app):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            assert (await ac.get("/readiness")).status_code == 200
+            slow = asyncio.ensure_future(ac.get("/slow"))
+            await _until(lambda: app.state.graceful_shutdown.in_flight == 1)
+
+            signal.raise_signal(signal.SIGTERM)
+            await asyncio.sleep(0)
+            readiness = await ac.get("/readiness")
+            assert (readiness.status_code, readiness.json()) == (503, {"status": "Draining"})
+            assert (await ac.get("/liveness")).status_code == 200
+            assert REGISTRY.get_sample_value("app_draining") == 1
+
+            # past the delay, the server is held back by the request in flight
+            await asyncio.sleep(0.15)
+            assert server_handler == []
+
+            release.set()
+            assert (await slow).json() == {"done": True}
+            await _until(lambda: server_handler == [signal.SIGTERM])
+
+    assert signal.getsignal(signal.SIGTERM) is not app.state.graceful_shutdown._on_signal
+
+
+@pytest.mark.asyncio
+async def test_second_sigterm_stops_the_server_at_once(server_handler):
+    app, _ = _app(SHUTDOWN_DRAIN_DELAY=10)
+
+    async with app.router.lifespan_context(app):
+        signal.raise_signal(signal.SIGTERM)
+        signal.raise_signal(signal.SIGTERM)
+        await _until(lambda: server_handler == [signal.SIGTERM])
+
+
+@pytest.mark.asyncio
+async def test_shutdown_drains_and_cancels_tasks_before_closing_clients():
+    events = []
+    api = BaseAPI("https://example.com")
+
+    async def background():
+        try:
+            await asyncio.Event().wait()
+        finally:
+            events.append(f"task cancelled, client open: {api._client is not None}")
+
+    app, release = _app(background_tasks=[background], close_shared_clients=True)
+    app.state.graceful_shutdown.add_cleanup(lambda: events.append(f"cleanup, client open: {api._client is not None}"))
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        lifespan = app.router.lifespan_context(app)
+        await lifespan.__aenter__()
+        await api.__aenter__()
+        slow = asyncio.ensure_future(ac.get("/slow"))
+        await _until(lambda: app.state.graceful_shutdown.in_flight == 1)
+
+        stopping = asyncio.ensure_future(lifespan.__aexit__(None, None, None))
+        await asyncio.sleep(0.05)
+        assert not stopping.done() and events == []
+
+        release.set()
+        await slow
+        await stopping
+
+    assert api._client is None
+    assert events == ["cleanup, client open: True", "task cancelled, client open: True"]
+
+
+@pytest.mark.asyncio
+async def test_shutdown_gives_up_on_requests_after_the_timeout():
+    app, release = _app(SHUTDOWN_DRAIN_TIMEOUT=0.05)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        async with app.router.lifespan_context(app):
+            slow = asyncio.ensure_future(ac.get("/slow"))
+            await _until(lambda: app.state.graceful_shutdown.in_flight == 1)
+        assert not slow.done()
+        release.set()
+        await slow
+
+
+def test_graceful_shutdown_is_off_by_default():
+    app = general_create_app()
+
+    assert not hasattr(app.state, "graceful_shutdown")
+
+
+@pytest.mark.asyncio
+async def test_shared_clients_are_closed_only_when_asked():
+    api = BaseAPI("https://example.com")
+    await api.__aenter__()
+
+    kept = general_create_app(enable_uptime_background_task=False)
+    async with kept.router.lifespan_context(kept):
+        pass
+    assert api._client is not None
+
+    closing = general_create_app(enable_uptime_background_task=False, close_shared_clients=True)
+    async with closing.router.lifespan_context(closing):
+        pass
+    assert api._client is None
+
+
+def test_draining_works_in_each_loop_the_app_runs_in():
+    # the application is built before the server starts its event loop
+    app = general_create_app(
+        enable_uptime_background_task=False,
+        enable_graceful_shutdown=True,
+        settings=ApplicationSettings(SHUTDOWN_DRAIN_DELAY=0.05),
+    )
+    releases = []
+
+    @app.get("/held")
+    async def held():
+        releases.append(asyncio.Event())
+        await releases[-1].wait()
+        return {"done": True}
+
+    async def serve():
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            lifespan = app.router.lifespan_context(app)
+            await lifespan.__aenter__()
+            slow = asyncio.ensure_future(ac.get("/held"))
+            await _until(lambda: app.state.graceful_shutdown.in_flight == 1)
+            stopping = asyncio.ensure_future(lifespan.__aexit__(None, None, None))
+            await asyncio.sleep(0.01)
+            assert not stopping.done()
+            releases[-1].set()
+            await stopping
+            return (await slow).status_code
+
+    assert asyncio.run(serve()) == 200
+    assert asyncio.run(serve()) == 200
@@ -0,0 +1,296 @@
+import hashlib
+import json
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import List, Optional
+from unittest.mock import AsyncMock
+
+import pytest
+import respx
+import strawberry
+from httpx import AsyncClient, ASGITransport
+from loguru import logger
+from prometheus_client import REGISTRY
+from graphql import parse, validate
+from strawberry.extensions import ParserCache, ValidationCache
+
+from .._internal import general_create_app
+from .._internal.database.basic_api import BaseAPI
+from .._internal.gql.dataloaders import DATALOADER_LOADS, base_api_loader, create_context_getter, kube_loader
+from .._internal.gql.limits import create_complexity_validator
+from .._internal.models import GraphQLVersion
+from .._internal.routes.qraphql import create_graphql_router
+
+CALLS = {"count": 0}
+
+
+@strawberry.type
+class Query:
+    @strawberry.field
+    def counter(self) -> int:
+        CALLS["count"] += 1
+        return CALLS["count"]
+
+
+@strawberry.type
+class Node:
+    id: int
+
+    @strawberry.field
+    def children(self, first: int = 1) -> List["Node"]:
+        return [Node(id=self.id * 10 + index) for index in range(first)]
+
+
+@strawberry.type
+class TreeQuery:
+    @strawberry.field
+    def root(self) -> Node:
+        return Node(id=1)
+
+
+COUNTER_QUERY = "query Counter { counter }"
+COUNTER_HASH = hashlib.sha256(COUNTER_QUERY.encode()).hexdigest()
+
+
+def _client(**version_kwargs) -> AsyncClient:
+    version = GraphQLVersion(graphql_schema=strawberry.Schema(query=Query), **version_kwargs)
+    app = general_create_app(graphql_versions=[version])
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+
+
+def _persisted(query_hash: str = COUNTER_HASH) -> str:
+    return json.dumps({"persistedQuery": {"version": 1, "sha256Hash": query_hash}})
+
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    CALLS["count"] = 0
+
+
+# -------------------------- plain queries --------------------------
+
+@pytest.mark.graphql
+@pytest.mark.asyncio
+async def test_graphql_query():
+    async with _client() as ac:
+        response = await ac.post("/graphql/v1", json={"query": COUNTER_QUERY})
+
+    assert response.status_code == 200
+    assert response.json() == {"data": {"counter": 1}}
+
+
+# -------------------------- persisted queries --------------------------
+
+@pytest.mark.graphql
+@pytest.mark.asyncio
+async def test_persisted_query_registration_flow():
+    async with _client(persisted_queries=True) as ac:
+        miss = await ac.get("/graphql/v1", params={"extensions": _persisted()})
+        register = await ac.get(
+            "/graphql/v1", params={"query": COUNTER_QUERY, "extensions": _persisted()}
+        )
+        hit = await ac.get("/graphql/v1", params={"extensions": _persisted()})
+
+    assert miss.json()["errors"][0]["message"] == "PersistedQueryNotFound"
+    assert register.json() == {"data": {"counter": 1}}
+    assert hit.json() == {"data": {"counter": 2}}
+
+
+@pytest.mark.graphql
+@pytest.mark.asyncio
+async def test_persisted_query_hash_mismatch_is_rejected():
+    async with _client(persisted_queries=True) as ac:
+        response = await ac.post(
+            "/graphql/v1",
+            json={"query": COUNTER_QUERY, "extensions": json.loads(_persisted("0" * 64))},
+        )
+
+    assert response.status_code == 400
+
+
+# -------------------------- result cache --------------------------
+
+@pytest.mark.graphql
+@pytest.mark.asyncio
+async def test_result_cache_serves_cacheable_operations():
+    async with _client(persisted_queries=True, result_cache_ttl=60, cacheable_operations={"Counter"}) as ac:
+        first = await ac.get("/graphql/v1", params={"query": COUNTER_QUERY, "extensions": _persisted()})
+        second = await ac.get("/graphql/v1", params={"extensions": _persisted()})
+
+    assert first.json() == second.json() == {"data": {"counter": 1}}
+    assert second.headers["cache-control"] == "public, max-age=60"
+
+
+@pytest.mark.graphql
+@pytest.mark.asyncio
+async def test_result_cache_ignores_other_operations():
+    async with _client(result_cache_ttl=60, cacheable_operations={"Other"}) as ac:
+        await ac.post("/graphql/v1", json={"query": COUNTER_QUERY})
+        response = await ac.post("/graphql/v1", json={"query": COUNTER_QUERY})
+
+    assert response.json() == {"data": {"counter": 2}}
+
+
+# -------------------------- document cache --------------------------
+
+def test_document_cache_installed_per_router_without_touching_the_schema():
+    schema = strawberry.Schema(query=Query)
+    version = GraphQLVersion(graphql_schema=schema, document_cache_size=16)
+
+    general_create_app(graphql_versions=[version])
+    routers = [create_graphql_router(version, Path(".")) for _ in range(2)]
+
+    assert list(schema.extensions) == []
+    for router in routers:
+        assert [type(ext()) for ext in router.schema.extensions] == [ParserCache, ValidationCache]
+
+
+# -------------------------- limits and resolver metrics --------------------------
+
+async def _tree_query(query: str, **version_kwargs) -> dict:
+    version = GraphQLVersion(graphql_schema=strawberry.Schema(query=TreeQuery), **version_kwargs)
+    app = general_create_app(graphql_versions=[version])
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.post("/graphql/v1", json={"query": query})
+    return response.json()
+
+
+@pytest.mark.graphql
+@pytest.mark.asyncio
+async def test_max_depth_rejects_deep_queries():
+    shallow = await _tree_query("{ root { children { id } } }", max_depth=2)
+    deep = await _tree_query("query Deep { root { children { children { id } } } }", max_depth=2)
+
+    assert shallow == {"data": {"root": {"children": [{"id": 10}]}}}
+    assert deep["data"] is None
+    assert "exceeds maximum operation depth" in deep["errors"][0]["message"]
+
+
+@pytest.mark.graphql
+@pytest.mark.asyncio
+async def test_max_complexity_multiplies_list_arguments():
+    query = "query Wide { root { children(first: %d) { id } } }"
+
+    cheap = await _tree_query(query % 3, max_complexity=5)
+    expensive = await _tree_query(query % 10, max_complexity=5)
+
+    assert len(cheap["data"]["root"]["children"]) == 3
+    assert expensive["data"] is None
+    assert "exceeds maximum operation complexity of 5 (got 12)" in expensive["errors"][0]["message"]
+
+
+@pytest.mark.graphql
+@pytest.mark.asyncio
+async def test_max_complexity_expands_fragments():
+    query = """
+        query Fragmented { root { ...Kids } }
+        fragment Kids on Node { children(first: 10) { id } }
+    """
+    result = await _tree_query(query, max_complexity=5)
+
+    assert "(got 12)" in result["errors"][0]["message"]
+
+
+def test_max_complexity_walks_each_fragment_once():
+    levels = 40
+    fragments = "".join(
+        f"fragment F{level} on Node {{ a: children {{ ...F{level + 1} }} b: children {{ ...F{level + 1} }} }}\n"
+        for level in range(levels)
+    )
+    query = f"query Fan {{ root {{ ...F0 }} }}\n{fragments}fragment F{levels} on Node {{ id }}"
+    rule = create_complexity_validator(100)
+
+    start = time.perf_counter()
+    errors = validate(strawberry.Schema(query=TreeQuery)._schema, parse(query), [rule])
+
+    assert time.perf_counter() - start < 1.0
+    assert len(errors) == 1 and "exceeds maximum operation complexity of 100" in errors[0].message
+
+
+@pytest.mark.graphql
+@pytest.mark.asyncio
+async def test_max_aliases_rejects_alias_floods():
+    result = await _tree_query("{ a: root { id } b: root { id } c: root { id } }", max_aliases=2)
+
+    assert result["data"] is None
+    assert "aliases" in result["errors"][0]["message"]
+
+
+@pytest.mark.graphql
+@pytest.mark.asyncio
+async def test_resolver_metrics_only_time_custom_resolvers():
+    def observed(field: str) -> float:
+        labels = {"version": "v1", "field": field}
+        return REGISTRY.get_sample_value("graphql_resolver_duration_seconds_count", labels) or 0.0
+
+    before = observed("Node.children")
+    await _tree_query("{ root { id children(first: 2) { id } } }", resolver_metrics=True)
+
+    assert observed("Node.children") - before == 1
+    assert observed("Node.id") == 0
+
+
+@pytest.mark.graphql
+@pytest.mark.asyncio
+async def test_resolver_metrics_log_slow_operations():
+    messages = []
+    handler = logger.add(messages.append, level="WARNING", format="{message}")
+    try:
+        await _tree_query("query Slow { root { id } }", resolver_metrics=True, slow_query_threshold=1e-9)
+    finally:
+        logger.remove(handler)
+
+    assert any("Slow GraphQL operation Slow" in message and "root" in message for message in messages)
+
+
+# -------------------------- dataloaders --------------------------
+
+@pytest.mark.graphql
+@pytest.mark.asyncio
+async def test_base_api_loader_batches_and_deduplicates_calls():
+    api = BaseAPI(base_url="https://users.example.com")
+
+    @strawberry.type
+    class UserQuery:
+        @strawberry.field
+        async def names(self, info: strawberry.Info, ids: List[int]) -> List[Optional[str]]:
+            users = await info.context.loader("users").load_many(ids)
+            return [user["name"] if user else None for user in users]
+
+    version = GraphQLVersion(
+        graphql_schema=strawberry.Schema(query=UserQuery),
+        context_getter=create_context_getter(users=base_api_loader(api, "/users", batch_param="ids")),
+    )
+    app = general_create_app(graphql_versions=[version])
+    hits_before = DATALOADER_LOADS.labels("/users", "hit")._value.get()
+
+    with respx.mock(base_url="https://users.example.com") as mock:
+        route = mock.get("/users").respond(200, json=[{"id": 1, "name": "a"}, {"id": 2, "name": "b"}])
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            response = await ac.post("/graphql/v1", json={"query": "{ names(ids: [1, 2, 1, 3]) }"})
+
+    assert response.json() == {"data": {"names": ["a", "b", "a", None]}}
+    assert route.call_count == 1
+    assert route.calls[0].request.url.params["ids"] == "1,2,3"
+    assert DATALOADER_LOADS.labels("/users", "hit")._value.get() == hits_before + 1
+
+
+@pytest.mark.asyncio
+async def test_kube_loader_groups_keys_by_namespace():
+    def pod(name):
+        return SimpleNamespace(metadata=SimpleNamespace(name=name))
+
+    dynamic_client = SimpleNamespace(
+        resources=SimpleNamespace(get=AsyncMock(return_value="pods")),
+        get=AsyncMock(side_effect=lambda resource, name=None, namespace=None: (
+            pod(name) if name else SimpleNamespace(items=[pod("a"), pod("b"), pod("c")])
+        )),
+    )
+
+    loader = kube_loader(dynamic_client, "v1", "Pod", list_threshold=2)()
+    found = await loader.load_many([("ns1", "a"), ("ns1", "b"), ("ns2", "a"), ("ns1", "missing")])
+
+    assert [item.metadata.name if item else None for item in found] == ["a", "b", "a", None]
+    # one list for ns1 (three keys), one get for ns2
+    assert dynamic_client.get.await_count == 2
@@ -0,0 +1,206 @@
+import asyncio
+
+import pytest
+from fastapi import Depends
+from httpx import AsyncClient, ASGITransport
+from prometheus_client import REGISTRY
+
+from .._internal import general_create_app
+from .._internal.tasks.job_queue import JobQueue, SQLiteJobStore, get_job_queue
+
+
+async def _running(queue):
+    task = asyncio.create_task(queue.run())
+    await asyncio.sleep(0)
+    return task
+
+
+async def _stop(task):
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+
+@pytest.mark.asyncio
+async def test_jobs_run_concurrently_up_to_the_worker_count():
+    queue = JobQueue("concurrency", concurrency=2)
+    active, peak = 0, 0
+
+    @queue.job
+    async def upload(index):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.02)
+        active -= 1
+
+    for index in range(6):
+        await queue.enqueue(upload, index)
+    assert queue.depth == 6
+    assert REGISTRY.get_sample_value("app_job_queue_depth", {"queue": "concurrency"}) == 6
+
+    task = await _running(queue)
+    try:
+        await asyncio.wait_for(queue.join(), 1)
+    finally:
+        await _stop(task)
+
+    assert peak == 2
+    assert queue.depth == 0
+    assert REGISTRY.get_sample_value(
+        "app_jobs_total", {"queue": "concurrency", "job": upload.__qualname__, "result": "succeeded"}
+    ) == 6
+    assert REGISTRY.get_sample_value(
+        "app_job_wait_seconds_count", {"queue": "concurrency", "job": upload.__qualname__}
+    ) == 6
+
+
+def test_queue_built_outside_the_loop_runs_in_each_loop():
+    # as a module level queue does, built before any event loop runs
+    queue = JobQueue("import-time")
+    done = []
+
+    @queue.job
+    async def record(value):
+        await asyncio.sleep(0.01)
+        done.append(value)
+
+    async def serve(value):
+        await queue.enqueue(record, value)
+        task = await _running(queue)
+        try:
+            await asyncio.wait_for(queue.join(), 1)
+        finally:
+            await _stop(task)
+
+    asyncio.run(serve(1))
+    asyncio.run(serve(2))
+
+    assert done == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_failed_jobs_are_retried_then_dead_lettered():
+    queue = JobQueue("retries", max_retries=2, retry_delay=0.01)
+    calls = {"flaky": 0, "broken": 0}
+
+    @queue.job(name="flaky")
+    async def flaky():
+        calls["flaky"] += 1
+        if calls["flaky"] < 3:
+            raise ConnectionError("upstream unavailable")
+
+    @queue.job(name="broken")
+    async def broken():
+        calls["broken"] += 1
+        raise ValueError("bad payload")
+
+    await queue.enqueue("flaky")
+    dead = await queue.enqueue("broken")
+
+    task = await _running(queue)
+    try:
+        await asyncio.wait_for(queue.join(), 1)
+
+        assert calls == {"flaky": 3, "broken": 3}
+        assert queue.dead_letters == [dead]
+        assert (dead.attempts, dead.error) == (3, "ValueError: bad payload")
+        assert REGISTRY.get_sample_value("app_jobs_dead", {"queue": "retries"}) == 1
+        assert REGISTRY.get_sample_value("app_jobs_total", {"queue": "retries", "job": "flaky", "result": "retried"}) == 2
+
+        assert await queue.requeue_dead() == 1
+        await asyncio.wait_for(queue.join(), 1)
+        assert calls["broken"] == 6
+    finally:
+        await _stop(task)
+
+
+@pytest.mark.asyncio
+async def test_job_attempts_time_out():
+    queue = JobQueue("timeouts", max_retries=0, timeout=0.01)
+
+    @queue.job
+    async def hang():
+        await asyncio.Event().wait()
+
+    await queue.enqueue(hang)
+    task = await _running(queue)
+    try:
+        await asyncio.wait_for(queue.join(), 1)
+    finally:
+        await _stop(task)
+
+    assert queue.dead_letters[0].error.startswith("TimeoutError")
+
+
+@pytest.mark.asyncio
+async def test_enqueue_rejects_unknown_handlers():
+    queue = JobQueue("unknown")
+
+    async def unregistered():
+        pass
+
+    with pytest.raises(ValueError):
+        await queue.enqueue(unregistered)
+
+
+@pytest.mark.asyncio
+async def test_sqlite_store_keeps_jobs_across_restarts(tmp_path):
+    database = str(tmp_path / "jobs.sqlite3")
+    done = []
+
+    def make_queue():
+        queue = JobQueue("persistent", max_retries=0, store=SQLiteJobStore(database))
+
+        @queue.job(name="sync")
+        async def sync(user, *, full=False):
+            if user == "broken":
+                raise RuntimeError("no such user")
+            done.append((user, full))
+
+        return queue
+
+    # enqueued while the previous process was shutting down, never run
+    stopped = make_queue()
+    await stopped.enqueue("sync", "alice", full=True)
+    await stopped.enqueue("sync", "broken")
+    await stopped.store.close()
+
+    restarted = make_queue()
+    task = await _running(restarted)
+    try:
+        await asyncio.wait_for(restarted.join(), 1)
+    finally:
+        await _stop(task)
+    assert done == [("alice", True)]
+    assert [job.args for job in restarted.dead_letters] == [["broken"]]
+
+    # succeeded jobs are gone, dead ones are kept
+    jobs = await SQLiteJobStore(database).load()
+    assert [(job.name, job.args, job.dead) for job in jobs] == [("sync", ["broken"], True)]
+
+
+@pytest.mark.asyncio
+async def test_app_runs_the_job_queue_from_the_lifespan():
+    queue = JobQueue("app")
+    uploaded = asyncio.Event()
+
+    @queue.job
+    async def upload(name):
+        uploaded.set()
+
+    app = general_create_app(job_queue=queue, enable_uptime_background_task=False)
+
+    @app.post("/reports/{name}", status_code=202)
+    async def create_report(name: str, jobs: JobQueue = Depends(get_job_queue)):
+        job = await jobs.enqueue(upload, name)
+        return {"job": job.id}
+
+    async with app.router.lifespan_context(app):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            response = await ac.post("/reports/weekly")
+            assert response.status_code == 202
+            await asyncio.wait_for(uploaded.wait(), 1)
+            metrics = (await ac.get("/metrics")).text
+
+    assert 'app_job_queue_depth{queue="app"} 0.0' in metrics
+    assert "app_job_duration_seconds_count" in metrics
@@ -0,0 +1,262 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+from prometheus_client import REGISTRY
+
+from .._internal import general_create_app
+from .._internal.tasks.leader_election import FileLockBackend, KubeLeaseBackend, LeaderElector, LeaseBackend
+from .._internal.utils import ApplicationSettings
+from .database.fake_kube_api import serve_fake_kube_api
+
+
+def _elector(backend, identity, **kwargs):
+    kwargs.setdefault("lease_duration", 1.0)
+    kwargs.setdefault("renew_deadline", 0.5)
+    kwargs.setdefault("retry_period", 0.02)
+    return LeaderElector(backend, identity=identity, **kwargs)
+
+
+async def _until(condition, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
+
+
+def _leader_metric(lock):
+    return REGISTRY.get_sample_value("app_leader", {"lock": lock})
+
+
+class _Task:
+    def __init__(self):
+        self.running = 0
+        self.starts = 0
+
+    async def __call__(self):
+        self.starts += 1
+        self.running += 1
+        try:
+            await asyncio.Event().wait()
+        finally:
+            self.running -= 1
+
+
+@pytest.mark.asyncio
+async def test_file_lock_elects_one_leader_and_hands_over_on_release(tmp_path):
+    path = str(tmp_path / "jobs.lock")
+    first, second = _elector(FileLockBackend(path), "first"), _elector(FileLockBackend(path), "second")
+    first_task, second_task = _Task(), _Task()
+
+    running = [
+        asyncio.create_task(coro())
+        for coro in (first.run, first.leader_only(first_task), second.run, second.leader_only(second_task))
+    ]
+    try:
+        await _until(lambda: first_task.running == 1)
+        await asyncio.sleep(0.1)
+        assert first.is_leader and not second.is_leader
+        assert second_task.starts == 0
+        assert _leader_metric("jobs.lock") == 1
+
+        running[0].cancel()
+        await _until(lambda: second_task.running == 1, timeout=0.5)
+        assert first_task.running == 0
+        assert not first.is_leader and second.is_leader
+    finally:
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+
+
+class _FlakyBackend(LeaseBackend):
+    name = "flaky"
+
+    def __init__(self):
+        self.healthy = True
+
+    async def acquire(self, identity, lease_duration):
+        if not self.healthy:
+            raise ConnectionError("API server unreachable")
+        return True
+
+    async def release(self, identity):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_leader_steps_down_after_the_renew_deadline():
+    backend = _FlakyBackend()
+    elector = _elector(backend, "only", lease_duration=0.5, renew_deadline=0.2)
+    task = _Task()
+    running = [asyncio.create_task(elector.run()), asyncio.create_task(elector.leader_only(task)())]
+    try:
+        await _until(lambda: task.running == 1)
+
+        backend.healthy = False
+        await asyncio.sleep(0.1)
+        # renewal failures shorter than the deadline keep the leadership
+        assert elector.is_leader and task.running == 1
+
+        await _until(lambda: not elector.is_leader)
+        await _until(lambda: task.running == 0)
+        assert _leader_metric("flaky") == 0
+
+        backend.healthy = True
+        await _until(lambda: task.running == 1)
+        assert task.starts == 2
+    finally:
+        for item in running:
+            item.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+
+
+class _HangingBackend(LeaseBackend):
+    name = "hanging"
+
+    def __init__(self):
+        self.calls = 0
+
+    async def acquire(self, identity, lease_duration):
+        self.calls += 1
+        if self.calls > 1:
+            await asyncio.sleep(60)
+        return True
+
+    async def release(self, identity):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_leader_steps_down_when_a_renewal_hangs_past_the_deadline():
+    elector = _elector(_HangingBackend(), "only", lease_duration=1.5, renew_deadline=1.0, retry_period=0.2)
+    running = asyncio.create_task(elector.run())
+    try:
+        await _until(lambda: elector.is_leader)
+        await asyncio.sleep(1.1)
+
+        assert not elector.is_leader
+    finally:
+        running.cancel()
+        await asyncio.gather(running, return_exceptions=True)
+
+
+def test_elector_built_outside_the_loop_runs_in_each_loop(tmp_path):
+    # as general_create_app does, before the server starts its event loop
+    elector = _elector(FileLockBackend(str(tmp_path / "loops.lock")), "only")
+    task = _Task()
+
+    async def lead():
+        running = [asyncio.create_task(elector.run()), asyncio.create_task(elector.leader_only(task)())]
+        try:
+            await _until(lambda: task.running == 1)
+        finally:
+            for item in running:
+                item.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+
+    asyncio.run(lead())
+    asyncio.run(lead())
+
+    assert task.starts == 2 and not elector.is_leader
+
+
+@pytest.mark.asyncio
+async def test_leader_only_returns_when_the_task_finishes():
+    elector = _elector(_FlakyBackend(), "only")
+
+    async def job():
+        return "done"
+
+    runner = asyncio.create_task(elector.run())
+    try:
+        assert await asyncio.wait_for(elector.leader_only(job)(), 1) == "done"
+    finally:
+        runner.cancel()
+        await asyncio.gather(runner, return_exceptions=True)
+
+
+@pytest.mark.asyncio
+async def test_step_down_releases_the_lease_for_good(tmp_path):
+    path = str(tmp_path / "drain.lock")
+    first, second = _elector(FileLockBackend(path), "first"), _elector(FileLockBackend(path), "second")
+    running = [asyncio.create_task(first.run())]
+    try:
+        await _until(lambda: first.is_leader)
+        running.append(asyncio.create_task(second.run()))
+
+        await first.step_down()
+        await _until(lambda: second.is_leader)
+        await asyncio.sleep(0.1)
+        assert not first.is_leader
+    finally:
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+
+
+def test_renew_deadline_must_be_shorter_than_the_lease():
+    with pytest.raises(ValueError):
+        LeaderElector(_FlakyBackend(), lease_duration=5, renew_deadline=10)
+
+
+@pytest.mark.asyncio
+async def test_kube_lease_is_created_renewed_and_taken_over(tmp_path):
+    async with serve_fake_kube_api(tmp_path) as api:
+        first = KubeLeaseBackend("jobs", "apps", dynamic_client=api.client)
+        second = KubeLeaseBackend("jobs", "apps", dynamic_client=api.client)
+
+        assert await first.acquire("first", 1.0)
+        lease = api.get("coordination.k8s.io", "v1", "leases", "jobs", "apps")
+        assert lease["spec"]["holderIdentity"] == "first"
+        assert lease["spec"]["leaseDurationSeconds"] == 1
+
+        assert not await second.acquire("second", 1.0)
+        assert await first.acquire("first", 1.0)
+        assert not await second.acquire("second", 1.0)
+
+        # no renewal for a whole lease duration, as seen by the follower
+        await asyncio.sleep(1.05)
+        assert await second.acquire("second", 1.0)
+        lease = api.get("coordination.k8s.io", "v1", "leases", "jobs", "apps")
+        assert (lease["spec"]["holderIdentity"], lease["spec"]["leaseTransitions"]) == ("second", 1)
+        assert not await first.acquire("first", 1.0)
+
+        await second.release("second")
+        assert lease["spec"]["holderIdentity"] is None
+        assert await first.acquire("first", 1.0)
+
+
+@pytest.mark.asyncio
+async def test_kube_lease_race_has_a_single_winner(tmp_path):
+    async with serve_fake_kube_api(tmp_path) as api:
+        api.add("coordination.k8s.io", "v1", "leases", "jobs", "apps", spec={})
+        backends = [KubeLeaseBackend("jobs", "apps", dynamic_client=api.client) for _ in range(5)]
+
+        won = await asyncio.gather(*(backend.acquire(f"replica-{index}", 10) for index, backend in enumerate(backends)))
+
+        assert sum(won) == 1
+
+
+@pytest.mark.asyncio
+async def test_app_runs_leader_background_tasks_on_the_leader(tmp_path):
+    task = _Task()
+    app = general_create_app(
+        leader_background_tasks=[task],
+        enable_uptime_background_task=False,
+        settings=ApplicationSettings(
+            APP_NAME="Elected",
+            LEADER_ELECTION_LOCK_FILE=str(tmp_path / "elected.lock"),
+            LEADER_ELECTION_RETRY_PERIOD=0.02,
+        ),
+    )
+    assert isinstance(app.state.leader_elector.backend, FileLockBackend)
+
+    async with app.router.lifespan_context(app):
+        await _until(lambda: task.running == 1)
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            metrics = (await ac.get("/metrics")).text
+        assert 'app_leader{lock="elected.lock"} 1.0' in metrics
+
+    assert task.running == 0
+    assert not app.state.leader_elector.is_leader
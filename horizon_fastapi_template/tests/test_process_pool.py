@@ -0,0 +1,130 @@
+import asyncio
+import hashlib
+import os
+import time
+import zlib
+
+import pytest
+import pytest_asyncio
+from fastapi import Depends
+from httpx import AsyncClient, ASGITransport
+from prometheus_client import REGISTRY
+
+from .._internal import general_create_app
+from .._internal.utils.process_pool import ProcessPool, SharedBytes, get_process_pool, run_in_process
+
+
+def _pid() -> int:
+    return os.getpid()
+
+
+def _sleep(seconds: float) -> float:
+    time.sleep(seconds)
+    return seconds
+
+
+def _digest(data) -> tuple:
+    return type(data).__name__, len(data), hashlib.sha256(data).hexdigest()
+
+
+def _inflate(data: bytes) -> bytes:
+    return zlib.decompress(data)
+
+
+def _fail() -> None:
+    raise ValueError("cannot parse report")
+
+
+@run_in_process
+def compress(data: bytes, level: int = 6) -> bytes:
+    return zlib.compress(data, level)
+
+
+@pytest_asyncio.fixture
+async def pool():
+    process_pool = ProcessPool(2, name="tests")
+    process_pool.start()
+    try:
+        yield process_pool
+    finally:
+        await process_pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_calls_run_in_worker_processes(pool):
+    pids = await asyncio.gather(*(pool.run(_pid) for _ in range(4)))
+
+    assert os.getpid() not in pids
+    assert REGISTRY.get_sample_value("app_process_pool_calls_total", {"pool": "tests", "function": "_pid", "result": "ok"}) >= 4
+    assert REGISTRY.get_sample_value("app_process_pool_workers", {"pool": "tests"}) == 2
+
+
+@pytest.mark.asyncio
+async def test_errors_are_raised_in_the_caller(pool):
+    with pytest.raises(ValueError, match="cannot parse report"):
+        await pool.run(_fail)
+
+
+@pytest.mark.asyncio
+async def test_calls_time_out_and_are_counted(pool):
+    with pytest.raises(asyncio.TimeoutError):
+        await pool.run(_sleep, 1.0, timeout=0.05)
+
+    assert REGISTRY.get_sample_value(
+        "app_process_pool_calls_total", {"pool": "tests", "function": "_sleep", "result": "timeout"}
+    ) >= 1
+
+
+@pytest.mark.asyncio
+async def test_in_flight_calls_show_saturation(pool):
+    calls = [asyncio.ensure_future(pool.run(_sleep, 0.2)) for _ in range(3)]
+    await asyncio.sleep(0.05)
+
+    assert REGISTRY.get_sample_value("app_process_pool_in_flight", {"pool": "tests"}) == 3
+    await asyncio.gather(*calls)
+    assert REGISTRY.get_sample_value("app_process_pool_in_flight", {"pool": "tests"}) == 0
+
+
+@pytest.mark.asyncio
+async def test_large_payloads_go_through_shared_memory(pool):
+    payload = os.urandom(3 * 1024 * 1024)
+
+    # the worker maps the block instead of receiving a copy through the pipe
+    assert await pool.run(_digest, SharedBytes(payload)) == (
+        "memoryview", len(payload), hashlib.sha256(payload).hexdigest()
+    )
+    assert await pool.run(_inflate, zlib.compress(payload)) == payload
+
+
+@pytest.mark.asyncio
+async def test_decorated_functions_run_in_the_started_pool(pool):
+    data = b"report " * 1000
+
+    assert zlib.decompress(await compress(data, level=9)) == data
+
+
+@pytest.mark.asyncio
+async def test_decorated_functions_need_a_running_pool():
+    with pytest.raises(RuntimeError):
+        await compress(b"report")
+
+
+@pytest.mark.asyncio
+async def test_app_manages_the_process_pool():
+    process_pool = ProcessPool(1, name="app")
+    app = general_create_app(process_pool=process_pool, enable_uptime_background_task=False)
+
+    @app.post("/compress")
+    async def compress_body(pool: ProcessPool = Depends(get_process_pool)):
+        return {"size": len(await compress(b"x" * 10_000)), "pid": await pool.run(_pid)}
+
+    async with app.router.lifespan_context(app):
+        assert process_pool.running
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            response = await ac.post("/compress")
+            metrics = (await ac.get("/metrics")).text
+
+    assert response.status_code == 200
+    assert response.json()["pid"] != os.getpid()
+    assert 'app_process_pool_workers{pool="app"} 1.0' in metrics
+    assert not process_pool.running
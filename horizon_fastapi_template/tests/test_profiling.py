@@ -0,0 +1,100 @@
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from .._internal import general_create_app
+from .._internal.utils import settings
+
+TOKEN = "secret"
+
+
+@pytest.fixture
+def profiling_token(monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_TOKEN", TOKEN)
+
+
+async def _get(path, method="GET", **kwargs):
+    app = general_create_app(enable_profiling_routes=True)
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        return await ac.request(method, path, **kwargs)
+
+
+# -------------------------- access control --------------------------
+
+@pytest.mark.asyncio
+async def test_profiling_routes_disabled_by_default():
+    app = general_create_app()
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.get("/debug/tasks")
+
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_profiling_refused_without_configured_token():
+    response = await _get("/debug/tasks", headers={"X-Profiling-Token": TOKEN})
+    assert response.status_code == 403
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("wrong_token", ["wrong", "s\u00e9cret".encode("latin-1")])
+async def test_profiling_refused_with_wrong_token(profiling_token, wrong_token):
+    response = await _get("/debug/tasks", headers={"X-Profiling-Token": wrong_token})
+    assert response.status_code == 403
+
+
+# -------------------------- profiles --------------------------
+
+@pytest.mark.asyncio
+async def test_cpu_profile_collapsed(profiling_token):
+    response = await _get(
+        "/debug/profile/cpu",
+        params={"seconds": 0.05, "interval_ms": 1},
+        headers={"X-Profiling-Token": TOKEN},
+    )
+
+    assert response.status_code == 200
+    assert response.text.strip()
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in response.text.strip().splitlines())
+
+
+@pytest.mark.asyncio
+async def test_cpu_profile_speedscope(profiling_token):
+    response = await _get(
+        "/debug/profile/cpu",
+        params={"seconds": 0.05, "interval_ms": 1, "format": "speedscope"},
+        headers={"X-Profiling-Token": TOKEN},
+    )
+
+    profile = response.json()["profiles"][0]
+    assert profile["type"] == "sampled"
+    assert len(profile["samples"]) == len(profile["weights"])
+
+
+@pytest.mark.asyncio
+async def test_task_dump_lists_current_task(profiling_token):
+    response = await _get("/debug/tasks", headers={"X-Profiling-Token": TOKEN})
+
+    assert response.status_code == 200
+    assert any(task["stack"] for task in response.json())
+
+
+@pytest.mark.asyncio
+async def test_tracemalloc_snapshot_and_diff(profiling_token):
+    headers = {"X-Profiling-Token": TOKEN}
+    app = general_create_app(enable_profiling_routes=True)
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        assert (await ac.get("/debug/tracemalloc/diff", headers=headers)).status_code == 409
+        await ac.post("/debug/tracemalloc/start", headers=headers)
+        try:
+            snapshot = await ac.get("/debug/tracemalloc/snapshot", headers=headers)
+            diff = await ac.get("/debug/tracemalloc/diff", headers=headers)
+        finally:
+            await ac.post("/debug/tracemalloc/stop", headers=headers)
+
+    assert snapshot.status_code == 200
+    assert snapshot.json()["top"]
+    assert diff.status_code == 200
+    assert "top" in diff.json()
@@ -0,0 +1,123 @@
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient, ASGITransport
+from prometheus_client import REGISTRY
+
+from .._internal import general_create_app, settings
+from .._internal.middlewares.rate_limit import RateLimitMiddleware
+from .._internal.utils.rate_limit import MemoryRateLimitBackend, RateLimit, parse_rate_limit
+
+
+def _app(**middleware_kwargs) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items")
+    def items():
+        return {"ok": True}
+
+    @app.get("/search")
+    def search():
+        return {"ok": True}
+
+    @app.get("/liveness")
+    def liveness():
+        return {"status": "OK"}
+
+    app.add_middleware(RateLimitMiddleware, **middleware_kwargs)
+    return app
+
+
+def _client(app: FastAPI) -> AsyncClient:
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+
+
+def test_parse_rate_limit():
+    assert parse_rate_limit("120/minute") == RateLimit(rate=2.0, capacity=120.0)
+    assert parse_rate_limit("5/10 seconds") == RateLimit(rate=0.5, capacity=5.0)
+    assert parse_rate_limit("10/second burst 50") == RateLimit(rate=10.0, capacity=50.0)
+    with pytest.raises(ValueError):
+        parse_rate_limit("lots")
+
+
+def test_memory_backend_refills_and_evicts(monkeypatch):
+    clock = {"now": 1000.0}
+    monkeypatch.setattr("time.monotonic", lambda: clock["now"])
+    backend = MemoryRateLimitBackend(sweep_interval=10)
+    limit = RateLimit(rate=1.0, capacity=2.0)
+
+    assert backend.take("a", limit).allowed
+    assert backend.take("a", limit).allowed
+    denied = backend.take("a", limit)
+    assert not denied.allowed
+    assert denied.retry_after == pytest.approx(1.0)
+
+    clock["now"] += 1
+    assert backend.take("a", limit).allowed
+
+    clock["now"] += 1.5
+    assert backend.sweep() == 0
+    clock["now"] += 0.5
+    assert backend.sweep() == 1
+    assert len(backend) == 0
+
+
+@pytest.mark.asyncio
+async def test_requests_over_the_limit_get_429():
+    app = _app(default_limit="2/minute")
+
+    async with _client(app) as ac:
+        statuses = [(await ac.get("/items")).status_code for _ in range(3)]
+        limited = await ac.get("/items")
+
+    assert statuses == [200, 200, 429]
+    assert limited.json() == {"detail": "Too Many Requests"}
+    assert limited.headers["retry-after"] == "30"
+    assert REGISTRY.get_sample_value(
+        "http_rate_limit_requests_total", {"rule": "default", "result": "limited"}
+    ) >= 2
+
+
+@pytest.mark.asyncio
+async def test_route_limits_and_exclusions():
+    app = _app(default_limit="100/minute", route_limits={"^/search": "1/minute"}, exclude_paths=["/liveness"])
+
+    async with _client(app) as ac:
+        search = [(await ac.get("/search")).status_code for _ in range(2)]
+        items = (await ac.get("/items")).status_code
+        probes = [(await ac.get("/liveness")).status_code for _ in range(5)]
+
+    assert search == [200, 429]
+    assert items == 200
+    assert probes == [200] * 5
+
+
+@pytest.mark.asyncio
+async def test_api_keys_get_their_own_buckets():
+    app = _app(default_limit="1/minute", key="api_key")
+
+    async with _client(app) as ac:
+        first = await ac.get("/items", headers={"X-API-Key": "a"})
+        second = await ac.get("/items", headers={"X-API-Key": "b"})
+        again = await ac.get("/items", headers={"X-API-Key": "a"})
+
+    assert (first.status_code, second.status_code, again.status_code) == (200, 200, 429)
+
+
+def test_invalid_key_is_rejected():
+    with pytest.raises(ValueError):
+        RateLimitMiddleware(FastAPI(), key="cookie")
+
+
+@pytest.mark.asyncio
+async def test_factory_skips_probe_and_metrics_paths(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_DEFAULT", "1/minute")
+    app = general_create_app(enable_rate_limit_middleware=True)
+
+    async with _client(app) as ac:
+        root = [(await ac.get("/")).status_code for _ in range(2)]
+        probes = [(await ac.get(settings.PROBE_LIVENESS_PATH)).status_code for _ in range(3)]
+        metrics = [(await ac.get("/metrics")).status_code for _ in range(3)]
+
+    assert root == [200, 429]
+    assert probes == [200] * 3
+    assert metrics == [200] * 3
@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from httpx import AsyncClient, ASGITransport
+from loguru import logger
+from prometheus_client import REGISTRY
+
+from .._internal import general_create_app
+from .._internal.middlewares.log_request import LogRequestsMiddleware
+
+
+def _app(**middleware_kwargs) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items")
+    def items():
+        return []
+
+    @app.get("/broken")
+    def broken():
+        raise HTTPException(status_code=503)
+
+    @app.get("/slow")
+    async def slow():
+        await asyncio.sleep(0.02)
+        return {}
+
+    app.add_middleware(LogRequestsMiddleware, **middleware_kwargs)
+    return app
+
+
+@pytest.fixture
+def messages():
+    captured = []
+    sink = logger.add(lambda message: captured.append(message.record["message"]), level="INFO")
+    yield captured
+    logger.remove(sink)
+
+
+async def _get(app: FastAPI, path: str, times: int = 1) -> None:
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        for _ in range(times):
+            await ac.get(path)
+
+
+def _count(result: str) -> float:
+    return REGISTRY.get_sample_value("http_request_logs_total", {"result": result}) or 0.0
+
+
+@pytest.mark.asyncio
+async def test_full_mode_logs_arrival_and_completion(messages):
+    await _get(_app(), "/items")
+
+    assert messages == ["GET /items", "GET /items 200 "]
+
+
+@pytest.mark.asyncio
+async def test_combined_mode_logs_one_line(messages):
+    await _get(_app(mode="combined"), "/items")
+
+    assert len(messages) == 1
+    assert messages[0].startswith("GET /items 200 ") and messages[0].endswith("ms")
+
+
+@pytest.mark.asyncio
+async def test_sampling_keeps_errors_and_slow_requests(messages):
+    before = _count("sampled_out")
+    app = _app(mode="combined", sample_rate=0.0, slow_threshold=0.01)
+
+    await _get(app, "/items", times=3)
+    await _get(app, "/broken")
+    await _get(app, "/slow")
+
+    assert [message.split()[1] for message in messages] == ["/broken", "/slow"]
+    assert _count("sampled_out") == before + 3
+
+
+@pytest.mark.asyncio
+async def test_path_limits_cap_log_lines(messages):
+    before = _count("rate_limited")
+
+    await _get(_app(mode="combined", path_limits={"^/items": "2/minute"}), "/items", times=5)
+
+    assert len(messages) == 2
+    assert _count("rate_limited") == before + 3
+
+
+@pytest.mark.asyncio
+async def test_excluded_paths_are_logged_at_debug(messages):
+    await _get(_app(mode="combined", sample_rate=0.0, exclude_paths=["/items"]), "/items")
+
+    assert messages == []
+
+
+def test_invalid_mode_is_rejected():
+    with pytest.raises(ValueError):
+        LogRequestsMiddleware(FastAPI(), mode="verbose")
+
+
+@pytest.mark.asyncio
+async def test_factory_logs_process_time(messages):
+    await _get(general_create_app(), "/")
+
+    assert messages[0] == "GET /"
+    assert messages[1].startswith("GET / 200 ") and messages[1].split()[-1].isdigit()
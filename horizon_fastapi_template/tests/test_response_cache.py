@@ -0,0 +1,250 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import APIRouter, Depends, Response
+from httpx import AsyncClient, ASGITransport
+from loguru import logger
+from prometheus_client import REGISTRY
+
+from .._internal import general_create_app
+from .._internal.routes.api_route import TemplateAPIRoute
+from .._internal.utils import ApplicationSettings
+from .._internal.utils.response_cache import (
+    FileCacheBackend,
+    MemoryCacheBackend,
+    ResponseCachePolicy,
+    CachedResponse,
+    cache_response,
+)
+
+
+def _app(backend, **cache_kwargs):
+    app = general_create_app()
+    calls = {"count": 0}
+
+    @app.get("/items")
+    @cache_response(ttl=60, backend=backend, **cache_kwargs)
+    async def items(q: str = ""):
+        calls["count"] += 1
+        await asyncio.sleep(0.01)
+        return {"q": q, "count": calls["count"]}
+
+    return app, calls
+
+
+def _client(app) -> AsyncClient:
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+
+
+@pytest.mark.asyncio
+async def test_responses_are_served_from_cache_per_query():
+    app, calls = _app(MemoryCacheBackend())
+
+    async with _client(app) as ac:
+        first = await ac.get("/items", params={"q": "a"})
+        second = await ac.get("/items", params={"q": "a"})
+        other = await ac.get("/items", params={"q": "b"})
+
+    assert first.headers["x-cache"] == "MISS"
+    assert second.headers["x-cache"] == "HIT"
+    assert second.json() == first.json() == {"q": "a", "count": 1}
+    assert other.json() == {"q": "b", "count": 2}
+    assert second.headers["etag"] == first.headers["etag"]
+
+
+@pytest.mark.asyncio
+async def test_etag_revalidation_returns_not_modified():
+    app, _ = _app(MemoryCacheBackend())
+
+    async with _client(app) as ac:
+        first = await ac.get("/items")
+        revalidated = await ac.get("/items", headers={"If-None-Match": first.headers["etag"]})
+        changed = await ac.get("/items", headers={"If-None-Match": '"other"'})
+
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert changed.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_call_the_handler_once():
+    app, calls = _app(MemoryCacheBackend())
+
+    async with _client(app) as ac:
+        responses = await asyncio.gather(*(ac.get("/items") for _ in range(10)))
+
+    assert calls["count"] == 1
+    assert {response.json()["count"] for response in responses} == {1}
+
+
+@pytest.mark.asyncio
+async def test_vary_headers_split_entries_and_authorization_bypasses():
+    app, calls = _app(MemoryCacheBackend(), vary=["Accept-Language"])
+
+    async with _client(app) as ac:
+        await ac.get("/items", headers={"Accept-Language": "en"})
+        await ac.get("/items", headers={"Accept-Language": "fr"})
+        cached = await ac.get("/items", headers={"Accept-Language": "en"})
+        private = await ac.get("/items", headers={"Authorization": "Bearer token"})
+
+    assert cached.json()["count"] == 1
+    assert "x-cache" not in private.headers
+    assert calls["count"] == 3
+
+
+@pytest.mark.asyncio
+async def test_response_vary_is_learned_per_route():
+    policy = ResponseCachePolicy(ttl=60, backend=MemoryCacheBackend())
+    app = general_create_app()
+
+    @app.get("/users/{user_id}", dependencies=[Depends(policy)])
+    async def user(user_id: int, q: str = ""):
+        return Response(f"{user_id}{q}", headers={"Vary": "Accept-Language"})
+
+    async with _client(app) as ac:
+        for user_id in range(20):
+            await ac.get(f"/users/{user_id}", params={"q": str(user_id)})
+        english = await ac.get("/users/1", params={"q": "1"}, headers={"Accept-Language": "en"})
+        await policy.invalidate("/users/1", "q=1")
+        invalidated = await ac.get("/users/1", params={"q": "1"})
+
+    assert policy._learned_vary == {"/users/{user_id}": ("accept-language",)}
+    assert english.headers["x-cache"] == "MISS"
+    assert invalidated.headers["x-cache"] == "MISS"
+
+
+@pytest.mark.asyncio
+async def test_stale_entries_are_served_while_revalidating():
+    backend = MemoryCacheBackend()
+    policy = ResponseCachePolicy(ttl=60, stale_while_revalidate=60, backend=backend)
+    app = general_create_app()
+    calls = {"count": 0}
+
+    @app.get("/stale", dependencies=[Depends(policy)])
+    async def stale():
+        calls["count"] += 1
+        return {"count": calls["count"]}
+
+    async with _client(app) as ac:
+        await ac.get("/stale")
+        for entry in backend._entries.values():
+            entry.fresh_until = time.time() - 1
+
+        served = await ac.get("/stale")
+        for _ in range(100):
+            if calls["count"] == 2:
+                break
+            await asyncio.sleep(0.01)
+        refreshed = await ac.get("/stale")
+
+    assert served.headers["x-cache"] == "STALE"
+    assert served.json() == {"count": 1}
+    assert refreshed.headers["x-cache"] == "HIT"
+    assert refreshed.json() == {"count": 2}
+
+
+@pytest.mark.asyncio
+async def test_refreshes_are_not_rate_limited_logged_or_traced():
+    logged = []
+    sink = logger.add(lambda message: logged.append(message.record["message"]), level="INFO")
+    backend = MemoryCacheBackend()
+    app = general_create_app(
+        enable_rate_limit_middleware=True,
+        enable_tracing_middleware=True,
+        settings=ApplicationSettings(RATE_LIMIT_DEFAULT="3/minute"),
+    )
+    calls = {"count": 0}
+
+    @app.get("/limited")
+    @cache_response(ttl=60, stale_while_revalidate=60, backend=backend)
+    async def limited():
+        calls["count"] += 1
+        return {"count": calls["count"]}
+
+    async with _client(app) as ac:
+        await ac.get("/limited")
+        for entry in backend._entries.values():
+            entry.fresh_until = time.time() - 1
+        assert (await ac.get("/limited")).headers["x-cache"] == "STALE"
+        for _ in range(100):
+            if calls["count"] == 2:
+                break
+            await asyncio.sleep(0.01)
+        third = await ac.get("/limited")
+    logger.remove(sink)
+
+    assert (third.status_code, third.json()) == (200, {"count": 2})
+    assert len(app.state.tracer.traces()) == 3
+    assert sum(message.startswith("GET /limited ") for message in logged) == 3
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_enforces_entry_and_byte_limits():
+    def entry(size: int) -> CachedResponse:
+        now = time.time()
+        return CachedResponse(200, [], b"x" * size, '"e"', now, now + 60, now + 60)
+
+    backend = MemoryCacheBackend(max_entries=2, max_bytes=100)
+    await backend.set("a", entry(40))
+    await backend.set("b", entry(40))
+    await backend.get("a")
+    await backend.set("c", entry(40))
+
+    assert await backend.get("b") is None
+    assert await backend.get("a") is not None
+    assert backend.bytes == 80
+
+    await backend.set("huge", entry(1000))
+    assert await backend.get("huge") is None
+
+
+@pytest.mark.asyncio
+async def test_file_backend_is_shared_between_apps(tmp_path):
+    first_app, first_calls = _app(FileCacheBackend(tmp_path))
+    second_app, second_calls = _app(FileCacheBackend(tmp_path))
+
+    async with _client(first_app) as ac:
+        await ac.get("/items")
+    async with _client(second_app) as ac:
+        response = await ac.get("/items")
+
+    assert response.headers["x-cache"] == "HIT"
+    assert (first_calls["count"], second_calls["count"]) == (1, 0)
+
+
+@pytest.mark.asyncio
+async def test_hit_ratio_is_exported():
+    app, _ = _app(MemoryCacheBackend())
+
+    async with _client(app) as ac:
+        await ac.get("/items", params={"q": "ratio"})
+        await ac.get("/items", params={"q": "ratio"})
+        metrics = await ac.get("/metrics")
+
+    assert 'http_response_cache_hit_ratio{route="/items"}' in metrics.text
+    assert REGISTRY.get_sample_value(
+        "http_response_cache_requests_total", {"route": "/items", "result": "hit"}
+    ) >= 1
+
+
+@pytest.mark.asyncio
+async def test_cached_routes_of_plain_routers_are_refused_at_startup():
+    template_router = APIRouter(route_class=TemplateAPIRoute)
+    plain_router = APIRouter()
+
+    for router in (template_router, plain_router):
+        @router.get("/cached")
+        @cache_response(ttl=60, backend=MemoryCacheBackend())
+        async def cached():
+            return {}
+
+    app = general_create_app(enable_uptime_background_task=False)
+    app.include_router(template_router, prefix="/template")
+    async with app.router.lifespan_context(app):
+        pass
+
+    app.include_router(plain_router, prefix="/plain")
+    with pytest.raises(RuntimeError, match="route_class=TemplateAPIRoute"):
+        async with app.router.lifespan_context(app):
+            pass
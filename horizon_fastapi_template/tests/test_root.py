@@ -3,6 +3,7 @@ from unittest.mock import AsyncMock
 
 import pytest
 from httpx import AsyncClient, ASGITransport
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
 from .._internal import general_create_app
 
@@ -124,4 +125,42 @@ async def test_metrics_endpoint_enabled():
         response = await ac.get("/metrics")
 
     assert response.status_code == 200
-    assert "python_info" in response.text
\ No newline at end of file
+    assert "python_info" in response.text
+
+# ------------------------ Tests for fast JSON responses -------------------------
+@pytest.mark.asyncio
+async def test_fast_json_renders_routes_and_errors(monkeypatch):
+    from .._internal.utils import fast_json
+
+    rendered = []
+    original = fast_json.json_dumps
+
+    def spy(content):
+        rendered.append(content)
+        return original(content)
+
+    monkeypatch.setattr(fast_json, "json_dumps", spy)
+
+    app = general_create_app(enable_fast_json=True)
+
+    @app.get("/teapot")
+    def teapot():
+        raise HTTPException(status_code=418, detail="I'm a teapot")
+
+    @app.get("/boom")
+    def boom():
+        raise RuntimeError("boom")
+
+    transport = ASGITransport(app=app, raise_app_exceptions=False)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        root = await ac.get("/")
+        liveness = await ac.get("/liveness")
+        teapot = await ac.get("/teapot")
+        error = await ac.get("/boom")
+
+    assert root.json() == {"message": "Welcome to MyApp!"}
+    assert liveness.json() == {"status": "OK"}
+    assert teapot.status_code == 418
+    assert error.status_code == 500
+    assert {"detail": "I'm a teapot"} in rendered
+    assert {"detail": "Internal Server Error"} in rendered
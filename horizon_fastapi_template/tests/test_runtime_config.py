@@ -0,0 +1,57 @@
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from .._internal import general_create_app, settings
+from .._internal.utils import ApplicationSettings, RuntimeConfig
+from .._internal.utils.runtime_config import PathMatcher
+
+
+async def _get(app, path):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        return await ac.get(path)
+
+
+@pytest.mark.asyncio
+async def test_apps_with_different_settings_share_a_process():
+    first = general_create_app(settings=ApplicationSettings(APP_NAME="First", PROCESS_TIME_HEADER="X-First-Time"))
+    second = general_create_app(settings=ApplicationSettings(APP_NAME="Second", PROBE_LIVENESS_PATH="/alive"))
+
+    first_root, second_root = await _get(first, "/"), await _get(second, "/")
+
+    assert first_root.json() == {"message": "Welcome to First!"}
+    assert second_root.json() == {"message": "Welcome to Second!"}
+    assert "x-first-time" in first_root.headers and "x-process-time" in second_root.headers
+    assert (await _get(second, "/alive")).status_code == 200
+    assert (await _get(first, "/alive")).status_code == 404
+
+
+def test_proxy_prefixes_do_not_mutate_settings():
+    proxied = ApplicationSettings(PROXIED=True, PROXY_LISTEN_PATH="/proxy/")
+
+    config = RuntimeConfig.from_settings(proxied)
+
+    assert config.root_path == "/proxy"
+    assert config.swagger_openapi_json_url == "/proxy/openapi.json"
+    assert config.swagger_static_files == "/proxy/static/swagger"
+    assert config.log_request_exclude("/proxy/metrics")
+    assert proxied.SWAGGER_STATIC_FILES == "/static/swagger"
+    assert proxied.LOG_REQUEST_EXCLUDE_PATHS == settings.LOG_REQUEST_EXCLUDE_PATHS
+
+
+def test_config_is_a_frozen_copy():
+    config = RuntimeConfig.from_settings(settings)
+
+    assert config.settings is not settings
+    assert config.process_time_header == settings.PROCESS_TIME_HEADER.lower().encode()
+    with pytest.raises(AttributeError):
+        config.root_path = "/elsewhere"
+
+
+def test_path_matcher():
+    matcher = PathMatcher(["/health", "/graphql/v.*/playground"])
+
+    assert matcher("/health/live")
+    assert matcher("/graphql/v2/playground")
+    assert not matcher("/graphql/v2")
+    assert not PathMatcher()("/health")
+    assert PathMatcher.of(matcher) is matcher
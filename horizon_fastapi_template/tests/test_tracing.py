@@ -0,0 +1,93 @@
+import pytest
+import respx
+from httpx import AsyncClient, ASGITransport
+
+from .._internal import general_create_app
+from .._internal.database.basic_api import BaseAPI
+from .._internal.utils import ApplicationSettings
+from .._internal.utils.tracing import span, start_trace
+
+
+# -------------------------- span recording --------------------------
+
+def test_span_is_noop_without_active_trace():
+    with span("orphan") as recorded:
+        assert recorded is None
+
+
+def test_nested_spans_share_trace_and_parent():
+    with start_trace("root") as root:
+        with span("child") as child:
+            with span("grandchild") as grandchild:
+                pass
+
+    assert [item.name for item in root.trace.spans] == ["root", "child", "grandchild"]
+    assert child.parent_id == root.span_id
+    assert grandchild.parent_id == child.span_id
+    assert all(item.duration_ns is not None for item in root.trace.spans)
+
+
+# -------------------------- middleware --------------------------
+
+@pytest.mark.asyncio
+async def test_tracing_middleware_emits_server_timing_and_buffers_trace():
+    app = general_create_app(enable_tracing_middleware=True, settings=ApplicationSettings(PROFILING_TOKEN="secret"))
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.get("/")
+        refused = await ac.get("/traces")
+        traces = await ac.get("/traces", headers={"X-Profiling-Token": "secret"})
+
+    assert refused.status_code == 403
+
+    timing = response.headers["server-timing"]
+    assert "request;dur=" in timing
+    assert "handler;dur=" in timing
+    assert "middleware.log_request;dur=" in timing
+
+    spans = traces.json()["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert {"request", "handler"} <= {item["name"] for item in spans}
+
+
+@pytest.mark.asyncio
+async def test_tracing_middleware_skips_unsampled_requests():
+    app = general_create_app(enable_tracing_middleware=True, settings=ApplicationSettings(TRACE_SAMPLE_RATE=0.0))
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.get("/")
+
+    assert "server-timing" not in response.headers
+    assert app.state.tracer.traces() == []
+
+
+@pytest.mark.asyncio
+async def test_each_application_keeps_its_own_traces():
+    traced = general_create_app(enable_tracing_middleware=True, settings=ApplicationSettings(TRACE_BUFFER_SIZE=2))
+    unsampled = general_create_app(enable_tracing_middleware=True, settings=ApplicationSettings(TRACE_SAMPLE_RATE=0.0))
+
+    for app in (traced, unsampled):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            for _ in range(3):
+                await ac.get("/")
+
+    assert (traced.state.tracer.sample_rate, unsampled.state.tracer.sample_rate) == (1.0, 0.0)
+    assert len(traced.state.tracer.traces()) == 2
+    assert unsampled.state.tracer.traces() == []
+
+
+@pytest.mark.asyncio
+async def test_base_api_records_client_span():
+    api = BaseAPI(base_url="https://example.com")
+    with respx.mock(base_url="https://example.com") as mock:
+        mock.get("/test").respond(200)
+        with start_trace("root") as root:
+            async with api as client:
+                await client.get("/test", params={"token": "secret"})
+
+    http_span = root.trace.spans[1]
+    assert http_span.name == "http"
+    assert http_span.parent_id == root.span_id
+    assert http_span.attributes["http.status_code"] == 200
+    assert http_span.attributes["http.url"] == "https://example.com/test"
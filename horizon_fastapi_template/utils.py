@@ -1,11 +1,108 @@
-from ._internal.database import AsyncFTPClient, BaseAPI, get_dynamic_client
+from ._internal.database import (
+    AsyncFTPClient,
+    BaseAPI,
+    ChainedPagination,
+    CursorPagination,
+    FTPEntry,
+    IndexedPagination,
+    KubeOperationResult,
+    LinkHeaderPagination,
+    OffsetPagination,
+    PageNumberPagination,
+    Pagination,
+    TransferResult,
+    TransferVerificationError,
+    close_base_api_clients,
+    close_dynamic_clients,
+    get_dynamic_client,
+    kube_bulk_apply,
+    kube_bulk_delete,
+    kube_bulk_patch,
+    kube_list,
+    kube_list_pages,
+)
+from ._internal.gql import (
+    BroadcastHub,
+    DataLoaderContext,
+    InstrumentedDataLoader,
+    base_api_loader,
+    create_context_getter,
+    kube_loader,
+    kube_watch_source,
+)
 from ._internal.models import GraphQLVersion
-from ._internal.utils import settings
+from ._internal.routes.api_route import TemplateAPIRoute
+from ._internal.tasks.job_queue import JobQueue, JobStore, SQLiteJobStore, get_job_queue
+from ._internal.tasks.leader_election import FileLockBackend, KubeLeaseBackend, LeaderElector, LeaseBackend
+from ._internal.utils import ApplicationSettings, RuntimeConfig, settings
+from ._internal.utils.graceful_shutdown import GracefulShutdown
+from ._internal.utils.process_pool import ProcessPool, SharedBytes, get_process_pool, run_in_process
+from ._internal.utils.rate_limit import MemoryRateLimitBackend, RateLimitBackend
+from ._internal.utils.response_cache import (
+    FileCacheBackend,
+    MemoryCacheBackend,
+    ResponseCacheBackend,
+    ResponseCachePolicy,
+    cache_response,
+)
+from ._internal.utils.json_stream import iter_json_items
+from ._internal.utils.tracing import span, traced
 
 __all__ = [
     "AsyncFTPClient",
     "BaseAPI",
+    "FTPEntry",
+    "KubeOperationResult",
+    "ChainedPagination",
+    "CursorPagination",
+    "IndexedPagination",
+    "LinkHeaderPagination",
+    "OffsetPagination",
+    "PageNumberPagination",
+    "Pagination",
+    "TransferResult",
+    "TransferVerificationError",
+    "BroadcastHub",
+    "DataLoaderContext",
+    "InstrumentedDataLoader",
+    "base_api_loader",
+    "create_context_getter",
+    "kube_loader",
+    "kube_watch_source",
+    "close_base_api_clients",
+    "close_dynamic_clients",
     "get_dynamic_client",
+    "kube_bulk_apply",
+    "kube_bulk_delete",
+    "kube_bulk_patch",
+    "kube_list",
+    "kube_list_pages",
     "GraphQLVersion",
-    "settings"
+    "TemplateAPIRoute",
+    "JobQueue",
+    "JobStore",
+    "SQLiteJobStore",
+    "get_job_queue",
+    "FileLockBackend",
+    "KubeLeaseBackend",
+    "LeaderElector",
+    "LeaseBackend",
+    "FileCacheBackend",
+    "MemoryCacheBackend",
+    "ResponseCacheBackend",
+    "ResponseCachePolicy",
+    "cache_response",
+    "GracefulShutdown",
+    "ProcessPool",
+    "SharedBytes",
+    "get_process_pool",
+    "run_in_process",
+    "MemoryRateLimitBackend",
+    "RateLimitBackend",
+    "ApplicationSettings",
+    "RuntimeConfig",
+    "settings",
+    "iter_json_items",
+    "span",
+    "traced",
 ]
\ No newline at end of file